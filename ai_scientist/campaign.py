@@ -0,0 +1,215 @@
+"""
+Campaign mode: run many ideas of an ideas file concurrently (launch_scientist_bfts.py --campaign).
+
+Every idea runs in its own launch_scientist_bfts.py process. A DeviceScheduler leases GPUs to
+an idea only for its GPU-bound phase (the BFTS experiments): the idea reports its phase through
+the file named by AI_SCIENTIST_PHASE_FILE, and once it moves on to the LLM-bound plot
+aggregation, writeup and review, its GPUs are handed to the next idea.
+"""
+
+import json
+import logging
+import os
+import os.path as osp
+import subprocess
+import sys
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+from ai_scientist.treesearch.parallel_agent import GPUManager
+
+logger = logging.getLogger("ai-scientist")
+
+PHASE_FILE_ENV = "AI_SCIENTIST_PHASE_FILE"
+# phases during which an idea holds its GPUs (before its first report it is starting up)
+GPU_PHASES = (None, "experiments")
+
+
+def report_phase(phase: str, idea_dir: Optional[str] = None):
+    """Record the phase of this idea for the campaign scheduler (no-op outside a campaign)"""
+    path = os.environ.get(PHASE_FILE_ENV)
+    if not path:
+        return
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"phase": phase, "idea_dir": idea_dir, "time": time.time()}, f)
+    os.replace(tmp_path, path)
+
+
+def read_phase(path: str) -> Dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"phase": None}
+
+
+class DeviceScheduler(GPUManager):
+    """
+    Leases groups of gpus_per_idea GPUs to the ideas of a campaign. Without GPUs, ideas run
+    on the CPU and at most cpu_slots of them are in their experiment phase at a time.
+    """
+
+    def __init__(self, device_ids: List, gpus_per_idea: int = 1, cpu_slots: int = 1):
+        super().__init__(len(device_ids), device_ids)
+        if device_ids and not 1 <= gpus_per_idea <= len(device_ids):
+            raise ValueError(
+                f"gpus_per_idea must be between 1 and {len(device_ids)}, got {gpus_per_idea}"
+            )
+        self.gpus_per_idea = gpus_per_idea if device_ids else 0
+        self.cpu_slots = cpu_slots
+        self.leases: Dict[str, List] = {}  # idea -> its GPUs
+
+    def acquire(self, idea_id: str) -> Optional[List]:
+        """GPUs for the idea (empty on CPU-only machines), or None if none are free"""
+        if self.gpus_per_idea == 0:
+            if len(self.leases) >= self.cpu_slots:
+                return None
+            self.leases[idea_id] = []
+            return []
+        if len(self.available_gpus) < self.gpus_per_idea:
+            return None
+        self.leases[idea_id] = [
+            self.acquire_gpu(f"{idea_id}/{i}") for i in range(self.gpus_per_idea)
+        ]
+        return self.leases[idea_id]
+
+    def release(self, idea_id: str):
+        for i in range(len(self.leases.pop(idea_id, []))):
+            self.release_gpu(f"{idea_id}/{i}")
+
+
+@dataclass
+class IdeaRun:
+    idea_idx: int
+    name: str
+    log_path: str
+    phase_file: str
+    devices: List = field(default_factory=list)
+    start_time: float = 0.0
+    gpu_release_time: Optional[float] = None
+    end_time: Optional[float] = None
+    returncode: Optional[int] = None
+    idea_dir: Optional[str] = None
+    phase: Optional[str] = None
+
+
+def run_campaign(
+    ideas: List[Dict],
+    idea_indices: List[int],
+    child_argv: List[str],
+    campaign_dir: str,
+    scheduler: DeviceScheduler,
+    max_concurrent_ideas: int,
+    launch_script: str,
+    poll_interval: float = 5.0,
+) -> List[IdeaRun]:
+    """
+    Run launch_script with child_argv + --idea_idx for every index, at most
+    max_concurrent_ideas at a time, and each idea's experiments only on GPUs leased to it.
+    """
+    os.makedirs(campaign_dir, exist_ok=True)
+    pending = deque(idea_indices)
+    running: Dict[str, tuple] = {}  # lease id -> (IdeaRun, process)
+    finished: List[IdeaRun] = []
+    start_time = time.time()
+
+    def write_summary():
+        elapsed_hours = (time.time() - start_time) / 3600
+        completed = [r for r in finished if r.returncode == 0]
+        summary = {
+            "elapsed_hours": elapsed_hours,
+            "completed": len(completed),
+            "failed": len(finished) - len(completed),
+            "ideas_per_hour": len(completed) / elapsed_hours if elapsed_hours else 0.0,
+            "gpu_hours": sum(
+                len(r.devices) * ((r.gpu_release_time or r.end_time) - r.start_time)
+                for r in finished
+            )
+            / 3600,
+            "runs": [asdict(r) for r in finished]
+            + [asdict(r) for r, _ in running.values()],
+        }
+        with open(osp.join(campaign_dir, "campaign_summary.json"), "w") as f:
+            json.dump(summary, f, indent=2)
+        return summary
+
+    while pending or running:
+        changed = False
+        for lease_id, (run, process) in list(running.items()):
+            status = read_phase(run.phase_file)
+            run.phase = status.get("phase")
+            run.idea_dir = status.get("idea_dir") or run.idea_dir
+            if run.gpu_release_time is None and run.phase not in GPU_PHASES:
+                # experiments are done, the rest is LLM-bound: hand the GPUs on
+                scheduler.release(lease_id)
+                run.gpu_release_time = time.time()
+                logger.info(
+                    f"Idea {run.idea_idx} ({run.name}) entered {run.phase}, released devices {run.devices}"
+                )
+                changed = True
+            if process.poll() is not None:
+                run.returncode = process.returncode
+                run.end_time = time.time()
+                if run.gpu_release_time is None:
+                    scheduler.release(lease_id)
+                    run.gpu_release_time = run.end_time
+                del running[lease_id]
+                finished.append(run)
+                changed = True
+                logger.info(
+                    f"Idea {run.idea_idx} ({run.name}) finished with exit code {run.returncode} "
+                    f"after {(run.end_time - run.start_time) / 3600:.2f}h"
+                )
+
+        while pending and len(running) < max_concurrent_ideas:
+            idx = pending[0]
+            lease_id = f"idea_{idx}"
+            devices = scheduler.acquire(lease_id)
+            if devices is None:
+                break
+            pending.popleft()
+            run = IdeaRun(
+                idea_idx=idx,
+                name=ideas[idx]["Name"],
+                log_path=osp.join(campaign_dir, f"idea_{idx}.log"),
+                phase_file=osp.join(campaign_dir, f"idea_{idx}.phase.json"),
+                devices=devices,
+                start_time=time.time(),
+            )
+            if osp.exists(run.phase_file):
+                os.remove(run.phase_file)
+            env = dict(os.environ, **{PHASE_FILE_ENV: run.phase_file})
+            if scheduler.num_gpus > 0:
+                env["CUDA_VISIBLE_DEVICES"] = ",".join(str(d) for d in devices)
+            with open(run.log_path, "a") as log:
+                process = subprocess.Popen(
+                    [sys.executable, launch_script, *child_argv, "--idea_idx", str(idx)],
+                    stdout=log,
+                    stderr=subprocess.STDOUT,
+                    env=env,
+                )
+            running[lease_id] = (run, process)
+            changed = True
+            logger.info(
+                f"Started idea {idx} ({run.name}) on devices {devices or 'cpu'}, log: {run.log_path}"
+            )
+
+        if changed:
+            summary = write_summary()
+            print(
+                f"Campaign: {len(finished)}/{len(idea_indices)} ideas done, "
+                f"{len(running)} running, {len(pending)} pending, "
+                f"{summary['ideas_per_hour']:.2f} ideas/hour"
+            )
+        time.sleep(poll_interval)
+
+    summary = write_summary()
+    print(
+        f"Campaign finished: {summary['completed']} ideas completed, {summary['failed']} failed "
+        f"in {summary['elapsed_hours']:.2f}h ({summary['ideas_per_hour']:.2f} ideas/hour, "
+        f"{summary['gpu_hours']:.2f} GPU-hours leased)"
+    )
+    return finished
@@ -3,6 +3,11 @@ import os
 import re
 from typing import Any
 from ai_scientist.utils.token_tracker import track_token_usage
+from ai_scientist.utils.response_cache import (
+    get_response_cache,
+    make_cache_key,
+    should_cache,
+)
 
 import anthropic
 import backoff
@@ -272,12 +277,58 @@ def get_response_from_llm(
     print_debug=False,
     msg_history=None,
     temperature=0.7,
+    cache=None,
 ) -> tuple[str, list[dict[str, Any]]]:
-    msg = prompt
+    """
+    With the LLM response cache enabled (see ai_scientist.utils.response_cache), calls with
+    temperature 0 or cache=True are answered from the cache when the same request was seen.
+    """
     if msg_history is None:
         msg_history = []
 
-    if "claude" in model:
+    if should_cache(temperature, cache):
+        key = make_cache_key(
+            api="llm",
+            model=model,
+            system_message=system_message,
+            msg_history=msg_history,
+            prompt=prompt,
+            temperature=temperature,
+            max_tokens=MAX_NUM_TOKENS,
+        )
+        content, new_msg_history = get_response_cache().cached_call(
+            key,
+            lambda: _get_response_from_llm(
+                prompt, client, model, system_message, msg_history, temperature
+            ),
+        )
+    else:
+        content, new_msg_history = _get_response_from_llm(
+            prompt, client, model, system_message, msg_history, temperature
+        )
+
+    if print_debug:
+        print()
+        print("*" * 20 + " LLM START " + "*" * 20)
+        for j, msg in enumerate(new_msg_history):
+            print(f'{j}, {msg["role"]}: {msg["content"]}')
+        print(content)
+        print("*" * 21 + " LLM END " + "*" * 21)
+        print()
+
+    return content, new_msg_history
+
+
+def _get_response_from_llm(
+    msg, client, model, system_message, msg_history, temperature
+) -> tuple[str, list[dict[str, Any]]]:
+    if model.startswith("stub/"):
+        from ai_scientist.treesearch.backend.backend_stub import stub_completion
+
+        new_msg_history = msg_history + [{"role": "user", "content": msg}]
+        content = stub_completion(model, system_message, json.dumps(new_msg_history))
+        new_msg_history = new_msg_history + [{"role": "assistant", "content": content}]
+    elif "claude" in model:
         new_msg_history = msg_history + [
             {
                 "role": "user",
@@ -437,15 +488,6 @@ def get_response_from_llm(
     else:
         raise ValueError(f"Model {model} not supported.")
 
-    if print_debug:
-        print()
-        print("*" * 20 + " LLM START " + "*" * 20)
-        for j, msg in enumerate(new_msg_history):
-            print(f'{j}, {msg["role"]}: {msg["content"]}')
-        print(content)
-        print("*" * 21 + " LLM END " + "*" * 21)
-        print()
-
     return content, new_msg_history
 
 
@@ -478,7 +520,10 @@ def extract_json_between_markers(llm_output: str) -> dict | None:
 
 
 def create_client(model) -> tuple[Any, str]:
-    if model.startswith("claude-"):
+    if model.startswith("stub/"):
+        print(f"Using local stub model {model}.")
+        return None, model
+    elif model.startswith("claude-"):
         print(f"Using Anthropic API with model {model}.")
         return anthropic.Anthropic(), model
     elif model.startswith("bedrock") and "claude" in model:
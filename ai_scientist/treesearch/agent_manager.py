@@ -1,14 +1,23 @@
 from typing import List, Optional, Dict, Callable, Any, Tuple
-import pickle
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from enum import Enum, auto
 from pathlib import Path
 import logging
-from .parallel_agent import ParallelAgent
+from .checkpoint import CheckpointStore
+from .exec_budget import ExecBudgetManager
+from .gpu_lease import GPULeasePool
+from .parallel_agent import ParallelAgent, WorkerPool, create_gpu_lease_pool
 from .journal import Journal, Node
 import copy
 import re
-from .backend import query, FunctionSpec
+from .backend import (
+    client_registry,
+    query,
+    FunctionSpec,
+    prompt_stats,
+    set_prompt_budgets,
+)
+from ai_scientist.utils.token_tracker import token_tracker
 import json
 from rich import print
 from .utils.serialize import parse_markdown_to_dict
@@ -137,9 +146,28 @@ class AgentManager:
         self.current_stage_number = 0
         self.stages: List[Stage] = []
         self.current_stage: Optional[Stage] = None
+        # the sub-stage being run (current_stage is the first sub-stage of the main stage)
+        self.current_substage: Optional[Stage] = None
         self.journals: Dict[str, Journal] = {}
         self.stage_history: List[StageTransition] = []
         self.completed_stages: List[str] = []
+        # worker processes shared by the agents of all sub-stages (started lazily)
+        self.worker_pool: Optional[WorkerPool] = None
+        # GPUs leased to the pool's workers while they execute code (same lifetime)
+        self.gpu_leases: Optional[GPULeasePool] = None
+        # incremental checkpoints (opened lazily, see _save_checkpoint)
+        self.checkpoint_store: Optional[CheckpointStore] = None
+        budget_cfg = cfg.exec.get("budget", None)
+        self.exec_budget: Optional[ExecBudgetManager] = (
+            ExecBudgetManager(
+                max_timeout=cfg.exec.timeout,
+                stage_hours=budget_cfg.stage_hours,
+                slack=budget_cfg.slack,
+                min_timeout=budget_cfg.min_timeout,
+            )
+            if budget_cfg is not None
+            else None
+        )
         self.main_stage_dict: Dict[int, str] = {
             1: "initial_implementation",
             2: "baseline_tuning",
@@ -246,30 +274,82 @@ Your research idea:\n\n
 
         return task_desc
 
+    def _checkpoint_dir(self) -> Path:
+        return Path(self.cfg.log_dir) / "checkpoint"
+
+    def _get_checkpoint_store(self) -> CheckpointStore:
+        if self.checkpoint_store is None:
+            self.checkpoint_store = CheckpointStore(self._checkpoint_dir())
+            self.checkpoint_store.save_cfg(self.cfg)
+        return self.checkpoint_store
+
     def _save_checkpoint(self):
-        """Save the current state of the experiment"""
-        if self.current_stage is None:
-            logger.warning("Cannot save checkpoint: current_stage is None")
-            return
-        stage_name = "stage_" + self.current_stage.name
-        save_path = (
-            Path(self.workspace_dir).parent
-            / "logs"
-            / Path(self.workspace_dir).name
-            / stage_name
-            / "checkpoint.pkl"
-        )
-        checkpoint = {
-            "journals": self.journals,
-            "stage_history": self.stage_history,
+        """Save the current state of the experiment (only nodes changed since the last checkpoint are written)"""
+        state = {
             "task_desc": self.task_desc,
-            "cfg": self.cfg,
-            "workspace_dir": self.workspace_dir,
-            "current_stage": self.current_stage,
+            "workspace_dir": str(self.workspace_dir),
+            "current_stage_number": self.current_stage_number,
+            "stages": [asdict(stage) for stage in self.stages],
+            "current_stage": self.current_stage.name if self.current_stage else None,
+            "current_substage": (
+                self.current_substage.name if self.current_substage else None
+            ),
+            "stage_history": [asdict(t) for t in self.stage_history],
+            "completed_stages": self.completed_stages,
+        }
+        if self.exec_budget is not None:
+            state["exec_budget"] = self.exec_budget.to_dict()
+        self._get_checkpoint_store().save(state, self.journals)
+
+    @classmethod
+    def from_checkpoint(
+        cls, checkpoint_dir: Path, cfg: Any = None
+    ) -> "AgentManager":
+        """Rebuild a manager from the latest snapshot in checkpoint_dir (see CheckpointStore)"""
+        store = CheckpointStore(checkpoint_dir)
+        if not store.exists():
+            raise FileNotFoundError(f"No checkpoint found in {checkpoint_dir}")
+        state, journals = store.load()
+        if cfg is None:
+            cfg = store.load_cfg()
+        manager = cls(
+            task_desc=json.dumps(state["task_desc"]),
+            cfg=cfg,
+            workspace_dir=Path(state["workspace_dir"]),
+        )
+        manager.checkpoint_store = store
+        manager.current_stage_number = state["current_stage_number"]
+        manager.stages = [Stage(**stage) for stage in state["stages"]]
+        stages_by_name = {stage.name: stage for stage in manager.stages}
+        manager.current_stage = stages_by_name.get(state["current_stage"])
+        manager.current_substage = stages_by_name.get(state["current_substage"])
+        manager.stage_history = [StageTransition(**t) for t in state["stage_history"]]
+        manager.completed_stages = state["completed_stages"]
+        if manager.exec_budget is not None and "exec_budget" in state:
+            manager.exec_budget.load_dict(state["exec_budget"])
+        manager.journals = {
+            stage.name: journals.get(stage.name, Journal()) for stage in manager.stages
         }
-        print("Saving checkpoint to ", save_path)
-        with open(save_path, "wb") as f:
-            pickle.dump(checkpoint, f)
+        manager._log_orphan_results()
+        return manager
+
+    def _log_orphan_results(self):
+        """Warn about experiment results of nodes that never made it into a checkpoint
+        (nodes that were still running when the run stopped); they will be re-generated."""
+        results_dir = Path(self.cfg.log_dir) / "experiment_results"
+        if not results_dir.exists():
+            return
+        known_ids = {n.id for journal in self.journals.values() for n in journal.nodes}
+        orphans = []
+        for path in results_dir.iterdir():
+            match = re.match(r"(?:experiment|seed_aggregation)_([0-9a-f]{32})", path.name)
+            if match and match.group(1) not in known_ids:
+                orphans.append(path.name)
+        if orphans:
+            logger.warning(
+                f"{len(orphans)} result dir(s) in {results_dir} belong to nodes that are not in "
+                f"the checkpoint and will not be reused: {', '.join(sorted(orphans))}"
+            )
 
     def _create_agent_for_stage(self, stage: Stage) -> ParallelAgent:
         """Create a ParallelAgent configured for the given stage"""
@@ -318,6 +398,7 @@ Your research idea:\n\n
             best_stage2_node = None
             best_stage1_node = None
 
+        worker_pool = self._get_worker_pool()
         return ParallelAgent(
             task_desc=task_desc,
             cfg=stage_cfg,
@@ -326,8 +407,30 @@ Your research idea:\n\n
             best_stage3_node=best_stage3_node,
             best_stage2_node=best_stage2_node,
             best_stage1_node=best_stage1_node,
+            worker_pool=worker_pool,
+            exec_budget=self.exec_budget,
+            gpu_leases=self.gpu_leases,
         )
 
+    def _get_worker_pool(self) -> WorkerPool:
+        if self.worker_pool is None:
+            # workers lease a GPU only to execute code (see GPULeasePool),
+            # so the pool isn't limited to the number of GPUs
+            self.worker_pool = WorkerPool(
+                num_workers=self.cfg.agent.num_workers,
+                workspace_dir=self.cfg.workspace_dir,
+            )
+            self.gpu_leases = create_gpu_lease_pool(self.cfg)
+        return self.worker_pool
+
+    def _shutdown_worker_pool(self):
+        if self.worker_pool is not None:
+            self.worker_pool.shutdown()
+            self.worker_pool = None
+        if self.gpu_leases is not None:
+            self.gpu_leases.shutdown()
+            self.gpu_leases = None
+
     def _parse_vlm_feedback(self, node: Node) -> str:
         """Parse the feedback from the VLM"""
         if len(node.plot_analyses) > 0:
@@ -410,25 +513,27 @@ Your research idea:\n\n
     def _check_stage_completion(self, stage: Stage) -> bool:
         """Check if current stage is complete based on criteria"""
         journal = self.journals[stage.name]
-        # Terminate if max iterations reached
-        if len(journal.nodes) >= stage.max_iterations:
-            logger.info(f"Stage {stage.name} completed: reached max iterations")
-            print(
-                f"[green]Stage {stage.name} completed: reached max iterations[/green]"
-            )
-            if stage.stage_number == 1:
+        # Terminate if max iterations reached, or the execution time budget is used up
+        out_of_budget = self.exec_budget is not None and self.exec_budget.exhausted(
+            stage.name
+        )
+        if len(journal.nodes) >= stage.max_iterations or out_of_budget:
+            limit = "execution time budget" if out_of_budget else "max iterations"
+            logger.info(f"Stage {stage.name} completed: reached {limit}")
+            print(f"[green]Stage {stage.name} completed: reached {limit}[/green]")
+            if stage.stage_number == 1 and not (out_of_budget and journal.good_nodes):
                 # For initial stage, if it didn't even find a working implementation until max iterations,
                 # end gracefully and stop the experiment.
                 logger.error(
-                    f"Initial stage {stage.name} did not find a working implementation after {stage.max_iterations} iterations. Consider increasing the max iterations or reducing the complexity of the research idea."
+                    f"Initial stage {stage.name} did not find a working implementation after {len(journal.nodes)} iterations. Consider increasing the max iterations (or the execution time budget) or reducing the complexity of the research idea."
                 )
                 print(
-                    f"[red]Experiment ended: Could not find working implementation in initial stage after {stage.max_iterations} iterations[/red]"
+                    f"[red]Experiment ended: Could not find working implementation in initial stage after {len(journal.nodes)} iterations[/red]"
                 )
                 self.current_stage = None  # This will cause the run loop to exit
                 return True, "Failed to find working implementation"
             else:
-                return True, "Reached max iterations"
+                return True, f"Reached {limit}"
 
         # For initial stage, complete when we have at least one working implementation
         if stage.stage_number == 1:
@@ -691,13 +796,47 @@ Your research idea:\n\n
 
     def run(self, exec_callback, step_callback=None):
         """Run the experiment through generated stages"""
+        set_prompt_budgets(self.cfg.agent.get("prompt_budgets", None))
+        try:
+            self._run_stages(exec_callback, step_callback)
+        finally:
+            self._shutdown_worker_pool()
+            if self.checkpoint_store is not None:
+                self.checkpoint_store.close()
+            client_registry.log_stats()
+            token_tracker.log_stage_summary()
+            prompt_stats.log_stats()
+            self._log_summary_stats()
+            if self.exec_budget is not None:
+                self.exec_budget.log_stats()
+
+    def _log_summary_stats(self):
+        """Summary queries made by the workers (see Node.summary_calls), so that repeated
+        or failed ones would show up as more calls than summarized nodes"""
+        nodes = {node.id: node for j in self.journals.values() for node in j.nodes}
+        calls = sum(node.summary_calls for node in nodes.values())
+        summarized = sum(node.summary is not None for node in nodes.values())
+        logger.info(
+            f"Node summaries: {calls} summary calls for {len(nodes)} nodes "
+            f"({summarized} summarized)"
+        )
+
+    def _run_stages(self, exec_callback, step_callback=None):
         while self.current_stage:  # Main stage loop
             main_stage = self.parse_stage_names(self.current_stage.name)[0]
             print(f"[green]Starting main stage: {main_stage}[/green]")
             print(f"[cyan]Goals: {self.current_stage.goals}[/cyan]")
 
             current_substage = self.current_stage
+            if (
+                self.current_substage is not None
+                and self.parse_stage_names(self.current_substage.name)[0] == main_stage
+            ):
+                # resuming in the middle of a main stage
+                current_substage = self.current_substage
             while current_substage:  # Sub-stage loop
+                self.current_substage = current_substage
+                token_tracker.set_stage(current_substage.name)
                 print(f"[green]Starting sub-stage: {current_substage.name}[/green]")
 
                 with self._create_agent_for_stage(current_substage) as agent:
@@ -708,7 +847,10 @@ Your research idea:\n\n
                         print(f"[cyan]self.stage_history: {self.stage_history}[/cyan]")
                         prev_best = self._get_best_implementation(prev_stage)
                         if prev_best:
-                            self.journals[self.current_stage.name].append(prev_best)
+                            journal = self.journals[self.current_stage.name]
+                            # already there when resuming (or when it was carried over before)
+                            if journal.get_node_by_id(prev_best.id) is None:
+                                journal.append(prev_best)
                         else:
                             print(
                                 f"[red]No previous best implementation found for {self.current_stage.name}. Something went wrong so finishing the experiment...[/red]"
@@ -719,11 +861,14 @@ Your research idea:\n\n
 
                     # Run until sub-stage completion
                     while True:
+                        journal = self.journals[current_substage.name]
+                        cache_before = journal.best_node_cache_info()
                         agent.step(exec_callback)
                         if step_callback:
                             step_callback(
                                 current_substage, self.journals[current_substage.name]
                             )
+                        self._save_checkpoint()
 
                         # First check if main stage is complete
                         (
@@ -734,6 +879,9 @@ Your research idea:\n\n
                             f"[cyan]Feedback from _check_stage_completion: {main_stage_feedback}[/cyan]"
                         )
                         if main_stage_complete:
+                            # Nodes still in flight land in this stage's journal before its
+                            # best node is chosen, none can be added after it
+                            agent._drain_pending()
                             # After main stage completion, run multi-seed eval on the best node
                             if current_substage.stage_number in [1, 2, 3, 4]:
                                 best_node = self._get_best_implementation(
@@ -754,6 +902,7 @@ Your research idea:\n\n
                                             current_substage,
                                             self.journals[current_substage.name],
                                         )
+                                    self._save_checkpoint()
                                     print(
                                         f"Stage {current_substage.name} multi-seed eval done."
                                     )
@@ -775,6 +924,7 @@ Your research idea:\n\n
                         ) = self._check_substage_completion(
                             current_substage, self.journals[current_substage.name]
                         )
+                        self._log_best_node_cache(journal, cache_before)
 
                         if substage_complete:
                             # Create next sub-stage
@@ -827,6 +977,16 @@ Your research idea:\n\n
                     logger.info(f"Completed stage: {self.current_stage.name}")
                     logger.info("No more stages to run -- exiting the loop...")
                     self.current_stage = None
+            self.current_substage = self.current_stage
+            self._save_checkpoint()
+
+    def _log_best_node_cache(self, journal: Journal, before: Dict[str, int]):
+        """Log how many best-node selections one step cost (LLM calls vs cache hits)"""
+        after = journal.best_node_cache_info()
+        logger.info(
+            f"Best-node selection this step: {after['misses'] - before['misses']} LLM call(s), "
+            f"{after['hits'] - before['hits']} cache hit(s)"
+        )
 
     def _create_stage_analysis_prompt(
         self,
@@ -1049,11 +1209,10 @@ Your research idea:\n\n
             "vlm_feedback": [],
         }
 
-        # Gather individual node summaries
-        for node in journal.nodes:
-            if hasattr(node, "_agent"):
-                node_summary = node._agent._generate_node_summary(node)
-                metrics["node_summaries"].append(node_summary)
+        # Gather individual node summaries (generated when each node was evaluated)
+        metrics["node_summaries"] = [
+            node.summary for node in journal.nodes if node.summary is not None
+        ]
 
         # Get VLM feedback from plot analysis
         for node in journal.good_nodes:
@@ -1,5 +1,26 @@
-from . import backend_anthropic, backend_openai
-from .utils import FunctionSpec, OutputType, PromptType, compile_prompt_to_md
+import asyncio
+from typing import Any
+
+from ai_scientist.utils.token_tracker import token_tracker
+from ai_scientist.utils.response_cache import (
+    get_response_cache,
+    make_cache_key,
+    should_cache,
+)
+
+from . import backend_anthropic, backend_openai, backend_stub
+from .utils import (
+    FunctionSpec,
+    OutputType,
+    PromptType,
+    compile_prompt_to_md,
+    count_tokens,
+    backend_loop,
+    client_registry,
+    prompt_stats,
+    set_max_concurrency,
+    set_prompt_budgets,
+)
 
 def get_ai_client(model: str, **model_kwargs):
     """
@@ -11,6 +32,8 @@ def get_ai_client(model: str, **model_kwargs):
     Returns:
         An instance of the appropriate AI client.
     """
+    if model.startswith("stub/"):
+        return None
     if "claude-" in model:
         return backend_anthropic.get_ai_client(model=model, **model_kwargs)
     else:
@@ -23,6 +46,8 @@ def query(
     temperature: float | None = None,
     max_tokens: int | None = None,
     func_spec: FunctionSpec | None = None,
+    cache: bool | None = None,
+    cache_prefix: PromptType | None = None,
     **model_kwargs,
 ) -> OutputType:
     """
@@ -36,11 +61,151 @@ def query(
         temperature (float | None, optional): Temperature to sample at. Defaults to the model-specific default.
         max_tokens (int | None, optional): Maximum number of tokens to generate. Defaults to the model-specific max tokens.
         func_spec (FunctionSpec | None, optional): Optional FunctionSpec object defining a function call. If given, the return value will be a dict.
+        cache (bool | None, optional): Whether the response may be served from the LLM response cache (if it is enabled, see ai_scientist.utils.response_cache). Defaults to caching only deterministic (temperature 0) calls.
+        cache_prefix (PromptType | None, optional): Static part of the prompt shared by many calls (task description, guidelines, ...). It is sent before the system message and marked for provider-side prompt caching where supported.
 
     Returns:
         OutputType: A string completion if func_spec is None, otherwise a dict with the function call details.
     """
+    backend, kwargs = _prepare_query(
+        system_message,
+        user_message,
+        model,
+        temperature,
+        max_tokens,
+        func_spec,
+        cache_prefix,
+        model_kwargs,
+    )
+
+    def run():
+        output, req_time, in_tok_count, out_tok_count, info = backend.query(**kwargs)
+        _track_usage(model, in_tok_count, out_tok_count, req_time, info)
+        return output
+
+    if not should_cache(temperature, cache):
+        return run()
+    return get_response_cache().cached_call(_cache_key(backend, kwargs), run)
+
+
+async def aquery(
+    system_message: PromptType | None,
+    user_message: PromptType | None,
+    model: str,
+    temperature: float | None = None,
+    max_tokens: int | None = None,
+    func_spec: FunctionSpec | None = None,
+    cache: bool | None = None,
+    cache_prefix: PromptType | None = None,
+    **model_kwargs,
+) -> OutputType:
+    """
+    Async counterpart of `query` (same arguments and result).
+    Requests run on the backend's event loop with pooled async clients; the number of
+    concurrent requests per provider is bounded and a rate limit pauses the provider.
+    Can be awaited from any event loop.
+    """
+    future = backend_loop.submit(
+        _run_query(
+            system_message,
+            user_message,
+            model,
+            temperature,
+            max_tokens,
+            func_spec,
+            cache,
+            cache_prefix,
+            **model_kwargs,
+        )
+    )
+    return await asyncio.wrap_future(future)
+
+
+def query_many(
+    requests: list[dict[str, Any]], return_exceptions: bool = False
+) -> list[OutputType | BaseException]:
+    """
+    Run several queries concurrently (each dict holds the keyword arguments of `query`),
+    so the wall time is bounded by the slowest call rather than the sum of all calls
+    (e.g. log_summarization annotates one tree level per batch).
+    Results are returned in order. With return_exceptions=True, failed queries return
+    their exception instead of raising it.
+    """
+    futures = [backend_loop.submit(_run_query(**request)) for request in requests]
+    results = []
+    for future in futures:
+        try:
+            results.append(future.result())
+        except Exception as e:
+            if not return_exceptions:
+                for f in futures:
+                    f.cancel()
+                raise
+            results.append(e)
+    return results
+
 
+async def _run_query(
+    system_message: PromptType | None,
+    user_message: PromptType | None,
+    model: str,
+    temperature: float | None = None,
+    max_tokens: int | None = None,
+    func_spec: FunctionSpec | None = None,
+    cache: bool | None = None,
+    cache_prefix: PromptType | None = None,
+    **model_kwargs,
+) -> OutputType:
+    """aquery on the backend loop"""
+    backend, kwargs = _prepare_query(
+        system_message,
+        user_message,
+        model,
+        temperature,
+        max_tokens,
+        func_spec,
+        cache_prefix,
+        model_kwargs,
+    )
+    response_cache = get_response_cache() if should_cache(temperature, cache) else None
+    if response_cache is not None:
+        key = _cache_key(backend, kwargs)
+        output = response_cache.get(key)
+        if output is not None:
+            return output
+    output, req_time, in_tok_count, out_tok_count, info = await backend.aquery(
+        **kwargs
+    )
+    _track_usage(model, in_tok_count, out_tok_count, req_time, info)
+    if response_cache is not None:
+        response_cache.put(key, output)
+    return output
+
+
+def _track_usage(
+    model: str, in_tokens: int, out_tokens: int, req_time: float, info: dict
+):
+    token_tracker.add_request(
+        model, in_tokens, out_tokens, info.get("cached_tokens", 0), req_time
+    )
+
+
+def _cache_key(backend, kwargs: dict) -> str:
+    """Response cache key: everything that is sent to the model"""
+    return make_cache_key(backend=backend.__name__.rsplit(".", 1)[-1], **kwargs)
+
+
+def _prepare_query(
+    system_message: PromptType | None,
+    user_message: PromptType | None,
+    model: str,
+    temperature: float | None,
+    max_tokens: int | None,
+    func_spec: FunctionSpec | None,
+    cache_prefix: PromptType | None,
+    model_kwargs: dict,
+):
+    """Backend module and its query kwargs for a query (shared by query and aquery)"""
     model_kwargs = model_kwargs | {
         "model": model,
         "temperature": temperature,
@@ -66,12 +231,23 @@ def query(
     else:
         model_kwargs["max_tokens"] = max_tokens
 
-    query_func = backend_anthropic.query if "claude-" in model else backend_openai.query
-    output, req_time, in_tok_count, out_tok_count, info = query_func(
+    if model.startswith("stub/"):
+        backend = backend_stub
+    elif "claude-" in model:
+        backend = backend_anthropic
+    else:
+        backend = backend_openai
+    system_prefix = compile_prompt_to_md(cache_prefix) if cache_prefix else None
+    user_message = compile_prompt_to_md(user_message) if user_message else None
+    if model.startswith("o1") and system_prefix:
+        # no system message, the prefix leads the user message instead
+        user_message = f"{system_prefix}\n\n{user_message or ''}"
+        system_prefix = None
+    if system_prefix:
+        model_kwargs["system_prefix"] = system_prefix
+    return backend, dict(
         system_message=compile_prompt_to_md(system_message) if system_message else None,
-        user_message=compile_prompt_to_md(user_message) if user_message else None,
+        user_message=user_message,
         func_spec=func_spec,
         **model_kwargs,
     )
-
-    return output
@@ -1,7 +1,14 @@
 import time
 import os
 
-from .utils import FunctionSpec, OutputType, opt_messages_to_list, backoff_create
+from .utils import (
+    FunctionSpec,
+    OutputType,
+    opt_messages_to_list,
+    backoff_create,
+    backend_loop,
+    client_registry,
+)
 from funcy import notnone, once, select_values
 import anthropic
 
@@ -15,17 +22,33 @@ ANTHROPIC_TIMEOUT_EXCEPTIONS = (
 )
 
 def get_ai_client(model : str, max_retries=2) -> anthropic.AnthropicBedrock:
-    client = anthropic.AnthropicBedrock(max_retries=max_retries)
-    return client
+    """Returns the (pooled, per-process) Bedrock client"""
+    return client_registry.get(
+        ("anthropic-bedrock", None, max_retries),
+        lambda http_client_kwargs: anthropic.AnthropicBedrock(
+            max_retries=max_retries,
+            http_client=anthropic.DefaultHttpxClient(**http_client_kwargs),
+        ),
+    )
 
-def query(
+def get_async_ai_client(model : str, max_retries=2) -> anthropic.AsyncAnthropicBedrock:
+    """Async counterpart of get_ai_client (used on the backend loop only)"""
+    return client_registry.get(
+        ("anthropic-bedrock-async", None, max_retries),
+        lambda http_client_kwargs: anthropic.AsyncAnthropicBedrock(
+            max_retries=max_retries,
+            http_client=anthropic.DefaultAsyncHttpxClient(**http_client_kwargs),
+        ),
+        is_async=True,
+    )
+
+
+def _prepare_request(
     system_message: str | None,
     user_message: str | None,
-    func_spec: FunctionSpec | None = None,
-    **model_kwargs,
-) -> tuple[OutputType, float, int, int, dict]:
-    client = get_ai_client(model_kwargs.get("model"), max_retries=0)
-
+    func_spec: FunctionSpec | None,
+    model_kwargs: dict,
+) -> tuple[list[dict], dict]:
     filtered_kwargs: dict = select_values(notnone, model_kwargs)  # type: ignore
     if "max_tokens" not in filtered_kwargs:
         filtered_kwargs["max_tokens"] = 8192  # default for Claude models
@@ -35,16 +58,42 @@ def query(
             "Anthropic does not support function calling for now."
         )
 
+    system_prefix = filtered_kwargs.pop("system_prefix", None)
+
     # Anthropic doesn't allow not having a user messages
     # if we only have system msg -> use it as user msg
     if system_message is not None and user_message is None:
         system_message, user_message = user_message, system_message
 
     # Anthropic passes the system messages as a separate argument
-    if system_message is not None:
+    if system_prefix is not None:
+        # cache breakpoint after the static prefix (reads cost a fraction of input tokens)
+        filtered_kwargs["system"] = [
+            {
+                "type": "text",
+                "text": system_prefix,
+                "cache_control": {"type": "ephemeral"},
+            }
+        ]
+        if system_message is not None:
+            filtered_kwargs["system"].append({"type": "text", "text": system_message})
+    elif system_message is not None:
         filtered_kwargs["system"] = system_message
 
     messages = opt_messages_to_list(None, user_message)
+    return messages, filtered_kwargs
+
+
+def query(
+    system_message: str | None,
+    user_message: str | None,
+    func_spec: FunctionSpec | None = None,
+    **model_kwargs,
+) -> tuple[OutputType, float, int, int, dict]:
+    client = get_ai_client(model_kwargs.get("model"), max_retries=0)
+    messages, filtered_kwargs = _prepare_request(
+        system_message, user_message, func_spec, model_kwargs
+    )
 
     t0 = time.time()
     message = backoff_create(
@@ -56,6 +105,37 @@ def query(
     req_time = time.time() - t0
     print(filtered_kwargs)
 
+    return _parse_message(message, filtered_kwargs, req_time)
+
+
+async def aquery(
+    system_message: str | None,
+    user_message: str | None,
+    func_spec: FunctionSpec | None = None,
+    **model_kwargs,
+) -> tuple[OutputType, float, int, int, dict]:
+    """Async query; must run on the backend loop (see backend.aquery)"""
+    client = get_async_ai_client(model_kwargs.get("model"), max_retries=0)
+    messages, filtered_kwargs = _prepare_request(
+        system_message, user_message, func_spec, model_kwargs
+    )
+
+    t0 = time.time()
+    message = await backend_loop.get_limiter("anthropic").call(
+        client.messages.create,
+        ANTHROPIC_TIMEOUT_EXCEPTIONS,
+        (anthropic.RateLimitError,),
+        messages=messages,
+        **filtered_kwargs,
+    )
+    req_time = time.time() - t0
+
+    return _parse_message(message, filtered_kwargs, req_time)
+
+
+def _parse_message(
+    message, filtered_kwargs: dict, req_time: float
+) -> tuple[OutputType, float, int, int, dict]:
     if "thinking" in filtered_kwargs:
         assert (
             len(message.content) == 2
@@ -67,11 +147,18 @@ def query(
         assert len(message.content) == 1 and message.content[0].type == "text"
         output: str = message.content[0].text
 
-    in_tokens = message.usage.input_tokens
+    # input_tokens excludes the tokens read from / written to the prompt cache
+    cached_tokens = getattr(message.usage, "cache_read_input_tokens", None) or 0
+    cache_creation_tokens = (
+        getattr(message.usage, "cache_creation_input_tokens", None) or 0
+    )
+    in_tokens = message.usage.input_tokens + cached_tokens + cache_creation_tokens
     out_tokens = message.usage.output_tokens
 
     info = {
         "stop_reason": message.stop_reason,
+        "cached_tokens": cached_tokens,
+        "cache_creation_tokens": cache_creation_tokens,
     }
 
     return output, req_time, in_tokens, out_tokens, info
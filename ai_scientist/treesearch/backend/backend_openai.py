@@ -2,7 +2,14 @@ import json
 import logging
 import time
 
-from .utils import FunctionSpec, OutputType, opt_messages_to_list, backoff_create
+from .utils import (
+    FunctionSpec,
+    OutputType,
+    opt_messages_to_list,
+    backoff_create,
+    backend_loop,
+    client_registry,
+)
 from funcy import notnone, once, select_values
 import openai
 from rich import print
@@ -18,25 +25,47 @@ OPENAI_TIMEOUT_EXCEPTIONS = (
 )
 
 def get_ai_client(model: str, max_retries=2) -> openai.OpenAI:
-    if model.startswith("ollama/"):
-        client = openai.OpenAI(
-            base_url="http://localhost:11434/v1", 
-            max_retries=max_retries
-        )
-    else:
-        client = openai.OpenAI(max_retries=max_retries)
-    return client
+    """Returns the (pooled, per-process) client for the model's endpoint"""
+    base_url = "http://localhost:11434/v1" if model.startswith("ollama/") else None
+    return client_registry.get(
+        ("openai", base_url, max_retries),
+        lambda http_client_kwargs: openai.OpenAI(
+            base_url=base_url,
+            max_retries=max_retries,
+            http_client=openai.DefaultHttpxClient(**http_client_kwargs),
+        ),
+    )
 
 
-def query(
+def get_async_ai_client(model: str, max_retries=2) -> openai.AsyncOpenAI:
+    """Async counterpart of get_ai_client (used on the backend loop only)"""
+    base_url = "http://localhost:11434/v1" if model.startswith("ollama/") else None
+    return client_registry.get(
+        ("openai-async", base_url, max_retries),
+        lambda http_client_kwargs: openai.AsyncOpenAI(
+            base_url=base_url,
+            max_retries=max_retries,
+            http_client=openai.DefaultAsyncHttpxClient(**http_client_kwargs),
+        ),
+        is_async=True,
+    )
+
+
+def _prepare_request(
     system_message: str | None,
     user_message: str | None,
-    func_spec: FunctionSpec | None = None,
-    **model_kwargs,
-) -> tuple[OutputType, float, int, int, dict]:
-    client = get_ai_client(model_kwargs.get("model"), max_retries=0)
+    func_spec: FunctionSpec | None,
+    model_kwargs: dict,
+) -> tuple[list[dict], dict]:
     filtered_kwargs: dict = select_values(notnone, model_kwargs)  # type: ignore
 
+    # the static prefix goes first, so OpenAI's automatic prefix caching applies
+    system_prefix = filtered_kwargs.pop("system_prefix", None)
+    if system_prefix:
+        system_message = (
+            f"{system_prefix}\n\n{system_message}" if system_message else system_prefix
+        )
+
     messages = opt_messages_to_list(system_message, user_message)
 
     if func_spec is not None:
@@ -47,6 +76,20 @@ def query(
     if filtered_kwargs.get("model", "").startswith("ollama/"):
        filtered_kwargs["model"] = filtered_kwargs["model"].replace("ollama/", "")
 
+    return messages, filtered_kwargs
+
+
+def query(
+    system_message: str | None,
+    user_message: str | None,
+    func_spec: FunctionSpec | None = None,
+    **model_kwargs,
+) -> tuple[OutputType, float, int, int, dict]:
+    client = get_ai_client(model_kwargs.get("model"), max_retries=0)
+    messages, filtered_kwargs = _prepare_request(
+        system_message, user_message, func_spec, model_kwargs
+    )
+
     t0 = time.time()
     completion = backoff_create(
         client.chat.completions.create,
@@ -56,6 +99,41 @@ def query(
     )
     req_time = time.time() - t0
 
+    return _parse_completion(completion, func_spec, req_time)
+
+
+async def aquery(
+    system_message: str | None,
+    user_message: str | None,
+    func_spec: FunctionSpec | None = None,
+    **model_kwargs,
+) -> tuple[OutputType, float, int, int, dict]:
+    """Async query; must run on the backend loop (see backend.aquery)"""
+    model = model_kwargs.get("model")
+    client = get_async_ai_client(model, max_retries=0)
+    limiter = backend_loop.get_limiter(
+        "ollama" if model.startswith("ollama/") else "openai"
+    )
+    messages, filtered_kwargs = _prepare_request(
+        system_message, user_message, func_spec, model_kwargs
+    )
+
+    t0 = time.time()
+    completion = await limiter.call(
+        client.chat.completions.create,
+        OPENAI_TIMEOUT_EXCEPTIONS,
+        (openai.RateLimitError,),
+        messages=messages,
+        **filtered_kwargs,
+    )
+    req_time = time.time() - t0
+
+    return _parse_completion(completion, func_spec, req_time)
+
+
+def _parse_completion(
+    completion, func_spec: FunctionSpec | None, req_time: float
+) -> tuple[OutputType, float, int, int, dict]:
     choice = completion.choices[0]
 
     if func_spec is None:
@@ -79,10 +157,12 @@ def query(
     in_tokens = completion.usage.prompt_tokens
     out_tokens = completion.usage.completion_tokens
 
+    details = getattr(completion.usage, "prompt_tokens_details", None)
     info = {
         "system_fingerprint": completion.system_fingerprint,
         "model": completion.model,
         "created": completion.created,
+        "cached_tokens": (details.cached_tokens or 0) if details else 0,
     }
 
     return output, req_time, in_tokens, out_tokens, info
@@ -0,0 +1,81 @@
+"""
+Local stub model ("stub/<name>") for tests and dry runs: answers instantly and
+deterministically without network access, and counts the calls it receives.
+Text completions echo a digest of the prompt; function calls return a value shaped
+like the function's JSON schema.
+"""
+
+import hashlib
+import time
+
+from .utils import FunctionSpec, OutputType
+
+num_calls = 0
+
+
+def _schema_value(schema: dict, seed: str):
+    """Minimal deterministic instance of a JSON schema"""
+    if "enum" in schema:
+        return schema["enum"][0]
+    schema_type = schema.get("type")
+    if isinstance(schema_type, list):
+        schema_type = schema_type[0]
+    if schema_type == "object":
+        return {
+            key: _schema_value(value, f"{seed}.{key}")
+            for key, value in schema.get("properties", {}).items()
+        }
+    if schema_type == "array":
+        return [_schema_value(schema.get("items", {}), f"{seed}[0]")]
+    if schema_type == "boolean":
+        return False
+    if schema_type in ("integer", "number"):
+        return 0
+    if schema_type == "null":
+        return None
+    return f"stub {seed}"
+
+
+def stub_completion(
+    model: str,
+    system_message: str | None,
+    user_message: str | None,
+    func_spec: FunctionSpec | None = None,
+) -> OutputType:
+    global num_calls
+    num_calls += 1
+    digest = hashlib.sha256(
+        f"{model}\0{system_message}\0{user_message}".encode()
+    ).hexdigest()[:12]
+    if func_spec is not None:
+        return _schema_value(func_spec.json_schema, digest)
+    return f"{model} response {digest}"
+
+
+def query(
+    system_message: str | None,
+    user_message: str | None,
+    func_spec: FunctionSpec | None = None,
+    **model_kwargs,
+) -> tuple[OutputType, float, int, int, dict]:
+    model = model_kwargs["model"]
+    system_prefix = model_kwargs.get("system_prefix")
+    if system_prefix:
+        system_message = (
+            f"{system_prefix}\n\n{system_message}" if system_message else system_prefix
+        )
+    t0 = time.time()
+    output = stub_completion(model, system_message, user_message, func_spec)
+    req_time = time.time() - t0
+    in_tokens = len(f"{system_message or ''}{user_message or ''}") // 4
+    out_tokens = len(str(output)) // 4
+    return output, req_time, in_tokens, out_tokens, {"model": model}
+
+
+async def aquery(
+    system_message: str | None,
+    user_message: str | None,
+    func_spec: FunctionSpec | None = None,
+    **model_kwargs,
+) -> tuple[OutputType, float, int, int, dict]:
+    return query(system_message, user_message, func_spec, **model_kwargs)
@@ -8,9 +8,16 @@ FunctionCallType = dict
 OutputType = str | FunctionCallType
 
 
+import asyncio
 import backoff
+import concurrent.futures
 import logging
-from typing import Callable
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Awaitable, Callable, Hashable
 
 logger = logging.getLogger("ai-scientist")
 
@@ -41,8 +48,141 @@ def opt_messages_to_list(
     return messages
 
 
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens of text (cl100k_base; ~4 characters per token if tiktoken is unavailable)"""
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            # e.g. the encoding cannot be downloaded, don't try again
+            logger.warning(f"tiktoken unavailable ({e}), estimating token counts")
+            _encoding = False
+    if _encoding is False:
+        return (len(text) + 3) // 4
+    return len(_encoding.encode(text, disallowed_special=()))
+
+
+# section name -> token budget, applied by compile_prompt_to_md (see set_prompt_budgets)
+prompt_budgets: dict[str, int] = {}
+
+
+def set_prompt_budgets(budgets: dict[str, int] | None):
+    """Token budgets of prompt sections (by their key, at any depth of the prompt)"""
+    prompt_budgets.clear()
+    prompt_budgets.update(dict(budgets or {}))
+
+
+class PromptStats:
+    """Per-section token counts of compiled prompts (before and after compaction),
+    only collected while prompt budgets are set or debug logging is on"""
+
+    def __init__(self):
+        self.sections: dict[str, dict[str, int]] = {}
+
+    def add(self, section: str, tokens: int, compacted_tokens: int):
+        stats = self.sections.setdefault(
+            section, {"prompts": 0, "tokens": 0, "compacted_tokens": 0, "compacted": 0}
+        )
+        stats["prompts"] += 1
+        stats["tokens"] += tokens
+        stats["compacted_tokens"] += compacted_tokens
+        stats["compacted"] += tokens != compacted_tokens
+
+    def log_stats(self):
+        for section, stats in sorted(
+            self.sections.items(), key=lambda item: -item[1]["compacted_tokens"]
+        ):
+            logger.info(
+                f"Prompt section {section!r}: {stats['prompts']} prompts, "
+                f"{stats['tokens']} -> {stats['compacted_tokens']} tokens "
+                f"(compacted {stats['compacted']} times)"
+            )
+
+
+prompt_stats = PromptStats()
+
+_NUMBER = re.compile(r"\d+(?:\.\d+)?(?:e[-+]?\d+)?")
+
+
+def _collapse_repeated_lines(lines: list[str], keep: int = 2) -> list[str]:
+    """
+    Collapse runs of lines that only differ in their numbers (e.g. one line, or a group of up
+    to 3 lines, per epoch), keeping the first and last `keep` repetitions of each run.
+    """
+    signatures = [_NUMBER.sub("#", line.strip()) for line in lines]
+    out = []
+    i = 0
+    while i < len(lines):
+        best_period, best_repeats = 1, 1
+        for period in (1, 2, 3):
+            block = signatures[i : i + period]
+            if len(block) < period or not any(block):
+                break
+            repeats = 1
+            while signatures[
+                i + repeats * period : i + (repeats + 1) * period
+            ] == block:
+                repeats += 1
+            if repeats * period > best_repeats * best_period:
+                best_period, best_repeats = period, repeats
+        if best_repeats > 2 * keep + 1:
+            omitted = best_repeats - 2 * keep
+            out.extend(lines[i : i + keep * best_period])
+            out.append(f"... [{omitted * best_period} similar lines omitted] ...")
+            end = i + best_repeats * best_period
+            out.extend(lines[end - keep * best_period : end])
+            i = end
+        else:
+            out.extend(lines[i : i + best_period * best_repeats])
+            i += best_period * best_repeats
+    return out
+
+
+def compact_text(text: str, max_tokens: int, tail_fraction: float = 0.75) -> str:
+    """
+    Fit text into max_tokens: first collapse repeated (e.g. per-epoch) lines, then truncate the
+    middle, keeping more of the end than of the start (errors and final results are at the end).
+    """
+    tokens = count_tokens(text)
+    if tokens <= max_tokens:
+        return text
+    text = "\n".join(_collapse_repeated_lines(text.split("\n")))
+    tokens = count_tokens(text)
+    if tokens <= max_tokens:
+        return text
+
+    chars_per_token = len(text) / max(tokens, 1)
+    tail_chars = int(max_tokens * tail_fraction * chars_per_token)
+    head_chars = int(max_tokens * (1 - tail_fraction) * chars_per_token)
+    # cut at line boundaries where possible
+    head_end = text.rfind("\n", 0, head_chars)
+    head_end = head_end if head_end > head_chars // 2 else head_chars
+    tail_start = text.find("\n", len(text) - tail_chars)
+    tail_start = (
+        tail_start + 1
+        if 0 <= tail_start < len(text) - tail_chars // 2
+        else len(text) - tail_chars
+    )
+    omitted = text[head_end:tail_start]
+    return (
+        f"{text[:head_end]}\n... [{omitted.count(chr(10))} lines, "
+        f"~{int(len(omitted) / chars_per_token)} tokens truncated] ...\n{text[tail_start:]}"
+    )
+
+
 def compile_prompt_to_md(prompt: PromptType, _header_depth: int = 1) -> str:
-    """Convert a prompt into markdown format"""
+    """
+    Convert a prompt into markdown format.
+    Sections with a token budget (see set_prompt_budgets) are compacted to fit it. When
+    budgets are set (or debug logging is on), the token counts of the top-level sections
+    are recorded in prompt_stats; otherwise prompts aren't tokenized at all.
+    """
     try:
         logger.debug(f"compile_prompt_to_md input: type={type(prompt)}")
         if isinstance(prompt, (list, dict)):
@@ -85,7 +225,23 @@ def compile_prompt_to_md(prompt: PromptType, _header_depth: int = 1) -> str:
                 for k, v in prompt.items():
                     logger.debug(f"Processing dict key: {k}")
                     out.append(f"{header_prefix} {k}\n")
-                    out.append(compile_prompt_to_md(v, _header_depth=_header_depth + 1))
+                    section = compile_prompt_to_md(v, _header_depth=_header_depth + 1)
+                    if not isinstance(section, str):  # multi-modal content
+                        out.append(section)
+                        continue
+                    compacted = section
+                    if k in prompt_budgets:
+                        compacted = compact_text(section, prompt_budgets[k])
+                    if _header_depth == 1 and (
+                        prompt_budgets or logger.isEnabledFor(logging.DEBUG)
+                    ):
+                        tokens = count_tokens(section)
+                        prompt_stats.add(
+                            k,
+                            tokens,
+                            tokens if compacted is section else count_tokens(compacted),
+                        )
+                    out.append(compacted)
                 return "\n".join(out)
             except Exception as e:
                 logger.error(f"Error processing dict: {e}")
@@ -129,3 +285,209 @@ class FunctionSpec(DataClassJsonMixin):
             "type": "function",
             "function": {"name": self.name},
         }
+
+
+class ClientRegistry:
+    """
+    Per-process cache of API clients, so that requests share one HTTP connection pool
+    (keep-alive connections) instead of paying for DNS, TCP and TLS setup on every call.
+    - Fork-safe: a forked child (e.g. a ProcessPoolExecutor worker) starts with an empty
+    registry. The inherited clients stay referenced but are never used or closed, so the
+    child never touches the parent's sockets.
+    - Counts requests and newly opened connections per client (see `stats`).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients: dict[Hashable, Any] = {}
+        self._stats: dict[Hashable, dict[str, int]] = {}
+        self._inherited: list = []
+        self._pid = os.getpid()
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        self._inherited.extend(self._clients.values())
+        self._clients = {}
+        self._stats = {}
+        self._pid = os.getpid()
+
+    def get(
+        self, key: Hashable, factory: Callable[[dict], Any], is_async: bool = False
+    ) -> Any:
+        """
+        Returns the client for `key`, created on first use by `factory(http_client_kwargs)`.
+        The factory should pass http_client_kwargs to the SDK's DefaultHttpxClient
+        (DefaultAsyncHttpxClient for async clients, with is_async=True).
+        """
+        if os.getpid() != self._pid:
+            self._after_fork()
+        with self._lock:
+            if key not in self._clients:
+                stats = {"requests": 0, "connections": 0}
+                self._stats[key] = stats
+                self._clients[key] = factory(self._http_client_kwargs(stats, is_async))
+            return self._clients[key]
+
+    @staticmethod
+    def _http_client_kwargs(stats: dict[str, int], is_async: bool) -> dict:
+        def trace(event_name: str, info: dict):
+            if event_name == "connection.connect_tcp.complete":
+                stats["connections"] += 1
+
+        def on_request(request):
+            stats["requests"] += 1
+            request.extensions["trace"] = trace
+
+        if not is_async:
+            return {"event_hooks": {"request": [on_request]}}
+
+        # httpx awaits the hooks (and httpcore the trace callback) of async clients
+        async def async_trace(event_name: str, info: dict):
+            trace(event_name, info)
+
+        async def on_async_request(request):
+            stats["requests"] += 1
+            request.extensions["trace"] = async_trace
+
+        return {"event_hooks": {"request": [on_async_request]}}
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """Requests, opened connections and reused connections per client"""
+        if os.getpid() != self._pid:
+            return {}
+        return {
+            ", ".join(map(str, key)) if isinstance(key, tuple) else str(key): {
+                "requests": s["requests"],
+                "connections": s["connections"],
+                "reused": max(s["requests"] - s["connections"], 0),
+            }
+            for key, s in self._stats.items()
+        }
+
+    def log_stats(self):
+        for key, s in self.stats().items():
+            logger.info(
+                f"LLM client {key}: {s['requests']} request(s) over {s['connections']} "
+                f"connection(s), {s['reused']} reused"
+            )
+
+
+client_registry = ClientRegistry()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=client_registry._after_fork)
+
+
+DEFAULT_MAX_CONCURRENCY = 8
+
+
+def _retry_after(e: Exception) -> float | None:
+    """Seconds to wait according to the Retry-After header of a rate limit error, if any"""
+    response = getattr(e, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+
+class ProviderLimiter:
+    """
+    Bounds the number of concurrent async requests to one provider and retries failed ones
+    with exponential backoff (like backoff_create). A rate limit error pauses all requests to
+    the provider (for Retry-After seconds if given), not just the one that hit it.
+    """
+
+    def __init__(self, max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+        self.max_concurrency = max_concurrency
+        self._semaphore: asyncio.Semaphore | None = None  # created on the backend loop
+        self._paused_until = 0.0
+        self.rate_limited = 0
+
+    async def call(
+        self,
+        create_fn: Callable[..., Awaitable],
+        retry_exceptions: tuple[type[Exception], ...],
+        rate_limit_exceptions: tuple[type[Exception], ...],
+        *args,
+        **kwargs,
+    ):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        delay = 1.0
+        while True:
+            async with self._semaphore:
+                pause = self._paused_until - time.monotonic()
+                if pause > 0:
+                    await asyncio.sleep(pause)
+                try:
+                    return await create_fn(*args, **kwargs)
+                except retry_exceptions as e:
+                    logger.info(f"Backoff exception: {e}")
+                    if isinstance(e, rate_limit_exceptions):
+                        self.rate_limited += 1
+                        pause = _retry_after(e) or delay
+                        self._paused_until = max(
+                            self._paused_until, time.monotonic() + pause
+                        )
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+            delay = min(delay * 1.5, 60)
+
+
+class _BackendLoop:
+    """
+    Event loop running the async backend in a daemon thread, one per process.
+    Async clients and limiters are bound to this loop, so every async query runs on it,
+    whichever thread or event loop it was made from.
+    """
+
+    def __init__(self):
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._pid: int | None = None
+        self._lock = threading.Lock()
+        self.limiters: dict[str, ProviderLimiter] = {}
+        self.max_concurrency: dict[str, int] = {}
+
+    def _after_fork(self):
+        # the loop thread does not survive a fork
+        self._lock = threading.Lock()
+        self._loop = None
+        self._pid = None
+        self.limiters = {}
+
+    def get_loop(self) -> asyncio.AbstractEventLoop:
+        if self._pid != os.getpid():
+            self._after_fork()
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever, name="llm-backend-loop", daemon=True
+                ).start()
+                self._loop = loop
+                self._pid = os.getpid()
+            return self._loop
+
+    def submit(self, coro: Awaitable) -> concurrent.futures.Future:
+        return asyncio.run_coroutine_threadsafe(coro, self.get_loop())
+
+    def get_limiter(self, provider: str) -> ProviderLimiter:
+        if provider not in self.limiters:
+            self.limiters[provider] = ProviderLimiter(
+                self.max_concurrency.get(provider, DEFAULT_MAX_CONCURRENCY)
+            )
+        return self.limiters[provider]
+
+
+backend_loop = _BackendLoop()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=backend_loop._after_fork)
+
+
+def set_max_concurrency(provider: str, max_concurrency: int):
+    """Maximum number of concurrent async requests to a provider ("openai", "anthropic", "ollama")"""
+    backend_loop.max_concurrency[provider] = max_concurrency
+    backend_loop.limiters.pop(provider, None)
@@ -0,0 +1,211 @@
+"""
+Live monitoring of an experiment's output, to stop hopeless runs early.
+
+An OutputMonitor is fed the output of a run as the Interpreter receives it and passes every
+complete line to its detectors. Once a detector triggers, the Interpreter kills the run and
+reports the detector's exc_type (e.g. EarlyStopNaN) instead of waiting for the run to finish
+or time out, so the worker and its GPU are free for the next node.
+"""
+
+import math
+import re
+import time
+from typing import List, Optional, Tuple
+
+# the separator must not swallow the sign of negative losses (NLL, ELBO)
+LOSS_VALUE = re.compile(
+    r"(\w*loss)[\s:=]*([-+]?(?:\d+\.?\d*|\.\d+)(?:e[-+]?\d+)?|[-+]?nan|[-+]?inf(?:inity)?)\b",
+    re.IGNORECASE,
+)
+EPOCH_NUMBER = re.compile(r"\bepoch[\s:=#]*(\d+)", re.IGNORECASE)
+EXCEPTION_LINE = re.compile(r"^\s*[A-Za-z_][\w.]*(?:Error|Exception)\b.*$")
+
+
+def parse_losses(line: str) -> List[Tuple[str, float]]:
+    """(name, value) of the losses printed on a line, e.g. ("val_loss", 0.42)"""
+    return [(name.lower(), float(value)) for name, value in LOSS_VALUE.findall(line)]
+
+
+class Detector:
+    """Watches the output of one run. update() gets every complete line, poll() is also
+    called while the run is silent; both return the reason to stop the run, or None.
+    new_context() is called when the run starts training anew, e.g. on the next dataset
+    (the epoch counter went backwards), whose losses aren't comparable to the previous ones.
+    """
+
+    exc_type = "EarlyStop"
+
+    def update(self, line: str, now: float) -> Optional[str]:
+        return None
+
+    def new_context(self):
+        pass
+
+    def poll(self, now: float) -> Optional[str]:
+        return None
+
+
+class NaNDetector(Detector):
+    exc_type = "EarlyStopNaN"
+
+    def __init__(self, patience: int = 3):
+        self.patience = patience
+        self.count = 0
+
+    def update(self, line, now):
+        for name, value in parse_losses(line):
+            if not math.isfinite(value):
+                self.count += 1
+                if self.count >= self.patience:
+                    return f"{name} was {value} {self.count} times"
+        return None
+
+
+class DivergenceDetector(Detector):
+    exc_type = "EarlyStopDivergence"
+
+    def __init__(self, factor: float = 10.0, patience: int = 5, warmup: int = 3):
+        self.factor = factor
+        self.patience = patience
+        self.warmup = warmup
+        self.new_context()
+
+    def new_context(self):
+        self.best = {}  # loss name -> (lowest value, number of readings)
+        self.count = {}  # loss name -> consecutive readings above factor x lowest
+
+    def update(self, line, now):
+        for name, value in parse_losses(line):
+            if not math.isfinite(value):
+                continue  # NaNDetector
+            best, readings = self.best.get(name, (value, 0))
+            self.best[name] = (min(best, value), readings + 1)
+            # for negative losses, rising by factor x |lowest| above it
+            limit = best + (self.factor - 1) * max(abs(best), 1e-8)
+            if readings >= self.warmup and value > limit:
+                self.count[name] = self.count.get(name, 0) + 1
+                if self.count[name] >= self.patience:
+                    return (
+                        f"{name} rose to {value:g}, far above its lowest value {best:g}, "
+                        f"for {self.count[name]} readings in a row"
+                    )
+            else:
+                self.count[name] = 0
+        return None
+
+
+class NoProgressDetector(Detector):
+    """The losses printed stayed flat (e.g. stuck at chance level): none improved over the
+    last `patience` readings, which span at least `timeout` seconds. Only checked when a
+    loss is printed, so silent phases (long epochs, a final evaluation) never trigger it.
+    """
+
+    exc_type = "EarlyStopNoProgress"
+
+    def __init__(
+        self, timeout: float = 900, patience: int = 10, min_delta: float = 1e-4
+    ):
+        self.timeout = timeout
+        self.patience = patience
+        self.min_delta = min_delta
+        self.new_context()
+
+    def new_context(self):
+        self.best = {}  # loss name -> lowest value
+        self.last_improvement = None
+        self.readings = 0  # loss readings since the last improvement
+
+    def update(self, line, now):
+        losses = [(n, v) for n, v in parse_losses(line) if math.isfinite(v)]
+        if not losses:
+            return None
+        improved = False
+        for name, value in losses:
+            if name not in self.best or value < self.best[name] - self.min_delta * abs(
+                self.best[name]
+            ):
+                self.best[name] = value
+                improved = True
+        if improved:
+            self.last_improvement = now
+            self.readings = 0
+            return None
+        self.readings += 1
+        if self.readings < self.patience or now - self.last_improvement < self.timeout:
+            return None
+        return (
+            f"no loss improved over the last {self.readings} readings "
+            f"({now - self.last_improvement:.0f}s)"
+        )
+
+
+class RepeatedTracebackDetector(Detector):
+    """The run keeps printing the same exception (e.g. caught and retried in a loop)"""
+
+    exc_type = "EarlyStopRepeatedTraceback"
+
+    def __init__(self, max_repeats: int = 5):
+        self.max_repeats = max_repeats
+        self.counts = {}
+
+    def update(self, line, now):
+        if not EXCEPTION_LINE.match(line):
+            return None
+        key = line.strip()
+        self.counts[key] = self.counts.get(key, 0) + 1
+        if self.counts[key] >= self.max_repeats:
+            return f"{key!r} was printed {self.counts[key]} times"
+        return None
+
+
+class OutputMonitor:
+    def __init__(self, detectors: List[Detector], poll_interval: float = 5.0):
+        self.detectors = detectors
+        self.poll_interval = poll_interval
+        self.triggered: Optional[Tuple[str, str]] = None  # (exc_type, reason)
+        self._partial_line = ""
+        self._last_epoch: Optional[int] = None
+
+    @classmethod
+    def from_config(cls, cfg) -> "OutputMonitor":
+        """Detectors enabled by an EarlyStopConfig (see utils.config)"""
+        detectors: List[Detector] = []
+        if cfg.nan_patience:
+            detectors.append(NaNDetector(cfg.nan_patience))
+        if cfg.divergence_factor:
+            detectors.append(
+                DivergenceDetector(cfg.divergence_factor, cfg.divergence_patience)
+            )
+        if cfg.no_progress_timeout:
+            detectors.append(
+                NoProgressDetector(cfg.no_progress_timeout, cfg.no_progress_patience)
+            )
+        if cfg.max_repeated_tracebacks:
+            detectors.append(RepeatedTracebackDetector(cfg.max_repeated_tracebacks))
+        return cls(detectors)
+
+    def _trigger(self, detector: Detector, reason: Optional[str]):
+        if reason is not None and self.triggered is None:
+            self.triggered = (detector.exc_type, reason)
+
+    def feed(self, chunk: str):
+        lines = (self._partial_line + chunk).split("\n")
+        self._partial_line = lines.pop()
+        now = time.time()
+        for line in lines:
+            epoch = EPOCH_NUMBER.search(line)
+            if epoch is not None:
+                epoch = int(epoch.group(1))
+                if self._last_epoch is not None and epoch < self._last_epoch:
+                    for detector in self.detectors:
+                        detector.new_context()
+                self._last_epoch = epoch
+            for detector in self.detectors:
+                self._trigger(detector, detector.update(line, now))
+
+    def poll(self) -> Optional[Tuple[str, str]]:
+        """(exc_type, reason) once a detector triggered, else None"""
+        now = time.time()
+        for detector in self.detectors:
+            self._trigger(detector, detector.poll(now))
+        return self.triggered
@@ -0,0 +1,126 @@
+"""
+Per-node execution time limits.
+
+Instead of giving every experiment run the full exec.timeout, a node gets `slack` times the
+runtime it is expected to need: its parent's runtime if the parent ran to completion, else
+the median runtime of the completed runs of its stage. Runs far beyond what comparable runs
+took are killed early. A sub-stage can also be given a wall-clock budget: node limits never
+exceed what is left of it, and the sub-stage ends once a typical run no longer fits.
+"""
+
+import logging
+import math
+import statistics
+import time
+from typing import Dict, List, Optional
+
+from .journal import Node
+
+logger = logging.getLogger("ai-scientist")
+
+
+class ExecBudgetManager:
+    def __init__(
+        self,
+        max_timeout: float,
+        stage_hours: Optional[float] = None,
+        slack: float = 3.0,
+        min_timeout: float = 300,
+        full_timeout_stages: tuple = (3,),
+    ):
+        self.max_timeout = max_timeout
+        self.stage_budget = stage_hours * 3600 if stage_hours is not None else None
+        self.slack = slack
+        self.min_timeout = min(min_timeout, max_timeout)
+        # stages whose nodes are meant to scale up their experiments (see the
+        # exec time feedback of stage 3) always get the full timeout
+        self.full_timeout_stages = tuple(full_timeout_stages)
+        self.stage_start: Dict[str, float] = {}
+        self.runtimes: Dict[str, List[float]] = {}  # stage -> completed run times
+        self.num_runs = 0
+        self.num_early_kills = 0
+        self.saved_time = 0.0  # max_timeout - limit of the runs killed early
+
+    def start_stage(self, stage_name: str):
+        self.stage_start.setdefault(stage_name, time.time())
+
+    def remaining(self, stage_name: str) -> Optional[float]:
+        """Seconds left of the stage's wall-clock budget (None: no budget)"""
+        if self.stage_budget is None:
+            return None
+        start = self.stage_start.get(stage_name, time.time())
+        return self.stage_budget - (time.time() - start)
+
+    def expected_runtime(self, stage_name: str, parent: Optional[Node] = None):
+        """Runtime a child of parent is expected to need, or None without any history"""
+        if parent is not None and parent.exc_type is None and parent.exec_time:
+            return parent.exec_time
+        runtimes = self.runtimes.get(stage_name)
+        return statistics.median(runtimes) if runtimes else None
+
+    def timeout_for(
+        self, stage_name: str, stage_number: int, parent: Optional[Node] = None
+    ) -> int:
+        """Execution time limit for a child of parent (None: a new draft)"""
+        timeout = self.max_timeout
+        expected = self.expected_runtime(stage_name, parent)
+        if expected is not None and stage_number not in self.full_timeout_stages:
+            timeout = min(timeout, max(self.min_timeout, expected * self.slack))
+        remaining = self.remaining(stage_name)
+        if remaining is not None:
+            timeout = min(timeout, max(self.min_timeout, remaining))
+        return math.ceil(timeout)
+
+    def record(self, stage_name: str, node: Node, timeout: Optional[float] = None):
+        """Feed the measured runtime of an executed node back into the budgets"""
+        if node.exec_time is None:
+            return
+        self.num_runs += 1
+        if node.exc_type is None:
+            self.runtimes.setdefault(stage_name, []).append(node.exec_time)
+        elif (
+            node.exc_type == "TimeoutError"
+            and timeout is not None
+            and timeout < self.max_timeout
+        ):
+            self.num_early_kills += 1
+            self.saved_time += self.max_timeout - timeout
+
+    def exhausted(self, stage_name: str) -> bool:
+        """Whether the stage's budget no longer fits a typical run"""
+        remaining = self.remaining(stage_name)
+        if remaining is None:
+            return False
+        expected = self.expected_runtime(stage_name)
+        return remaining < (expected if expected is not None else self.min_timeout)
+
+    def to_dict(self) -> Dict:
+        """Checkpoint state. Stage budgets are stored as time spent, so the time the run
+        was stopped for doesn't count against them after a resume."""
+        now = time.time()
+        return {
+            "stage_elapsed": {
+                name: now - start for name, start in self.stage_start.items()
+            },
+            "runtimes": self.runtimes,
+            "num_runs": self.num_runs,
+            "num_early_kills": self.num_early_kills,
+            "saved_time": self.saved_time,
+        }
+
+    def load_dict(self, state: Dict):
+        """Restore the state saved by to_dict"""
+        now = time.time()
+        self.stage_start = {
+            name: now - elapsed for name, elapsed in state["stage_elapsed"].items()
+        }
+        self.runtimes = {name: list(r) for name, r in state["runtimes"].items()}
+        self.num_runs = state["num_runs"]
+        self.num_early_kills = state["num_early_kills"]
+        self.saved_time = state["saved_time"]
+
+    def log_stats(self):
+        logger.info(
+            f"Exec budgets: {self.num_runs} runs, {self.num_early_kills} stopped early "
+            f"(at most {self.saved_time / 3600:.2f}h of execution saved)"
+        )
@@ -0,0 +1,150 @@
+"""
+Content-addressed cache of experiment executions.
+An entry is keyed on the code (seed evaluation writes the seed into it), a fingerprint of
+the input data and the environment variables, and holds the ExecutionResult together with
+the .npy/.png artifacts the code left in the working directory. The time limit is not part
+of the key (it varies per node, see ExecBudgetManager): timed out runs are never stored.
+Entries are evicted least-recently-used once the cache exceeds its size limit.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+
+from .interpreter import ExecutionResult, Interpreter
+
+logger = logging.getLogger("ai-scientist")
+
+ARTIFACT_PATTERNS = ("*.npy", "*.png")
+
+
+def fingerprint_dir(path: Path | str) -> str:
+    """Cheap fingerprint of a directory tree (relative paths, sizes and mtimes)"""
+    path = Path(path)
+    h = hashlib.sha256()
+    if not path.exists():
+        return h.hexdigest()
+    for root, dirs, files in os.walk(path, followlinks=True):
+        dirs.sort()
+        for name in sorted(files):
+            f = Path(root) / name
+            try:
+                st = f.stat()
+            except OSError:
+                continue
+            h.update(f"{f.relative_to(path)}:{st.st_size}:{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
+
+def _dir_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+class ExecutionCache:
+    def __init__(self, cache_dir: Path | str, max_size_mb: int = 10240):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size_mb * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(
+        self,
+        code: str,
+        input_dir: Path | str,
+        env_vars: dict[str, str] | None = None,
+    ) -> str:
+        key = {
+            "code": code,
+            "input": fingerprint_dir(input_dir),
+            "env_vars": sorted((env_vars or {}).items()),
+        }
+        return hashlib.sha256(json.dumps(key).encode()).hexdigest()
+
+    def get(self, key: str, working_dir: Path | str) -> ExecutionResult | None:
+        """Returns the cached result and restores its artifacts into working_dir"""
+        entry = self.cache_dir / key
+        try:
+            result = ExecutionResult.from_json((entry / "result.json").read_text())
+            for artifact in (entry / "artifacts").iterdir():
+                shutil.copy2(artifact, Path(working_dir) / artifact.name)
+            # mark as recently used
+            os.utime(entry)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def put(
+        self,
+        key: str,
+        result: ExecutionResult,
+        working_dir: Path | str,
+        since: float | None = None,
+    ):
+        """Stores the result with the artifacts in working_dir (modified after `since`)"""
+        entry = self.cache_dir / key
+        if entry.exists():
+            return
+        # write to a private dir first, so other workers never see a partial entry
+        tmp = self.cache_dir / f".tmp-{key}-{uuid.uuid4().hex}"
+        (tmp / "artifacts").mkdir(parents=True)
+        try:
+            for pattern in ARTIFACT_PATTERNS:
+                for artifact in Path(working_dir).glob(pattern):
+                    if since is None or artifact.stat().st_mtime >= since:
+                        shutil.copy2(artifact, tmp / "artifacts" / artifact.name)
+            (tmp / "result.json").write_text(result.to_json())
+            os.rename(tmp, entry)
+        except OSError as e:
+            # e.g. another worker stored the same entry in the meantime
+            logger.debug(f"Could not store execution cache entry {key}: {e}")
+            shutil.rmtree(tmp, ignore_errors=True)
+            return
+        self.evict()
+
+    def evict(self):
+        """Removes least recently used entries until the cache fits its size limit"""
+        entries = []
+        for entry in self.cache_dir.iterdir():
+            if entry.name.startswith(".tmp-"):
+                continue
+            try:
+                entries.append((entry.stat().st_mtime, _dir_size(entry), entry))
+            except OSError:
+                continue
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_size:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            logger.info(f"Evicted execution cache entry {entry.name}")
+
+    def run(
+        self,
+        interpreter: Interpreter,
+        code: str,
+        input_dir: Path | str,
+        working_dir: Path | str,
+    ) -> ExecutionResult:
+        """Interpreter.run(code, True), replayed from the cache if the same code already ran
+        on the same inputs. Timed out and early stopped executions are not cached, they
+        depend on the wall clock and the early_stop config rather than on the code."""
+        key = self.make_key(code, input_dir, interpreter.env_vars)
+        result = self.get(key, working_dir)
+        if result is not None:
+            logger.info(f"Replayed execution {key[:12]} from the cache")
+            return result
+        start = time.time()
+        result = interpreter.run(code, True)
+        exc_type = result.exc_type or ""
+        if exc_type != "TimeoutError" and not exc_type.startswith("EarlyStop"):
+            self.put(key, result, working_dir, since=start)
+        return result
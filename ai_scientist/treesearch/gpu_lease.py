@@ -0,0 +1,207 @@
+"""
+Cross-process GPU leasing for the tree search workers.
+
+A GPULeasePool lives in a multiprocessing manager, so any worker process can lease a
+device at the moment it executes experiment code and return it right after, whichever
+process the pool executor picked for the task. A GPU can be shared by several executions:
+each lease reserves `fraction` of a device, and a device only takes another lease while its
+free memory, as measured by nvidia-smi, leaves room for it.
+
+Setting AI_SCIENTIST_FAKE_GPUS to "<count>[x<memory_mb>]" (e.g. "2x16000") replaces
+nvidia-smi by fake devices, to exercise GPU scheduling on CPU-only machines.
+"""
+
+import logging
+import multiprocessing
+import os
+import subprocess
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger("ai-scientist")
+
+FAKE_GPUS_ENV = "AI_SCIENTIST_FAKE_GPUS"
+DEFAULT_FAKE_GPU_MEMORY_MB = 16384
+
+
+def get_fake_gpus() -> Optional[Tuple[int, float]]:
+    """(count, memory in MiB) of the fake devices, or None if they are not enabled"""
+    spec = os.environ.get(FAKE_GPUS_ENV, "").strip()
+    if not spec:
+        return None
+    count, _, memory_mb = spec.partition("x")
+    try:
+        return int(count), float(memory_mb or DEFAULT_FAKE_GPU_MEMORY_MB)
+    except ValueError:
+        raise ValueError(
+            f"{FAKE_GPUS_ENV} must look like <count>[x<memory_mb>], got {spec!r}"
+        )
+
+
+def query_gpu_memory(device_ids: Optional[List] = None) -> Dict:
+    """
+    Free and total memory (MiB) of the GPUs, by device id (index or UUID).
+    Devices that can't be queried (no nvidia-smi, unknown id) are left out.
+    """
+    fake_gpus = get_fake_gpus()
+    if fake_gpus is not None:
+        count, memory_mb = fake_gpus
+        memory = {i: (memory_mb, memory_mb) for i in range(count)}
+    else:
+        try:
+            nvidia_smi = subprocess.run(
+                [
+                    "nvidia-smi",
+                    "--query-gpu=index,uuid,memory.free,memory.total",
+                    "--format=csv,noheader,nounits",
+                ],
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+        except (subprocess.SubprocessError, FileNotFoundError):
+            return {}
+        memory = {}
+        for line in nvidia_smi.stdout.strip().split("\n"):
+            try:
+                index, gpu_uuid, free, total = [f.strip() for f in line.split(",")]
+                memory[int(index)] = memory[gpu_uuid] = (float(free), float(total))
+            except ValueError:
+                continue
+    if device_ids is None:
+        return memory
+    return {d: memory[d] for d in device_ids if d in memory}
+
+
+def _is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class GPULeasePool:
+    """GPUs leased to worker processes only while they execute experiment code.
+    Workers spend most of a node on LLM calls (code generation, metric parsing,
+    plotting, VLM feedback), which don't need a GPU, so more workers than GPUs
+    can share the devices. The pool can be passed to pool workers as a task argument.
+    It is owned together with the WorkerPool (see AgentManager), so that leases of tasks
+    that outlive a sub-stage are still accounted for by the next one."""
+
+    def __init__(
+        self,
+        device_ids: List,
+        fraction: float = 1.0,
+        min_free_mb: float = 0,
+        poll_interval: float = 5.0,
+    ):
+        if not 0 < fraction <= 1:
+            raise ValueError(f"fraction must be in (0, 1], got {fraction}")
+        self.device_ids = list(device_ids)
+        self.fraction = fraction
+        self.min_free_mb = min_free_mb
+        self.poll_interval = poll_interval
+        self._manager = multiprocessing.Manager()
+        self._cond = self._manager.Condition()
+        self._leases = self._manager.dict()  # lease id -> (gpu_id, pid)
+        # (gpu_id, lease wait, lease duration) of every returned lease
+        self._usage = self._manager.Queue()
+        self.start_time = time.time()
+        self.num_leases = 0
+        self.wait_time = 0.0
+        self.busy_time = 0.0
+
+    def __getstate__(self):
+        # the manager itself stays in the process that created the pool
+        state = self.__dict__.copy()
+        state["_manager"] = None
+        return state
+
+    def _reclaim_dead_leases(self) -> Dict[str, Tuple]:
+        """Current leases, after dropping those of processes that died while holding one"""
+        leases = dict(self._leases)
+        for lease_id, (gpu_id, pid) in list(leases.items()):
+            if not _is_alive(pid):
+                logger.warning(
+                    f"Reclaiming GPU {gpu_id} leased by process {pid}, which has exited"
+                )
+                self._leases.pop(lease_id, None)
+                del leases[lease_id]
+        return leases
+
+    def _pick_device(self):
+        """The least loaded device with room for one more lease, or None"""
+        leases = self._reclaim_dead_leases()
+        num_leases = Counter(gpu_id for gpu_id, _ in leases.values())
+        memory = query_gpu_memory(self.device_ids)
+        candidates = []
+        for gpu_id in self.device_ids:
+            if (num_leases[gpu_id] + 1) * self.fraction > 1 + 1e-6:
+                continue
+            free_mb = float("inf")
+            if gpu_id in memory:
+                free_mb, total_mb = memory[gpu_id]
+                # on a shared device, the running executions must have left our share
+                needed_mb = self.min_free_mb
+                if num_leases[gpu_id]:
+                    needed_mb = max(needed_mb, self.fraction * total_mb)
+                if free_mb < needed_mb:
+                    continue
+            candidates.append((num_leases[gpu_id], -free_mb, gpu_id))
+        if not candidates:
+            return None
+        return min(candidates, key=lambda c: c[:2])[2]
+
+    @contextmanager
+    def lease(self):
+        """Block until a GPU has room and make it the only visible device while leased"""
+        requested = time.time()
+        lease_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        with self._cond:
+            while (gpu_id := self._pick_device()) is None:
+                # woken up by a release, or re-measure free memory after poll_interval
+                self._cond.wait(self.poll_interval)
+            self._leases[lease_id] = (gpu_id, os.getpid())
+        acquired = time.time()
+        logger.info(f"Leased GPU {gpu_id} after waiting {acquired - requested:.1f}s")
+        os.environ["CUDA_VISIBLE_DEVICES"] = str(gpu_id)
+        try:
+            yield gpu_id
+        finally:
+            os.environ["CUDA_VISIBLE_DEVICES"] = ""
+            with self._cond:
+                self._leases.pop(lease_id, None)
+                self._cond.notify_all()
+            self._usage.put((gpu_id, acquired - requested, time.time() - acquired))
+
+    def report(self) -> Dict[str, float]:
+        """GPU duty cycle (leased share of num_gpus * wall time) and lease waits"""
+        while not self._usage.empty():
+            _, wait_time, busy_time = self._usage.get()
+            self.num_leases += 1
+            self.wait_time += wait_time
+            self.busy_time += busy_time
+        wall_time = time.time() - self.start_time
+        return {
+            "num_leases": self.num_leases,
+            "active_leases": len(self._leases),
+            "duty_cycle": (
+                self.busy_time * self.fraction / (wall_time * len(self.device_ids))
+                if wall_time
+                else 0.0
+            ),
+            "mean_wait": self.wait_time / self.num_leases if self.num_leases else 0.0,
+            "busy_time": self.busy_time,
+            "wall_time": wall_time,
+        }
+
+    def shutdown(self):
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
@@ -4,22 +4,32 @@ Supports:
 - captures stdout and stderr
 - captures exceptions and stack traces
 - limits execution time
+- optionally stops hopeless runs early by watching their output (see early_stop)
+- optionally forks each session from a zygote (forkserver) with heavy modules pre-imported
 """
 
 import logging
+import math
+import multiprocessing
+from collections import deque
 import os
 import queue
 import signal
 import sys
+import threading
 import time
 import traceback
 from dataclasses import dataclass
 from multiprocessing import Process, Queue
+from multiprocessing import connection, forkserver
 from pathlib import Path
+from typing import Callable
 
 import humanize
 from dataclasses_json import DataClassJsonMixin
 
+from .early_stop import OutputMonitor
+
 logger = logging.getLogger("ai-scientist")
 
 
@@ -35,6 +45,7 @@ class ExecutionResult(DataClassJsonMixin):
     exc_type: str | None
     exc_info: dict | None = None
     exc_stack: list[tuple] | None = None
+    output_size: int | None = None  # total number of characters written by the code
 
 
 def exception_summary(e, working_dir, exec_file_name, format_tb_ipython):
@@ -67,15 +78,144 @@ def exception_summary(e, working_dir, exec_file_name, format_tb_ipython):
     return tb_str, e.__class__.__name__, exc_info, exc_stack
 
 
+# modules imported once by the zygote process, so sessions forked from it start warm
+DEFAULT_ZYGOTE_PRELOAD = [
+    "ai_scientist.treesearch.interpreter",  # to unpickle the session in the child
+    "shutup",
+    "numpy",
+    "pandas",
+    "matplotlib",
+    "matplotlib.pyplot",
+    "torch",
+]
+
+
+# Python versions whose (private) multiprocessing.forkserver state
+# _reset_forkserver_after_fork knows how to reset
+_FORKSERVER_MIN_VERSION, _FORKSERVER_MAX_VERSION = (3, 8), (3, 14)
+_FORKSERVER_STATE = ["_forkserver_address", "_forkserver_alive_fd", "_forkserver_pid"]
+# not in every version
+_FORKSERVER_OPTIONAL_STATE = ["_inherited_fds", "_forkserver_authkey"]
+
+# False in a forked process that inherited a zygote it can't reset; sessions are spawned
+_zygote_usable = True
+# the hook is only registered once a zygote is used (see Interpreter._get_context)
+_fork_hook_registered = False
+
+
+def _reset_forkserver_after_fork():
+    # A forked process (e.g. a pool worker) can't manage the zygote of its parent,
+    # so it starts its own on first use. The preload list is kept. There is no public
+    # API for this: on Python versions or layouts not known here, fall back to spawn.
+    global _zygote_usable
+    server = getattr(forkserver, "_forkserver", None)
+    if not (
+        _FORKSERVER_MIN_VERSION <= sys.version_info[:2] <= _FORKSERVER_MAX_VERSION
+        and server is not None
+        and all(hasattr(server, attr) for attr in _FORKSERVER_STATE + ["_lock"])
+    ):
+        _zygote_usable = False
+        return
+    if server._forkserver_alive_fd is not None:
+        # our copy of the fd that keeps the parent's zygote alive
+        try:
+            os.close(server._forkserver_alive_fd)
+        except OSError:
+            pass
+    for attr in _FORKSERVER_STATE + _FORKSERVER_OPTIONAL_STATE:
+        if hasattr(server, attr):
+            setattr(server, attr, None)
+    server._lock = threading.Lock()
+
+
+def _register_fork_hook():
+    global _fork_hook_registered
+    if not _fork_hook_registered and hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=_reset_forkserver_after_fork)
+        _fork_hook_registered = True
+
+
 class RedirectQueue:
-    def __init__(self, queue):
+    """stdout/stderr of the child process.
+    Writes are buffered and sent to the parent in chunks (when the buffer is full,
+    or every `flush_interval` seconds), instead of one queue message per write."""
+
+    def __init__(self, queue, chunk_size: int = 4096, flush_interval: float = 0.5):
         self.queue = queue
+        self.chunk_size = chunk_size
+        self.flush_interval = flush_interval
+        self._buffer: list[str] = []
+        self._buffered = 0
+        self._lock = threading.Lock()
+        # keeps the output streaming to the parent while the code is quiet
+        threading.Thread(target=self._flush_periodically, daemon=True).start()
 
     def write(self, msg):
-        self.queue.put(msg)
+        with self._lock:
+            self._buffer.append(msg)
+            self._buffered += len(msg)
+            if self._buffered >= self.chunk_size:
+                self._flush()
+        return len(msg)
 
     def flush(self):
-        pass
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if self._buffer:
+            self.queue.put("".join(self._buffer))
+            self._buffer = []
+            self._buffered = 0
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+
+class OutputCapture:
+    """Output of one execution, as seen by the parent process.
+    Only the first `head_size` and the last `tail_size` characters are kept
+    (plus the total size), however much the code prints."""
+
+    def __init__(self, head_size: int = 2000, tail_size: int = 2000):
+        self.head_size = head_size
+        self.tail_size = tail_size
+        self.head = ""
+        self.tail: deque[str] = deque()
+        self._tail_len = 0
+        self.total_size = 0
+
+    def write(self, chunk: str):
+        self.total_size += len(chunk)
+        if len(self.head) < self.head_size:
+            n = self.head_size - len(self.head)
+            self.head += chunk[:n]
+            chunk = chunk[n:]
+        if not chunk:
+            return
+        chunk = chunk[-self.tail_size :]
+        self.tail.append(chunk)
+        self._tail_len += len(chunk)
+        while self._tail_len - len(self.tail[0]) >= self.tail_size:
+            self._tail_len -= len(self.tail.popleft())
+
+    def get_tail(self, n: int | None = None) -> str:
+        tail = "".join(self.tail)[-self.tail_size :]
+        return tail if n is None else tail[-n:]
+
+    def get_output(self) -> list[str]:
+        tail = self.get_tail()
+        truncated_len = self.total_size - len(self.head) - len(tail)
+        if truncated_len > 0:
+            # same marker as utils.response.trim_long_string
+            return [
+                self.head,
+                f"\n ... [{truncated_len} characters truncated] ... \n",
+                tail,
+            ]
+        return [s for s in [self.head, tail] if s]
 
 
 class Interpreter:
@@ -86,6 +226,12 @@ class Interpreter:
         format_tb_ipython: bool = False,
         agent_file_name: str = "runfile.py",
         env_vars: dict[str, str] = {},
+        use_zygote: bool = False,
+        zygote_preload: list[str] | None = None,
+        max_output_head: int = 2000,
+        max_output_tail: int = 2000,
+        on_output: Callable[[str], None] | None = None,
+        early_stop: Callable[[], OutputMonitor] | None = None,
     ):
         """
         Simulates a standalone Python REPL with an execution time limit.
@@ -96,6 +242,12 @@ class Interpreter:
             format_tb_ipython (bool, optional): Whether to use IPython or default python REPL formatting for exceptions. Defaults to False.
             agent_file_name (str, optional): The name for the agent's code file. Defaults to "runfile.py".
             env_vars (dict[str, str], optional): Environment variables to set in the child process. Defaults to {}.
+            use_zygote (bool, optional): Whether to fork sessions from a zygote process with pre-imported modules instead of starting them cold. Defaults to False.
+            zygote_preload (list[str], optional): Modules the zygote imports. Defaults to DEFAULT_ZYGOTE_PRELOAD.
+            max_output_head (int, optional): Number of leading output characters to keep. Defaults to 2000.
+            max_output_tail (int, optional): Number of trailing output characters to keep. Defaults to 2000.
+            on_output (Callable[[str], None], optional): Called with every chunk of output while the code runs (e.g. for a live tail). Defaults to None.
+            early_stop (Callable[[], OutputMonitor], optional): Creates the monitor of each run's output; the run is killed once one of its detectors triggers. Defaults to None.
         """
         # this really needs to be a path, otherwise causes issues that don't raise exc
         self.working_dir = Path(working_dir).resolve()
@@ -107,13 +259,55 @@ class Interpreter:
         self.agent_file_name = agent_file_name
         self.process: Process = None  # type: ignore
         self.env_vars = env_vars
-
-    def child_proc_setup(self, result_outq: Queue) -> None:
+        self.use_zygote = use_zygote
+        self.zygote_preload = (
+            DEFAULT_ZYGOTE_PRELOAD if zygote_preload is None else zygote_preload
+        )
+        self.max_output_head = max_output_head
+        self.max_output_tail = max_output_tail
+        self.on_output = on_output
+        self.early_stop = early_stop
+        self.monitor: OutputMonitor | None = None  # monitor of the current/last run
+        self.output: OutputCapture | None = None  # output of the current/last run
+
+    def __getstate__(self):
+        # the session is sent to the zygote's child; the handles to it stay here
+        state = self.__dict__.copy()
+        for key in ["process", "code_inq", "result_outq", "event_outq", "on_output"]:
+            state.pop(key, None)
+        state["process"] = None
+        state["on_output"] = None
+        state["early_stop"] = None
+        state["monitor"] = None
+        state["output"] = None
+        return state
+
+    def _get_context(self):
+        if not self.use_zygote:
+            return multiprocessing.get_context()
+        if not _zygote_usable:
+            # sessions still start in a clean process, only without the preloaded modules
+            return multiprocessing.get_context("spawn")
+        _register_fork_hook()
+        ctx = multiprocessing.get_context("forkserver")
+        # only takes effect when the zygote is (re)started
+        ctx.set_forkserver_preload(self.zygote_preload)
+        return ctx
+
+    def child_proc_setup(
+        self, result_outq: Queue, parent_env: dict[str, str] | None = None
+    ) -> None:
         # disable all warnings (before importing anything)
         import shutup
 
         shutup.mute_warnings()
 
+        if parent_env is not None:
+            # children of the zygote inherit the zygote's environment, not ours
+            # (e.g. CUDA_VISIBLE_DEVICES is set per node in the worker)
+            os.environ.clear()
+            os.environ.update(parent_env)
+
         for key, value in self.env_vars.items():
             os.environ[key] = value
 
@@ -128,13 +322,19 @@ class Interpreter:
         sys.stdout = sys.stderr = RedirectQueue(result_outq)
 
     def _run_session(
-        self, code_inq: Queue, result_outq: Queue, event_outq: Queue
+        self,
+        code_inq: Queue,
+        result_outq: Queue,
+        event_outq: Queue,
+        parent_env: dict[str, str] | None = None,
     ) -> None:
-        self.child_proc_setup(result_outq)
+        self.child_proc_setup(result_outq, parent_env)
 
         global_scope: dict = {}
         while True:
-            code = code_inq.get()
+            code, fresh_scope = code_inq.get()
+            if fresh_scope:
+                global_scope = {}
             os.chdir(str(self.working_dir))
             with open(self.agent_file_name, "w") as f:
                 f.write(code)
@@ -149,6 +349,7 @@ class Interpreter:
                     self.agent_file_name,
                     self.format_tb_ipython,
                 )
+                sys.stdout.flush()
                 result_outq.put(tb_str)
                 if e_cls_name == "KeyboardInterrupt":
                     e_cls_name = "TimeoutError"
@@ -158,6 +359,7 @@ class Interpreter:
                 event_outq.put(("state:finished", None, None, None))
 
             # put EOF marker to indicate that we're done
+            sys.stdout.flush()
             result_outq.put("<|EOF|>")
 
     def create_process(self) -> None:
@@ -165,11 +367,17 @@ class Interpreter:
         # - code_inq: send code to child to execute
         # - result_outq: receive stdout/stderr from child
         # - event_outq: receive events from child (e.g. state:ready, state:finished)
+        ctx = self._get_context()
         # trunk-ignore(mypy/var-annotated)
-        self.code_inq, self.result_outq, self.event_outq = Queue(), Queue(), Queue()
-        self.process = Process(
+        self.code_inq, self.result_outq, self.event_outq = (
+            ctx.Queue(),
+            ctx.Queue(),
+            ctx.Queue(),
+        )
+        parent_env = dict(os.environ) if self.use_zygote else None
+        self.process = ctx.Process(
             target=self._run_session,
-            args=(self.code_inq, self.result_outq, self.event_outq),
+            args=(self.code_inq, self.result_outq, self.event_outq, parent_env),
         )
         self.process.start()
 
@@ -193,6 +401,32 @@ class Interpreter:
             except Exception:
                 break
 
+    @property
+    def waitables(self) -> list:
+        """Handles that become ready when the current session sends output or an event,
+        or exits. Usable with multiprocessing.connection.wait, e.g. to supervise
+        several interpreters from one thread."""
+        return [self.process.sentinel, self.event_outq._reader, self.result_outq._reader]
+
+    def _read_output(self, block: bool = False) -> bool:
+        """Move the output sent by the child into self.output.
+        Returns True once the EOF marker of the current execution was read."""
+        while True:
+            try:
+                if block:
+                    chunk = self.result_outq.get()
+                else:
+                    chunk = self.result_outq.get_nowait()
+            except queue.Empty:
+                return False
+            if chunk == "<|EOF|>":
+                return True
+            self.output.write(chunk)
+            if self.on_output is not None:
+                self.on_output(chunk)
+            if self.monitor is not None:
+                self.monitor.feed(chunk)
+
     def cleanup_session(self):
         if self.process is None:
             return
@@ -210,13 +444,18 @@ class Interpreter:
         self.process.close()
         self.process = None  # type: ignore
 
-    def run(self, code: str, reset_session=True) -> ExecutionResult:
+    def run(
+        self, code: str, reset_session=True, fresh_scope=False
+    ) -> ExecutionResult:
         """
         Execute the provided Python command in a separate process and return its output.
 
         Parameters:
             code (str): Python code to execute.
             reset_session (bool, optional): Whether to reset the interpreter session before executing the code. Defaults to True.
+                A session is started anyway if there is none (or it died, e.g. after a timeout).
+            fresh_scope (bool, optional): Whether to run the code with empty globals in a reused session,
+                i.e. isolated from previous snippets but without paying for a new process and its imports. Defaults to False.
 
         Returns:
             ExecutionResult: Object containing the output and metadata of the code execution.
@@ -225,18 +464,17 @@ class Interpreter:
 
         logger.debug(f"REPL is executing code (reset_session={reset_session})")
 
-        if reset_session:
+        if reset_session or self.process is None or not self.process.is_alive():
             if self.process is not None:
                 # terminate and clean up previous process
                 self.cleanup_session()
             self.create_process()
-        else:
-            # reset_session needs to be True on first exec
-            assert self.process is not None
 
         assert self.process.is_alive()
 
-        self.code_inq.put(code)
+        self.output = OutputCapture(self.max_output_head, self.max_output_tail)
+        self.monitor = self.early_stop() if self.early_stop is not None else None
+        self.code_inq.put((code, fresh_scope))
 
         # wait for child to actually start execution (we don't want interrupt child setup)
         try:
@@ -253,52 +491,90 @@ class Interpreter:
         # this flag indicates that the child ahs exceeded the time limit and an interrupt was sent
         # if the child process dies without this flag being set, it's an unexpected termination
         child_in_overtime = False
+        eof_read = False
+
+        # time at which the child is interrupted, and at which it is killed
+        deadline = None if self.timeout is None else start_time + self.timeout
+        kill_deadline = None if deadline is None else deadline + 60
 
         while True:
-            try:
+            # sleep until the child sends output or an event, exits, or a deadline passes
+            if deadline is None:
+                wait_timeout = None
+            else:
+                next_deadline = kill_deadline if child_in_overtime else deadline
+                wait_timeout = max(next_deadline - time.time(), 0)
+            if self.monitor is not None:
+                # detectors like "no progress" also trigger while the child is silent
+                wait_timeout = min(
+                    wait_timeout if wait_timeout is not None else math.inf,
+                    self.monitor.poll_interval,
+                )
+            ready = connection.wait(self.waitables, timeout=wait_timeout)
+
+            if self.result_outq._reader in ready:
+                # keep the output bounded (and streaming) while the child runs
+                eof_read = self._read_output() or eof_read
+
+            if self.event_outq._reader in ready:
                 # check if the child is done
-                state = self.event_outq.get(timeout=1)  # wait for state:finished
-                assert state[0] == "state:finished", state
+                try:
+                    state = self.event_outq.get_nowait()  # state:finished
+                except queue.Empty:
+                    pass
+                else:
+                    assert state[0] == "state:finished", state
+                    exec_time = time.time() - start_time
+                    break
+
+            if self.process.sentinel in ready:
+                if child_in_overtime:
+                    # the interrupt took the child down before it could report back
+                    self.cleanup_session()
+                    state = (None, "TimeoutError", {}, [])
+                    exec_time = self.timeout
+                    break
+                msg = "REPL child process died unexpectedly"
+                logger.critical(msg)
+                logger.error(f"REPL output tail: {self.output.get_tail()}")
+                while not self.result_outq.empty():
+                    logger.error(f"REPL output queue dump: {self.result_outq.get()}")
+                raise RuntimeError(msg) from None
+
+            early_stop = self.monitor.poll() if self.monitor is not None else None
+            if early_stop is not None and not child_in_overtime:
+                exc_type, reason = early_stop
+                logger.info(f"Stopping the run early ({exc_type}): {reason}")
+                self._read_output()  # keep what the child printed so far
+                self.cleanup_session()
+                state = (None, exc_type, {"reason": reason}, [])
                 exec_time = time.time() - start_time
                 break
-            except queue.Empty:
-                # we haven't heard back from the child -> check if it's still alive (assuming overtime interrupt wasn't sent yet)
-                if not child_in_overtime and not self.process.is_alive():
-                    msg = "REPL child process died unexpectedly"
-                    logger.critical(msg)
-                    while not self.result_outq.empty():
-                        logger.error(
-                            f"REPL output queue dump: {self.result_outq.get()}"
-                        )
-                    raise RuntimeError(msg) from None
-
-                # child is alive and still executing -> check if we should sigint..
-                if self.timeout is None:
-                    continue
-                running_time = time.time() - start_time
-                if running_time > self.timeout:
-                    # [TODO] handle this in a better way
-                    assert reset_session, "Timeout ocurred in interactive session"
-
-                    # send interrupt to child
-                    os.kill(self.process.pid, signal.SIGINT)  # type: ignore
-                    child_in_overtime = True
-                    # terminate if we're overtime by more than a minute
-                    if running_time > self.timeout + 60:
-                        logger.warning("Child failed to terminate, killing it..")
-                        self.cleanup_session()
-
-                        state = (None, "TimeoutError", {}, [])
-                        exec_time = self.timeout
-                        break
-
-        output: list[str] = []
+
+            if deadline is None:
+                continue
+            now = time.time()
+            if not child_in_overtime and now >= deadline:
+                # send interrupt to child (a reused session survives it and reports a TimeoutError)
+                os.kill(self.process.pid, signal.SIGINT)  # type: ignore
+                child_in_overtime = True
+            elif child_in_overtime and now >= kill_deadline:
+                # terminate if we're overtime by more than a minute
+                logger.warning("Child failed to terminate, killing it..")
+                self.cleanup_session()
+
+                state = (None, "TimeoutError", {}, [])
+                exec_time = self.timeout
+                break
+
         # read all stdout/stderr from child up to the EOF marker
         # waiting until the queue is empty is not enough since
         # the feeder thread in child might still be adding to the queue
-        while not self.result_outq.empty() or not output or output[-1] != "<|EOF|>":
-            output.append(self.result_outq.get())
-        output.pop()  # remove the EOF marker
+        # (a killed child never sends the marker)
+        if state[0] is not None and not eof_read:
+            while not self._read_output(block=True):
+                pass
+        output = self.output.get_output()
 
         e_cls_name, exc_info, exc_stack = state[1:]
 
@@ -306,8 +582,74 @@ class Interpreter:
             output.append(
                 f"TimeoutError: Execution exceeded the time limit of {humanize.naturaldelta(self.timeout)}"
             )
+        elif e_cls_name is not None and e_cls_name.startswith("EarlyStop"):
+            output.append(
+                f"{e_cls_name}: Execution was stopped early after {humanize.naturaldelta(exec_time)}: {exc_info['reason']}"
+            )
         else:
             output.append(
                 f"Execution time: {humanize.naturaldelta(exec_time)} seconds (time limit is {humanize.naturaldelta(self.timeout)})."
             )
-        return ExecutionResult(output, exec_time, e_cls_name, exc_info, exc_stack)
+        return ExecutionResult(
+            output, exec_time, e_cls_name, exc_info, exc_stack, self.output.total_size
+        )
+
+
+if __name__ == "__main__":
+    # Benchmark: cold session start vs. session forked from the zygote,
+    # for snippets like the metric-parsing and plotting code of a node.
+    import argparse
+    import statistics
+    import tempfile
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    snippets = {
+        "metric-parse": """
+import os
+import numpy as np
+data = np.load(os.path.join("working", "experiment_data.npy"), allow_pickle=True).item()
+print("best validation loss:", min(data["val_loss"]))
+""",
+        "plotting": """
+import os
+import numpy as np
+import matplotlib.pyplot as plt
+data = np.load(os.path.join("working", "experiment_data.npy"), allow_pickle=True).item()
+plt.figure()
+plt.plot(data["val_loss"])
+plt.savefig(os.path.join("working", "val_loss.png"))
+plt.close()
+""",
+    }
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.makedirs(os.path.join(tmp_dir, "working"))
+        # create the data in a session, so that numpy isn't imported (and inherited) here
+        setup = Interpreter(tmp_dir, timeout=60)
+        setup.run(
+            "import numpy as np\n"
+            "np.save('working/experiment_data.npy', "
+            "{'val_loss': list(np.linspace(1.0, 0.1, 50))})"
+        )
+        setup.cleanup_session()
+        for use_zygote in [False, True]:
+            interpreter = Interpreter(tmp_dir, timeout=60, use_zygote=use_zygote)
+            if use_zygote:
+                # the zygote itself is started once per process
+                interpreter.run("pass")
+            for name, code in snippets.items():
+                latencies = []
+                for _ in range(args.repeats):
+                    start = time.time()
+                    result = interpreter.run(code)
+                    latencies.append(time.time() - start)
+                    assert result.exc_type is None, result.term_out
+                print(
+                    f"{'zygote' if use_zygote else 'cold':>6} {name:>12}: "
+                    f"median {statistics.median(latencies) * 1000:.0f}ms, "
+                    f"min {min(latencies) * 1000:.0f}ms"
+                )
+            interpreter.cleanup_session()
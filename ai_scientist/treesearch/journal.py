@@ -1,11 +1,13 @@
 from __future__ import annotations
 import time
 import uuid
-from dataclasses import dataclass, field
+from dataclasses import MISSING, dataclass, field, fields
 from typing import Literal, Optional, Any
+import bisect
 import copy
 import os
 import json
+import weakref
 
 from dataclasses_json import DataClassJsonMixin
 from .interpreter import ExecutionResult
@@ -40,6 +42,10 @@ node_selection_spec = FunctionSpec(
 )
 
 
+# attributes that decide a node's categories in the Journal index
+JOURNAL_INDEXED_ATTRS = {"parent", "is_buggy", "is_buggy_plots"}
+
+
 @dataclass(eq=False)
 class Node(DataClassJsonMixin):
     """A single node in the solution tree. Contains code, execution results, and evaluation information."""
@@ -62,6 +68,10 @@ class Node(DataClassJsonMixin):
     # ---- execution info ----
     _term_out: list[str] = field(default=None, kw_only=True)  # type: ignore
     exec_time: float = field(default=None, kw_only=True)  # type: ignore
+    # time limit of the run (see ExecBudgetManager), None: exec.timeout
+    exec_timeout: float | None = field(default=None, kw_only=True)
+    # time spent on probe runs of candidate drafts (speculative drafting)
+    probe_exec_time: float = field(default=0.0, kw_only=True)
     exc_type: str | None = field(default=None, kw_only=True)
     exc_info: dict | None = field(default=None, kw_only=True)
     exc_stack: list[tuple] | None = field(default=None, kw_only=True)
@@ -104,6 +114,11 @@ class Node(DataClassJsonMixin):
     vlm_feedback_summary: List[str] = field(default_factory=list)
     datasets_successfully_tested: List[str] = field(default_factory=list)
 
+    # ---- summary of the findings (generated once, after evaluation) ----
+    summary: dict | None = field(default=None, kw_only=True)
+    # summary queries the worker made for this node (failed ones included)
+    summary_calls: int = field(default=0, kw_only=True)
+
     # ---- execution time feedback ----
     exec_time_feedback: str = field(default="", kw_only=True)
 
@@ -125,6 +140,27 @@ class Node(DataClassJsonMixin):
         if self.parent is not None and not isinstance(self.parent, str):
             self.parent.children.add(self)
 
+    def __setattr__(self, name, value):
+        refs = self.__dict__.get("_journal_refs")
+        if not refs:
+            object.__setattr__(self, name, value)
+            return
+        old_value = self.__dict__.get(name)
+        object.__setattr__(self, name, value)
+        # changed since it was added to a journal -> to be persisted again (see JournalLog)
+        self.__dict__["_version"] = self.__dict__.get("_version", 0) + 1
+        if name in JOURNAL_INDEXED_ATTRS:
+            # keep the index of the journals containing this node up to date
+            for ref in refs:
+                journal = ref()
+                if journal is not None:
+                    journal._on_node_changed(self, name, old_value)
+
+    @property
+    def version(self) -> int:
+        """Number of attribute assignments since the node was added to a journal"""
+        return self.__dict__.get("_version", 0)
+
     def __deepcopy__(self, memo):
         # Create a new instance with copied attributes
         cls = self.__class__
@@ -132,8 +168,9 @@ class Node(DataClassJsonMixin):
         memo[id(self)] = result
 
         # Copy all attributes except parent and children to avoid circular references
+        # (and the journal back-references, the copy isn't part of those journals)
         for k, v in self.__dict__.items():
-            if k not in ("parent", "children"):
+            if k not in ("parent", "children", "_journal_refs"):
                 setattr(result, k, copy.deepcopy(v, memo))
 
         # Handle parent and children separately
@@ -145,6 +182,8 @@ class Node(DataClassJsonMixin):
     def __getstate__(self):
         """Return state for pickling"""
         state = self.__dict__.copy()
+        # weak references can't be pickled, journals re-register on unpickling
+        state.pop("_journal_refs", None)
         # Ensure id is included in the state
         if hasattr(self, "id"):
             state["id"] = self.id
@@ -232,6 +271,8 @@ class Node(DataClassJsonMixin):
             "parse_exc_info": self.parse_exc_info,
             "parse_exc_stack": self.parse_exc_stack,
             "exec_time": self.exec_time,
+            "exec_timeout": self.exec_timeout,
+            "probe_exec_time": self.probe_exec_time,
             "exc_type": self.exc_type,
             "exc_info": self.exc_info,
             "exc_stack": self.exc_stack,
@@ -288,6 +329,8 @@ class Node(DataClassJsonMixin):
             "is_seed_node": self.is_seed_node,
             "is_seed_agg_node": self.is_seed_agg_node,
             "exec_time_feedback": self.exec_time_feedback,
+            "summary": self.summary,
+            "summary_calls": self.summary_calls,
         }
 
     @classmethod
@@ -364,6 +407,58 @@ class Journal:
 
     nodes: list[Node] = field(default_factory=list)
 
+    # ---- best-node selection cache ----
+    # LLM selections keyed on the candidate set, see `get_best_node`
+    _best_node_cache: dict = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    # bumped whenever `append` adds a node to the good-node candidate set
+    _candidate_version: int = field(default=0, init=False, repr=False, compare=False)
+    best_node_cache_hits: int = field(default=0, init=False, repr=False, compare=False)
+    best_node_cache_misses: int = field(
+        default=0, init=False, repr=False, compare=False
+    )
+
+    # ---- node index ----
+    # id -> position in `nodes`
+    _index: dict = field(default_factory=dict, init=False, repr=False, compare=False)
+    # category -> sorted positions (in `nodes`) of its members, see `_node_categories`
+    _categories: dict = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    # category -> its member nodes, built on first access after a change
+    _category_lists: dict = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    # id -> number of nodes in `nodes` whose parent it is
+    _num_children: dict = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    # the list (and its length) the index was built for, to detect direct edits of `nodes`
+    _indexed_nodes: Optional[list] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _indexed_len: int = field(default=0, init=False, repr=False, compare=False)
+
+    # ---- incremental progress summary ----
+    # (include_code, model, temp) -> {"text": summary, "seen": {node id: is_buggy}}
+    _summaries: dict = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self._rebuild_index()
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # journals pickled by older versions lack the newer (non-init) fields
+        for f in fields(self):
+            if f.name not in self.__dict__:
+                if f.default_factory is not MISSING:
+                    setattr(self, f.name, f.default_factory())
+                elif f.default is not MISSING:
+                    setattr(self, f.name, f.default)
+        # also re-registers the journal with its (unpickled/copied) nodes
+        self._rebuild_index()
+
     def __getitem__(self, idx: int) -> Node:
         return self.nodes[idx]
 
@@ -371,47 +466,150 @@ class Journal:
         """Return the number of nodes in the journal."""
         return len(self.nodes)
 
+    def _rebuild_index(self) -> None:
+        self._index = {}
+        self._categories = {c: [] for c in ("draft", "buggy", "good", "leaf")}
+        self._category_lists = {}
+        self._num_children = {}
+        for pos, node in enumerate(self.nodes):
+            self._index[node.id] = pos
+            self._register(node)
+            self._count_child_of(node.parent, 1)
+        for node in self.nodes:
+            for category in self._node_categories(node):
+                self._categories[category].append(self._index[node.id])
+        self._indexed_nodes = self.nodes
+        self._indexed_len = len(self.nodes)
+
+    def _ensure_index(self) -> None:
+        # `nodes` was replaced or extended without `append`
+        if self._indexed_nodes is not self.nodes or self._indexed_len != len(
+            self.nodes
+        ):
+            self._rebuild_index()
+
+    def _register(self, node: Node) -> None:
+        refs = node.__dict__.setdefault("_journal_refs", [])
+        if not any(ref() is self for ref in refs):
+            refs.append(weakref.ref(self))
+
+    def _count_child_of(self, parent: Optional[Node], delta: int) -> None:
+        if isinstance(parent, Node):
+            self._num_children[parent.id] = self._num_children.get(parent.id, 0) + delta
+
+    def _is_leaf(self, node: Node) -> bool:
+        # a leaf of this journal's tree, i.e. no node in the journal has it as parent
+        return not self._num_children.get(node.id, 0)
+
+    def _node_categories(self, node: Node) -> set[str]:
+        categories = set()
+        if node.parent is None:
+            categories.add("draft")
+        if node.is_buggy:
+            categories.add("buggy")
+        if node.is_buggy is False and node.is_buggy_plots is False:
+            categories.add("good")
+        if self._is_leaf(node):
+            categories.add("leaf")
+        return categories
+
+    def _in_category(self, category: str, node: Node) -> bool:
+        members = self._categories[category]
+        pos = self._index[node.id]
+        i = bisect.bisect_left(members, pos)
+        return i < len(members) and members[i] == pos
+
+    def _set_category(self, category: str, node: Node, member: bool) -> None:
+        members = self._categories[category]
+        pos = self._index[node.id]
+        i = bisect.bisect_left(members, pos)
+        present = i < len(members) and members[i] == pos
+        if member and not present:
+            members.insert(i, pos)
+            self._category_lists.pop(category, None)
+        elif not member and present:
+            del members[i]
+            self._category_lists.pop(category, None)
+
+    def _get_category(self, category: str) -> list[Node]:
+        self._ensure_index()
+        if category not in self._category_lists:
+            self._category_lists[category] = [
+                self.nodes[pos] for pos in self._categories[category]
+            ]
+        return list(self._category_lists[category])
+
+    def _update_categories(self, node: Node) -> None:
+        categories = self._node_categories(node)
+        for category in self._categories:
+            self._set_category(category, node, category in categories)
+
+    def _on_node_changed(self, node: Node, attr: str, old_value: Any) -> None:
+        """Called by `Node.__setattr__` when an indexed attribute of a node changes."""
+        self._ensure_index()
+        if node.id not in self._index:
+            return
+        was_good = self._in_category("good", node)
+        if attr == "parent":
+            self._count_child_of(old_value, -1)
+            self._count_child_of(node.parent, 1)
+        self._update_categories(node)
+        if attr == "parent":
+            for parent in (old_value, node.parent):
+                if isinstance(parent, Node) and parent.id in self._index:
+                    self._set_category("leaf", parent, self._is_leaf(parent))
+        if was_good != self._in_category("good", node):
+            # the good-node candidate set changed -> every cached selection is stale
+            self._candidate_version += 1
+            self._best_node_cache.clear()
+
     def append(self, node: Node) -> None:
         """Append a new node to the journal."""
+        self._ensure_index()
         node.step = len(self.nodes)
         self.nodes.append(node)
+        self._index[node.id] = node.step
+        self._indexed_len = len(self.nodes)
+        self._register(node)
+        self._count_child_of(node.parent, 1)
+        self._update_categories(node)
+        if isinstance(node.parent, Node) and node.parent.id in self._index:
+            self._set_category("leaf", node.parent, False)
+        if node.is_buggy is False and node.is_buggy_plots is False:
+            # the good-node candidate set changed -> every cached selection is stale
+            self._candidate_version += 1
+            self._best_node_cache.clear()
+        else:
+            # all nodes are candidates when `only_good=False`, so only those go stale
+            self._best_node_cache = {
+                k: v for k, v in self._best_node_cache.items() if k[0]
+            }
 
     @property
     def draft_nodes(self) -> list[Node]:
         """Return a list of nodes representing intial coding drafts"""
-        return [n for n in self.nodes if n.parent is None]
+        return self._get_category("draft")
 
     @property
     def buggy_nodes(self) -> list[Node]:
         """Return a list of nodes that are considered buggy by the agent."""
-        return [n for n in self.nodes if n.is_buggy]
+        return self._get_category("buggy")
 
     @property
     def good_nodes(self) -> list[Node]:
         """Return a list of nodes that are not considered buggy by the agent."""
-        list_of_nodes = [
-            [
-                n.step,
-                n.parent.step if n.parent else None,
-                n.id,
-                n.is_buggy,
-                n.is_buggy_plots,
-            ]
-            for n in self.nodes
-        ]
-        print(
-            f"[purple]all nodes ID and is_buggy/is_buggy_plots flags: {list_of_nodes}[/purple]"
-        )
-        return [
-            n for n in self.nodes if n.is_buggy is False and n.is_buggy_plots is False
-        ]
+        return self._get_category("good")
+
+    @property
+    def leaf_nodes(self) -> list[Node]:
+        """Return a list of nodes that are not the parent of any node in this journal."""
+        return self._get_category("leaf")
 
     def get_node_by_id(self, node_id: str) -> Optional[Node]:
         """Get a node by its ID."""
-        for node in self.nodes:
-            if node.id == node_id:
-                return node
-        return None
+        self._ensure_index()
+        pos = self._index.get(node_id)
+        return None if pos is None else self.nodes[pos]
 
     def get_metric_history(self) -> list[MetricValue]:
         """Return a list of all metric values in the journal."""
@@ -432,6 +630,40 @@ class Journal:
         if len(nodes) == 1:
             return nodes[0]
 
+        if cfg is None or cfg.agent.get("select_node", None) is None:
+            model = "gpt-4o"
+            temperature = 0.3
+        else:
+            model = cfg.agent.select_node.model
+            temperature = cfg.agent.select_node.temp
+
+        cache_key = (
+            only_good,
+            model,
+            temperature,
+            self._candidate_version,
+            frozenset((n.id, str(n.metric)) for n in nodes),
+        )
+        if cache_key in self._best_node_cache:
+            self.best_node_cache_hits += 1
+            selected_id = self._best_node_cache[cache_key]
+            logger.debug(f"Best-node cache hit: {selected_id}")
+            return next(n for n in nodes if n.id == selected_id)
+        self.best_node_cache_misses += 1
+
+        selected_node = self._select_best_node_with_llm(nodes, model, temperature)
+        if selected_node is not None:
+            self._best_node_cache[cache_key] = selected_node.id
+            return selected_node
+
+        logger.warning("Falling back to metric-based selection")
+        return max(nodes, key=lambda n: n.metric)
+
+    def _select_best_node_with_llm(
+        self, nodes: list[Node], model: str, temperature: float
+    ) -> None | Node:
+        """Ask the LLM to pick the best node among `nodes`.
+        Returns None if the selection process failed."""
         # Create evaluation prompt for LLM
         prompt = {
             "Introduction": (
@@ -467,18 +699,13 @@ class Journal:
                 prompt["Candidates"] += candidate_info
 
         try:
-            if cfg is None or cfg.agent.get("select_node", None) is None:
-                model = "gpt-4o"
-                temperature = 0.3
-            else:
-                model = cfg.agent.select_node.model
-                temperature = cfg.agent.select_node.temp
             selection = query(
                 system_message=prompt,
                 user_message=None,
                 func_spec=node_selection_spec,
                 model=model,
-                temperature=temperature
+                temperature=temperature,
+                cache=True,
             )
 
             # Find and return the selected node
@@ -498,25 +725,92 @@ class Journal:
 
         except Exception as e:
             logger.error(f"Error in LLM selection process: {e}")
-            logger.warning("Falling back to metric-based selection")
-            return max(nodes, key=lambda n: n.metric)
+            return None
 
-    def generate_summary(self, include_code: bool = False, **model_kwargs) -> str:
-        """Generate a summary of the research progress using LLM, including both successes and failures."""
+    def best_node_cache_info(self) -> dict[str, int]:
+        """Return hit/miss counters of the best-node selection cache."""
+        return {
+            "hits": self.best_node_cache_hits,
+            "misses": self.best_node_cache_misses,
+            "size": len(self._best_node_cache),
+        }
+
+    def generate_summary(
+        self,
+        include_code: bool = False,
+        incremental: bool = True,
+        token_budget: int = 2000,
+        **model_kwargs,
+    ) -> str:
+        """
+        Generate a summary of the research progress using LLM, including both successes and failures.
+        With incremental=True, only the nodes added (or that changed from buggy to good) since the
+        last call are folded into the previous summary, which is kept to about token_budget tokens,
+        and the result is cached, so repeated calls without new nodes cost no LLM call.
+        """
         if not self.nodes:
             return "No experiments conducted yet."
 
+        model = model_kwargs.get("model", "gpt-4o")
+        temperature = model_kwargs.get("temp", 0.3)
+        if not incremental:
+            return self._query_summary(
+                self.good_nodes, self.buggy_nodes, include_code, model, temperature
+            )
+
+        state = self._summaries.setdefault(
+            (include_code, model, temperature), {"text": None, "seen": {}}
+        )
+        new_good = [n for n in self.good_nodes if state["seen"].get(n.id) is not False]
+        new_buggy = [n for n in self.buggy_nodes if n.id not in state["seen"]]
+        if state["text"] is not None and not new_good and not new_buggy:
+            return state["text"]
+
+        logger.info(
+            f"Folding {len(new_good)} good and {len(new_buggy)} buggy node(s) into the progress summary"
+        )
+        state["text"] = self._query_summary(
+            new_good,
+            new_buggy,
+            include_code,
+            model,
+            temperature,
+            previous_summary=state["text"],
+            token_budget=token_budget,
+        )
+        for node in new_good:
+            state["seen"][node.id] = False
+        for node in new_buggy:
+            state["seen"][node.id] = True
+        return state["text"]
+
+    def _query_summary(
+        self,
+        good_nodes: list[Node],
+        buggy_nodes: list[Node],
+        include_code: bool,
+        model: str,
+        temperature: float,
+        previous_summary: str | None = None,
+        token_budget: int | None = None,
+    ) -> str:
         prompt = {
             "Introduction": (
                 "You are an AI researcher summarizing experimental progress. "
                 "Please analyze both successful and failed experiments to provide insights "
                 "for future improvements."
             ),
-            "Successful Experiments": "",
-            "Failed Experiments": "",
         }
+        if previous_summary is not None:
+            prompt["Introduction"] += (
+                " A summary of the earlier experiments is given below; update it with the "
+                "new experiments rather than starting over."
+            )
+            prompt["Summary of Earlier Experiments"] = previous_summary
+        prompt["Successful Experiments"] = ""
+        prompt["Failed Experiments"] = ""
 
-        for node in self.good_nodes:
+        for node in good_nodes:
             exp_info = f"Design: {node.plan}\n  "
             exp_info += f"Results: {node.analysis}\n"
             exp_info += f"Metric: {str(node.metric)}\n"
@@ -524,7 +818,7 @@ class Journal:
                 exp_info += f"Code: {node.code}\n"
             prompt["Successful Experiments"] += exp_info
 
-        for node in self.buggy_nodes:
+        for node in buggy_nodes:
             failure_info = f"Design: {node.plan}\n  "
             failure_info += f"Error Analysis: {node.analysis}\n"
             failure_info += f"Error Type: {node.exc_type if hasattr(node, 'exc_type') else 'Unknown'}\n"
@@ -533,19 +827,27 @@ class Journal:
                 failure_info += f"Code: {node.code}\n"
             prompt["Failed Experiments"] += failure_info
 
-        summary = query(
-            system_message=prompt,
-            user_message=(
-                "Please provide a comprehensive summary of the experimental progress that includes:\n"
-                "1. Key patterns of success across working experiments\n"
-                "2. Common failure patterns and pitfalls to avoid\n"
-                "3. Specific recommendations for future experiments based on both successes and failures"
-            ),
-            model=model_kwargs.get("model", "gpt-4o"),
-            temperature=model_kwargs.get("temp", 0.3)
+        user_message = (
+            "Please provide a comprehensive summary of the experimental progress that includes:\n"
+            "1. Key patterns of success across working experiments\n"
+            "2. Common failure patterns and pitfalls to avoid\n"
+            "3. Specific recommendations for future experiments based on both successes and failures"
         )
+        if token_budget is not None:
+            # the summary is carried over to the next update, keep it from growing every step
+            user_message += (
+                f"\nKeep the summary under {int(token_budget * 0.75)} words, condensing "
+                "older findings where necessary."
+            )
 
-        return summary
+        return query(
+            system_message=prompt,
+            user_message=user_message,
+            model=model,
+            temperature=temperature,
+            max_tokens=token_budget,
+            cache=True,
+        )
 
     def generate_summary_old(self, include_code: bool = False) -> str:
         summary = []
@@ -567,36 +869,37 @@ class Journal:
         notes_dir = os.path.join(workspace_dir, "experiment_notes")
         os.makedirs(notes_dir, exist_ok=True)
 
-        # Get all node summaries once
+        # Node summaries were generated once, when each node was evaluated
         node_summaries = []
         for node in self.nodes:
-            if hasattr(node, "_agent"):
-                summary = node._agent._generate_node_summary(node)
-                node_summaries.append(
-                    {
-                        "node_id": node.id,
-                        "metric": str(node.metric) if node.metric else "Failed",
-                        "summary": summary,
-                    }
-                )
-                # Save individual node summary
-                with open(
-                    os.path.join(
-                        notes_dir, f"{stage_name}_node_{node.id}_summary.json"
-                    ),
-                    "w",
-                ) as f:
-                    json.dump(summary, f, indent=2)
+            if node.summary is None:
+                continue
+            node_summaries.append(
+                {
+                    "node_id": node.id,
+                    "metric": str(node.metric) if node.metric else "Failed",
+                    "summary": node.summary,
+                }
+            )
+            # Save individual node summary
+            with open(
+                os.path.join(
+                    notes_dir, f"{stage_name}_node_{node.id}_summary.json"
+                ),
+                "w",
+            ) as f:
+                json.dump(node.summary, f, indent=2)
 
+        best_node = self.get_best_node(cfg=cfg)
         summary_prompt = {
             "Introduction": "Synthesize the experimental findings from this stage",
             "Node Summaries": node_summaries,
             "Best Node": (
                 {
-                    "id": self.get_best_node().id,
-                    "metric": str(self.get_best_node(cfg=cfg).metric),
+                    "id": best_node.id,
+                    "metric": str(best_node.metric),
                 }
-                if self.get_best_node(cfg=cfg)
+                if best_node
                 else None
             ),
         }
@@ -610,3 +913,73 @@ class Journal:
 
         with open(os.path.join(notes_dir, f"{stage_name}_summary.txt"), "w") as f:
             f.write(stage_summary)
+
+
+if __name__ == "__main__":
+    # Benchmark: indexed lookups vs. the linear scans they replace, on large journals
+    import argparse
+    import random
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--lookups", type=int, default=1000)
+    args = parser.parse_args()
+
+    def timeit(fn, repeats: int) -> float:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            fn()
+        return (time.perf_counter() - start) / repeats * 1e6  # us per call
+
+    for size in args.sizes:
+        journal = Journal()
+        start = time.perf_counter()
+        for i in range(size):
+            parent = random.choice(journal.nodes) if journal.nodes else None
+            if i % 20 == 0:
+                parent = None  # a new draft
+            node = Node(plan=f"node {i}", parent=parent)
+            node.is_buggy = random.random() < 0.4
+            node.is_buggy_plots = False
+            journal.append(node)
+        build_time = time.perf_counter() - start
+        ids = [n.id for n in journal.nodes]
+
+        indexed = {
+            "get_node_by_id": timeit(
+                lambda: journal.get_node_by_id(random.choice(ids)), args.lookups
+            ),
+            "draft_nodes": timeit(lambda: journal.draft_nodes, 100),
+            "buggy_nodes": timeit(lambda: journal.buggy_nodes, 100),
+            "good_nodes": timeit(lambda: journal.good_nodes, 100),
+            "flip is_buggy": timeit(
+                lambda: setattr(
+                    random.choice(journal.nodes), "is_buggy", random.random() < 0.4
+                ),
+                args.lookups,
+            ),
+        }
+        scan = {
+            "get_node_by_id": timeit(
+                lambda: (
+                    lambda node_id: next(n for n in journal.nodes if n.id == node_id)
+                )(random.choice(ids)),
+                max(args.lookups // 100, 1),
+            ),
+            "draft_nodes": timeit(
+                lambda: [n for n in journal.nodes if n.parent is None], 100
+            ),
+            "buggy_nodes": timeit(lambda: [n for n in journal.nodes if n.is_buggy], 100),
+            "good_nodes": timeit(
+                lambda: [
+                    n
+                    for n in journal.nodes
+                    if n.is_buggy is False and n.is_buggy_plots is False
+                ],
+                100,
+            ),
+        }
+        print(f"{size} nodes (built in {build_time:.2f}s):")
+        for name, us in indexed.items():
+            baseline = f", scan {scan[name]:.1f}us" if name in scan else ""
+            print(f"  {name:>15}: indexed {us:.1f}us{baseline}")
@@ -7,7 +7,7 @@ def journal2report(journal: Journal, task_desc: dict, rcfg: StageConfig):
     """
     Generate a report from a journal, the report will be in markdown format.
     """
-    report_input = journal.generate_summary(include_code=True)
+    report_input = journal.generate_summary(include_code=True, incremental=False)
     system_prompt_dict = {
         "Role": "You are a research assistant that always uses concise language.",
         "Goal": "The goal is to write a technical report summarising the empirical findings and technical decisions.",
@@ -7,7 +7,7 @@ from .journal import Node, Journal
 parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
 sys.path.insert(0, parent_dir)
 from ai_scientist.llm import get_response_from_llm, extract_json_between_markers
-from ai_scientist.treesearch.backend import get_ai_client
+from ai_scientist.treesearch.backend import get_ai_client, query_many
 
 
 report_summarizer_sys_msg = """You are an expert machine learning researcher.
@@ -260,40 +260,77 @@ Ensure the JSON is valid and properly formatted, as it will be automatically par
 
 
 def annotate_history(journal, cfg=None):
+    """
+    Set node.overall_plan for every node. A node's overall plan builds on its parent's, so
+    nodes are annotated level by level, with all nodes of a level queried concurrently.
+    """
+    if cfg.agent.get("summary", None) is not None:
+        model = cfg.agent.summary.model
+    else:
+        model = "gpt-4o-2024-08-06"
+
+    pending = []
     for node in journal.nodes:
         if node.parent:
-            max_retries = 3
-            retry_count = 0
-            while retry_count < max_retries:
-                try:
-                    if cfg.agent.get("summary", None) is not None:
-                        model = cfg.agent.summary.model
-                    else:
-                        model = "gpt-4o-2024-08-06"
-                    client = get_ai_client(model)
-                    response = get_response_from_llm(
-                        overall_plan_summarizer_prompt.format(
-                            prev_overall_plan=node.parent.overall_plan,
-                            current_plan=node.plan,
-                        ),
-                        client,
-                        model,
-                        report_summarizer_sys_msg,
-                    )
-                    node.overall_plan = extract_json_between_markers(response[0])[
-                        "overall_plan"
-                    ]
-                    break
-                except Exception as e:
-                    retry_count += 1
-                    if retry_count == max_retries:
-                        print(f"Failed after {max_retries} attempts. Error: {e}")
-                        raise
-                    print(
-                        f"Error occurred: {e}. Retrying... ({max_retries - retry_count} attempts left)"
-                    )
+            pending.append(node)
         else:
             node.overall_plan = node.plan
+    annotated = {node.id for node in journal.nodes if not node.parent}
+
+    while pending:
+        # parents outside this journal (e.g. the best node of the previous stage) are final
+        level = [
+            node
+            for node in pending
+            if node.parent.id in annotated
+            or journal.get_node_by_id(node.parent.id) is None
+        ]
+        if not level:
+            raise ValueError("Cycle in the journal's node tree")
+        annotate_nodes(level, model)
+        annotated.update(node.id for node in level)
+        level_ids = {node.id for node in level}
+        pending = [node for node in pending if node.id not in level_ids]
+
+
+def annotate_nodes(nodes, model, max_retries=3):
+    """Summarize the overall plans of nodes (whose parents are annotated) concurrently"""
+    for retry_count in range(max_retries):
+        responses = query_many(
+            [
+                dict(
+                    system_message=report_summarizer_sys_msg,
+                    user_message=overall_plan_summarizer_prompt.format(
+                        prev_overall_plan=node.parent.overall_plan,
+                        current_plan=node.plan,
+                    ),
+                    model=model,
+                    temperature=0.7,
+                )
+                for node in nodes
+            ],
+            return_exceptions=True,
+        )
+        failed = []
+        for node, response in zip(nodes, responses):
+            try:
+                if isinstance(response, Exception):
+                    raise response
+                node.overall_plan = extract_json_between_markers(response)[
+                    "overall_plan"
+                ]
+            except Exception as e:
+                failed.append((node, e))
+        if not failed:
+            return
+        nodes = [node for node, _ in failed]
+        error = failed[0][1]
+        if retry_count == max_retries - 1:
+            print(f"Failed after {max_retries} attempts. Error: {error}")
+            raise error
+        print(
+            f"Error occurred for {len(nodes)} node(s): {error}. Retrying... ({max_retries - retry_count - 1} attempts left)"
+        )
 
 
 def overall_summarize(journals, cfg=None):
@@ -362,6 +399,8 @@ def overall_summarize(journals, cfg=None):
 
 
 if __name__ == "__main__":
+    from .utils.serialize import load_journal_log
+
     # Test
     example_path = "logs/247-run"
 
@@ -410,14 +449,19 @@ if __name__ == "__main__":
     for index, folder in enumerate(stage_folders, start=1):
         print(f"Stage {index}: {folder}")
         stage_name = os.path.basename(folder)
+        journal_log_path = os.path.join(folder, "journal.jsonl")
         journal_path = os.path.join(folder, "journal.json")
-        if os.path.exists(journal_path):
-            with open(journal_path, "r") as file:
-                journal_data = json.load(file)
-                print(f"Loaded journal.json for Stage {index}")
+        if os.path.exists(journal_log_path):
+            journal = load_journal_log(journal_log_path)
+            print(f"Loaded journal.jsonl for Stage {index}")
         else:
-            print(f"No journal.json found for Stage {index}")
-        journal = reconstruct_journal(journal_data)
+            if os.path.exists(journal_path):
+                with open(journal_path, "r") as file:
+                    journal_data = json.load(file)
+                    print(f"Loaded journal.json for Stage {index}")
+            else:
+                print(f"No journal.json found for Stage {index}")
+            journal = reconstruct_journal(journal_data)
         journals.append((stage_name, journal))
 
     # Convert manager journals to list of (stage_name, journal) tuples
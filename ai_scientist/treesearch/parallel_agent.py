@@ -1,18 +1,33 @@
-from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from contextlib import nullcontext
+from functools import partial
 from typing import List, Optional, Set, Any, Callable, cast, Dict, Tuple
+import math
 import random
 import subprocess
 import os
+import re
 from queue import Queue
 import logging
 import humanize
-from .backend import FunctionSpec, compile_prompt_to_md, query
+from .backend import (
+    FunctionSpec,
+    client_registry,
+    compile_prompt_to_md,
+    prompt_stats,
+    query,
+    set_prompt_budgets,
+)
+from .early_stop import OutputMonitor
+from .exec_budget import ExecBudgetManager
+from .gpu_lease import GPULeasePool, get_fake_gpus
 from .interpreter import ExecutionResult
 from .journal import Journal, Node
 from .utils import data_preview
 from .utils.config import Config
 from .utils.metric import MetricValue, WorstMetricValue
 from .utils.response import extract_code, extract_text_up_to_code, wrap_code
+from ai_scientist.utils.token_tracker import token_tracker
 import copy
 import pickle
 from dataclasses import asdict
@@ -22,6 +37,8 @@ from rich import print
 from pathlib import Path
 import base64
 import sys
+import threading
+import time
 
 logger = logging.getLogger("ai-scientist")
 
@@ -78,6 +95,33 @@ def _parse_keyword_prefix_response(
         return None, None
 
 
+EPOCH_MARKER = re.compile(r"\bepoch\b", re.IGNORECASE)
+VAL_LOSS_MARKER = re.compile(
+    r"val(?:idation)?[ _]loss[\s:=]*([-+]?(?:\d+\.?\d*|\.\d+)(?:e[-+]?\d+)?|[-+]?nan|[-+]?inf)",
+    re.IGNORECASE,
+)
+
+
+def score_probe(exec_result: ExecutionResult) -> Tuple[int, int, float]:
+    """How promising a candidate draft looks after its probe run (higher is better):
+    finished without error > still running > crashed or diverged, then the training
+    progress (output lines mentioning an epoch) and the last validation loss printed."""
+    output = "".join(exec_result.term_out)
+    if exec_result.exc_type is None:
+        status = 2
+    elif exec_result.exc_type == "TimeoutError":
+        status = 1
+    else:
+        status = 0
+    losses = [float(v) for v in VAL_LOSS_MARKER.findall(output)]
+    last_loss = losses[-1] if losses else math.inf
+    if not math.isfinite(last_loss) and losses:
+        status = 0  # diverged
+        last_loss = math.inf
+    progress = sum(1 for line in output.splitlines() if EPOCH_MARKER.search(line))
+    return status, progress, -last_loss
+
+
 review_func_spec = FunctionSpec(
     name="submit_review",
     json_schema={
@@ -132,6 +176,29 @@ vlm_feedback_spec = FunctionSpec(
     description="Analyze experimental plots and provide detailed feedback on the results.",
 )
 
+node_summary_spec = FunctionSpec(
+    name="summarize_experiment",
+    json_schema={
+        "type": "object",
+        "properties": {
+            "findings": {
+                "type": "string",
+                "description": "Key findings and results",
+            },
+            "significance": {
+                "type": "string",
+                "description": "Why these results matter",
+            },
+            "next_steps": {
+                "type": "string",
+                "description": "Suggested improvements or next experiments",
+            },
+        },
+        "required": ["findings", "significance"],
+    },
+    description="Summarize experimental findings",
+)
+
 metric_parse_spec = FunctionSpec(
     name="parse_metrics",
     json_schema={
@@ -262,10 +329,13 @@ class MinimalAgent:
         evaluation_metrics=None,
         stage=None,
         stage_name=None,
+        exec_timeout=None,
     ):
         self.task_desc = task_desc
         self.memory_summary = memory_summary
         self.cfg = cfg
+        # time limit of the node's run (see ExecBudgetManager)
+        self.exec_timeout = exec_timeout or cfg.exec.timeout
         self.evaluation_metrics = evaluation_metrics
         self.stage_name = stage_name
         self.data_preview = None
@@ -286,7 +356,8 @@ class MinimalAgent:
             "timm",
             "albumentations",
         ]
-        random.shuffle(pkgs)
+        # same order for every call of a stage, so the prompt prefix stays cacheable
+        random.Random(self.stage_name).shuffle(pkgs)
         pkg_str = ", ".join([f"`{p}`" for p in pkgs])
 
         env_prompt = {
@@ -342,7 +413,7 @@ class MinimalAgent:
                 "The code should be a single-file python program that is self-contained and can be executed as-is.",
                 "No parts of the code should be skipped, don't terminate the code execution before finishing the script.",
                 "Your response should only contain a single code block.",
-                f"Be aware of the running time of the code, it should complete within {humanize.naturaldelta(self.cfg.exec.timeout)}.",
+                "Be aware of the running time of the code, it should complete within the time limit given below.",
                 'You can also use the "./working" directory to store any temporary files that your code needs to create.',
                 "Data saving requirements:",
                 "- Save all plottable data (metrics, losses, predictions, etc.) as numpy arrays using np.save()",
@@ -393,6 +464,28 @@ class MinimalAgent:
 
         return {"Implementation guideline": impl_guideline}
 
+    @property
+    def _prompt_stable_prefix(self):
+        """
+        Prompt sections shared by the draft, debug and improve prompts of a stage.
+        Sent as the cache_prefix of the query, ahead of the per-call sections.
+        """
+        return {
+            "Research idea": self.task_desc,
+            **self._prompt_impl_guideline,
+            **self._prompt_environment,
+        }
+
+    @property
+    def _prompt_time_limit(self):
+        # kept out of the stable prefix, the limit differs between nodes
+        return {
+            "Time limit": (
+                f"The code will be stopped if it runs longer than {humanize.naturaldelta(self.exec_timeout)}, "
+                "make sure it completes within that time."
+            )
+        }
+
     @property
     def _prompt_resp_fmt(self):
         return {
@@ -459,11 +552,11 @@ class MinimalAgent:
                 "Focus on getting a simple but working implementation first, before any sophisticated improvements. "
                 "We will explore more advanced variations in later stages."
             ),
-            "Research idea": self.task_desc,
             "Memory": self.memory_summary if self.memory_summary else "",
             "Instructions": {},
         }
         prompt["Instructions"] |= self._prompt_resp_fmt
+        prompt["Instructions"] |= self._prompt_time_limit
         prompt["Instructions"] |= {
             "Experiment design sketch guideline": [
                 "This first experiment design should be relatively simple, without extensive hyper-parameter optimization.",
@@ -475,8 +568,6 @@ class MinimalAgent:
             ],
             "Evaluation Metric(s)": self.evaluation_metrics,
         }
-        prompt["Instructions"] |= self._prompt_impl_guideline
-        prompt["Instructions"] |= self._prompt_environment
 
         if self.cfg.agent.data_preview:
             prompt["Data Overview"] = self.data_preview
@@ -487,10 +578,47 @@ class MinimalAgent:
         print("[cyan]--------------------------------[/cyan]")
 
         print("MinimalAgent: Getting plan and code")
-        plan, code = self.plan_and_code_query(prompt)
+        plan, code = self.plan_and_code_query(
+            prompt, cache_prefix=self._prompt_stable_prefix
+        )
         print("MinimalAgent: Draft complete")
         return Node(plan=plan, code=code)
 
+    def _speculative_draft(
+        self, run_probe: Callable[[str], ExecutionResult], num_candidates: int
+    ) -> Tuple[Node, Optional[ExecutionResult]]:
+        """Draft up to num_candidates nodes, probe-run each and keep the most promising one.
+        Also returns the probe result if it is final (the draft finished or crashed within
+        its probe), otherwise the draft still has to be run in full. A probe cut off by its
+        time limit is never final, even if its losses diverged: its TimeoutError is the
+        probe's, not the draft's."""
+        best = None
+        probe_time = 0.0
+        seen_codes = set()
+        for i in range(num_candidates):
+            node = self._draft()
+            if node.code in seen_codes:
+                continue
+            seen_codes.add(node.code)
+            result = run_probe(node.code)
+            probe_time += result.exec_time
+            score = score_probe(result)
+            logger.info(
+                f"Candidate draft {i + 1}/{num_candidates}: exc_type={result.exc_type}, "
+                f"progress={score[1]}, val loss={-score[2]}"
+            )
+            if best is None or score > best[0]:
+                best = (score, node, result)
+            if score[0] == 2:
+                # a complete run won't be beaten by a probe of another candidate
+                break
+        score, node, result = best
+        if result.exc_type == "TimeoutError":
+            node.probe_exec_time = probe_time
+            return node, None
+        node.probe_exec_time = probe_time - result.exec_time
+        return node, result
+
     def _debug(self, parent_node: Node) -> Node:
         prompt: Any = {
             "Introduction": (
@@ -498,7 +626,6 @@ class MinimalAgent:
                 "Your response should be an implementation outline in natural language,"
                 " followed by a single markdown code block which implements the bugfix/solution."
             ),
-            "Research idea": self.task_desc,
             "Previous (buggy) implementation": wrap_code(parent_node.code),
             "Execution output": wrap_code(parent_node.term_out, lang=""),
             "Feedback based on generated plots": parent_node.vlm_feedback_summary,
@@ -506,18 +633,20 @@ class MinimalAgent:
             "Instructions": {},
         }
         prompt["Instructions"] |= self._prompt_debug_resp_fmt
+        prompt["Instructions"] |= self._prompt_time_limit
         prompt["Instructions"] |= {
             "Bugfix improvement sketch guideline": [
                 "You should write a brief natural language description (3-5 sentences) of how the issue in the previous implementation can be fixed.",
                 "Don't suggest to do EDA.",
             ],
         }
-        prompt["Instructions"] |= self._prompt_impl_guideline
 
         if self.cfg.agent.data_preview:
             prompt["Data Overview"] = self.data_preview
 
-        plan, code = self.plan_and_code_query(prompt)
+        plan, code = self.plan_and_code_query(
+            prompt, cache_prefix=self._prompt_stable_prefix
+        )
         return Node(plan=plan, code=code, parent=parent_node)
 
     def _improve(self, parent_node: Node) -> Node:
@@ -526,7 +655,6 @@ class MinimalAgent:
                 "You are an experienced AI researcher. You are provided with a previously developed "
                 "implementation. Your task is to improve it based on the current experimental stage."
             ),
-            "Research idea": self.task_desc,
             "Memory": self.memory_summary if self.memory_summary else "",
             "Feedback based on generated plots": parent_node.vlm_feedback_summary,
             "Feedback about execution time": parent_node.exec_time_feedback,
@@ -537,9 +665,11 @@ class MinimalAgent:
         }
 
         prompt["Instructions"] |= self._prompt_resp_fmt
-        prompt["Instructions"] |= self._prompt_impl_guideline
+        prompt["Instructions"] |= self._prompt_time_limit
 
-        plan, code = self.plan_and_code_query(prompt)
+        plan, code = self.plan_and_code_query(
+            prompt, cache_prefix=self._prompt_stable_prefix
+        )
         return Node(
             plan=plan,
             code=code,
@@ -593,6 +723,7 @@ class MinimalAgent:
                 "Make sure to use a filename 'experiment_data.npy' to save the data. Do not use any other filename.",
             ]
         }
+        prompt["Instructions"] |= self._prompt_time_limit
         prompt["Instructions"] |= self._prompt_hyperparam_tuning_resp_fmt
         plan, code = self.plan_and_code_query(prompt)
         return Node(
@@ -646,6 +777,7 @@ class MinimalAgent:
                 "Make sure to use a filename 'experiment_data.npy' to save the data. Do not use any other filename.",
             ]
         }
+        prompt["Instructions"] |= self._prompt_time_limit
         prompt["Instructions"] |= self._prompt_ablation_resp_fmt
         plan, code = self.plan_and_code_query(prompt)
         return Node(
@@ -655,8 +787,11 @@ class MinimalAgent:
             ablation_name=ablation_idea.name,
         )
 
-    def plan_and_code_query(self, prompt, retries=3) -> tuple[str, str]:
-        """Generate a natural language plan + code in the same LLM call and split them apart."""
+    def plan_and_code_query(
+        self, prompt, retries=3, cache_prefix=None
+    ) -> tuple[str, str]:
+        """Generate a natural language plan + code in the same LLM call and split them apart.
+        cache_prefix: static prompt sections sent ahead of `prompt` (see backend.query)."""
         completion_text = None
         for _ in range(retries):
             completion_text = query(
@@ -664,6 +799,7 @@ class MinimalAgent:
                 user_message=None,
                 model=self.cfg.agent.code.model,
                 temperature=self.cfg.agent.code.temp,
+                cache_prefix=cache_prefix,
             )
 
             code = extract_code(completion_text)
@@ -742,7 +878,7 @@ class MinimalAgent:
             "Always include a title for each plot, and be sure to use clear subtitles—such as 'Left: Ground Truth, Right: Generated Samples'—while also specifying the type of dataset being used.",
             "Make sure to use descriptive names for figures when saving e.g. always include the dataset name and the type of plot in the name",
             "When there are many similar figures to plot (e.g. generated samples at each epoch), make sure to plot only at a suitable interval of epochs so that you only plot at most 5 figures.",
-            "Use the following experiment code to infer the data to plot: " + node.code,
+            "Use the experiment code given below to infer the data to plot",
             "Example to extract data from experiment_data: experiment_data['dataset_name_1']['metrics']['train']",
         ]
         prompt_guideline += [
@@ -774,14 +910,20 @@ class MinimalAgent:
                     plt.close()
             """,
         ]
-        # add instruction for format
-        plotting_prompt = {
+        # add instruction for format (static, sent as the cacheable prompt prefix)
+        plotting_prefix = {
             "Instructions": {},
         }
-        plotting_prompt["Instructions"] |= self._prompt_resp_fmt
-        plotting_prompt["Instructions"] |= {
+        plotting_prefix["Instructions"] |= self._prompt_resp_fmt
+        plotting_prefix["Instructions"] |= {
             "Plotting code guideline": prompt_guideline,
         }
+        # node-specific part of the prompt
+        stage_guideline = []
+        plotting_prompt = {
+            "Experiment code": wrap_code(node.code),
+            "Stage-specific plotting guideline": stage_guideline,
+        }
 
         # For stage 3, initialize with stage 2's plotting code
         if (
@@ -789,7 +931,7 @@ class MinimalAgent:
             and self.stage_name.startswith("3_")
             and plot_code_from_prev_stage
         ):
-            prompt_guideline.extend(
+            stage_guideline.extend(
                 [
                     "IMPORTANT: Use the following base plotting code as a starting point:",
                     "Base plotting code: " + plot_code_from_prev_stage,
@@ -807,7 +949,7 @@ class MinimalAgent:
             and self.stage_name.startswith("4_")
             and plot_code_from_prev_stage
         ):
-            prompt_guideline.extend(
+            stage_guideline.extend(
                 [
                     "IMPORTANT: This is an ablation study. Use the following base plotting code as a starting point:",
                     "Base plotting code: \n" + plot_code_from_prev_stage,
@@ -820,8 +962,13 @@ class MinimalAgent:
                 ]
             )
 
+        if not stage_guideline:
+            del plotting_prompt["Stage-specific plotting guideline"]
+
         # Get plotting code from LLM
-        plan, code = self.plan_and_code_query(plotting_prompt)
+        plan, code = self.plan_and_code_query(
+            plotting_prompt, cache_prefix=plotting_prefix
+        )
 
         # Ensure the code starts with imports
         if not code.strip().startswith("import"):
@@ -1060,30 +1207,10 @@ class MinimalAgent:
             query(
                 system_message=summary_prompt,
                 user_message=None,
-                func_spec={
-                    "name": "summarize_experiment",
-                    "description": "Summarize experimental findings",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "findings": {
-                                "type": "string",
-                                "description": "Key findings and results",
-                            },
-                            "significance": {
-                                "type": "string",
-                                "description": "Why these results matter",
-                            },
-                            "next_steps": {
-                                "type": "string",
-                                "description": "Suggested improvements or next experiments",
-                            },
-                        },
-                        "required": ["findings", "significance"],
-                    },
-                },
+                func_spec=node_summary_spec,
                 model=self.cfg.agent.feedback.model,
                 temperature=self.cfg.agent.feedback.temp,
+                cache=True,
             ),
         )
 
@@ -1091,9 +1218,11 @@ class MinimalAgent:
 class GPUManager:
     """Manages GPU allocation across processes"""
 
-    def __init__(self, num_gpus: int):
+    def __init__(self, num_gpus: int, device_ids: Optional[List] = None):
         self.num_gpus = num_gpus
-        self.available_gpus: Set[int] = set(range(num_gpus))
+        # CUDA device ids handed out (see get_visible_gpus), by default 0..num_gpus-1
+        self.device_ids = list(device_ids) if device_ids is not None else list(range(num_gpus))
+        self.available_gpus: Set[int] = set(self.device_ids)
         self.gpu_assignments: Dict[str, int] = {}  # process_id -> gpu_id
 
     def acquire_gpu(self, process_id: str) -> int:
@@ -1117,26 +1246,286 @@ class GPUManager:
             del self.gpu_assignments[process_id]
 
 
-def get_gpu_count() -> int:
-    """Get number of available NVIDIA GPUs without using torch"""
+class WorkerUtilization:
+    """Tracks how busy the worker slots are, i.e. the fraction of
+    `num_workers * wall time` during which a submitted node was running."""
+
+    def __init__(self, num_workers: int):
+        self.num_workers = num_workers
+        self.start_time: Optional[float] = None
+        self.busy_time = 0.0
+        self._running: Dict[int, float] = {}  # id(future) -> submission time
+        self._lock = threading.Lock()
+
+    def track(self, future: Future):
+        now = time.time()
+        with self._lock:
+            if self.start_time is None:
+                self.start_time = now
+            self._running[id(future)] = now
+        future.add_done_callback(self._on_done)
+
+    def _on_done(self, future: Future):
+        with self._lock:
+            submitted = self._running.pop(id(future), None)
+            if submitted is not None:
+                self.busy_time += time.time() - submitted
+
+    def report(self) -> Dict[str, float]:
+        now = time.time()
+        with self._lock:
+            if self.start_time is None:
+                return {"utilization": 0.0, "busy_time": 0.0, "wall_time": 0.0}
+            busy = self.busy_time + sum(now - t for t in self._running.values())
+        wall = now - self.start_time
+        return {
+            "utilization": busy / (self.num_workers * wall) if wall > 0 else 0.0,
+            "busy_time": busy,
+            "wall_time": wall,
+        }
+
+
+def get_visible_gpus() -> list:
+    """
+    Device ids of the NVIDIA GPUs this process may use, without using torch.
+    CUDA_VISIBLE_DEVICES, if set (e.g. by a campaign scheduler), restricts them.
+    """
+    cuda_visible_devices = os.environ.get("CUDA_VISIBLE_DEVICES")
+    if cuda_visible_devices is not None:
+        devices = []
+        for d in cuda_visible_devices.split(","):
+            d = d.strip()
+            if not d or d == "-1":
+                # CUDA ignores everything after an invalid id
+                break
+            devices.append(int(d) if d.isdigit() else d)
+        return devices
+    fake_gpus = get_fake_gpus()
+    if fake_gpus is not None:
+        return list(range(fake_gpus[0]))
     try:
-        # First try using nvidia-smi
         nvidia_smi = subprocess.run(
             ["nvidia-smi", "--query-gpu=gpu_name", "--format=csv,noheader"],
             capture_output=True,
             text=True,
             check=True,
         )
-        gpus = nvidia_smi.stdout.strip().split("\n")
-        return len(gpus)
+        gpus = [g for g in nvidia_smi.stdout.strip().split("\n") if g]
+        return list(range(len(gpus)))
     except (subprocess.SubprocessError, FileNotFoundError):
-        # If nvidia-smi fails, try environment variable
-        cuda_visible_devices = os.environ.get("CUDA_VISIBLE_DEVICES")
-        if cuda_visible_devices:
-            # Filter out empty strings and -1 values
-            devices = [d for d in cuda_visible_devices.split(",") if d and d != "-1"]
-            return len(devices)
-        return 0
+        return []
+
+
+def get_gpu_count() -> int:
+    """Get number of available NVIDIA GPUs without using torch"""
+    return len(get_visible_gpus())
+
+
+def create_gpu_lease_pool(cfg: Config) -> Optional[GPULeasePool]:
+    """Lease pool of the visible GPUs (None on CPU-only machines)"""
+    visible_gpus = get_visible_gpus()
+    if not visible_gpus:
+        return None
+    lease_cfg = cfg.exec.get("gpu_lease", None)
+    return GPULeasePool(
+        visible_gpus,
+        fraction=lease_cfg.fraction if lease_cfg else 1.0,
+        min_free_mb=lease_cfg.min_free_mb if lease_cfg else 0,
+    )
+
+
+# modules every worker needs; imported once when the worker starts
+WORKER_PRELOAD = (
+    "numpy",
+    "openai",
+    "anthropic",
+    "ai_scientist.treesearch.parallel_agent",
+)
+
+
+def _warm_worker(workspace_dir: str, preload: Tuple[str, ...]):
+    """Initializer of the pool's worker processes"""
+    import importlib
+    import multiprocessing
+
+    for module in preload:
+        try:
+            importlib.import_module(module)
+        except ImportError as e:
+            logger.warning(f"Could not preload {module} in worker: {e}")
+    # same workspace layout as _process_node_wrapper uses
+    process_id = multiprocessing.current_process().name
+    os.makedirs(
+        os.path.join(workspace_dir, f"process_{process_id}", "working"), exist_ok=True
+    )
+
+
+def _worker_ready() -> int:
+    return os.getpid()
+
+
+def _timed_call(fn: Callable, *args, **kwargs) -> Tuple[float, Any]:
+    """Runs fn in a worker and reports when the worker picked the task up"""
+    return time.time(), fn(*args, **kwargs)
+
+
+def _terminate_workers(processes):
+    """Terminate worker processes together with their children (e.g. interpreter sessions
+    still running an experiment), which would otherwise outlive their worker"""
+    import psutil
+
+    for process in processes:
+        if not process.is_alive():
+            continue
+        try:
+            for child in psutil.Process(process.pid).children(recursive=True):
+                child.kill()
+        except psutil.NoSuchProcess:
+            pass
+        process.terminate()
+        process.join(timeout=1)
+
+
+class _PooledFuture(Future):
+    """Future of a WorkerPool task. It can only be cancelled while the task is still
+    queued; once a worker runs it, cancel() returns False (see WorkerPool.discard)."""
+
+    def __init__(self):
+        super().__init__()
+        self._inner: Optional[Future] = None
+
+    def cancel(self) -> bool:
+        if self._inner is not None and not self._inner.cancel():
+            if not self.running() and not self.done():
+                self.set_running_or_notify_cancel()
+            return False
+        return super().cancel()
+
+
+class WorkerPool:
+    """Long-lived pool of pre-warmed worker processes.
+    Owned by the AgentManager and leased to the ParallelAgent of each sub-stage,
+    so that sub-stages don't pay for spawning workers and re-importing modules."""
+
+    def __init__(
+        self,
+        num_workers: int,
+        workspace_dir: str,
+        preload: Tuple[str, ...] = WORKER_PRELOAD,
+    ):
+        self.num_workers = num_workers
+        self.workspace_dir = str(workspace_dir)
+        self.preload = tuple(preload)
+        self.num_tasks = 0
+        self.num_recycles = 0
+        self.total_dispatch_latency = 0.0
+        self.max_dispatch_latency = 0.0
+        self._lock = threading.Lock()
+        self._is_shutdown = False
+        self._start()
+
+    def _start(self):
+        start = time.time()
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            initializer=_warm_worker,
+            initargs=(self.workspace_dir, self.preload),
+        )
+        # start (and warm) the workers now instead of on the first node
+        pids = {
+            f.result()
+            for f in [
+                self.executor.submit(_worker_ready) for _ in range(self.num_workers)
+            ]
+        }
+        self.startup_time = time.time() - start
+        logger.info(
+            f"Started worker pool with {self.num_workers} workers ({len(pids)} warmed up) "
+            f"in {self.startup_time:.2f}s"
+        )
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Same as ProcessPoolExecutor.submit, but records the time between
+        submission and a worker starting the task (dispatch latency)."""
+        submitted = time.time()
+        outer = _PooledFuture()
+        inner = self.executor.submit(_timed_call, fn, *args, **kwargs)
+        outer._inner = inner
+
+        def _on_inner_done(f: Future):
+            if f.cancelled():
+                super(_PooledFuture, outer).cancel()
+                return
+            if not outer.running() and not outer.set_running_or_notify_cancel():
+                return  # cancelled while still queued
+            exc = f.exception()
+            if exc is not None:
+                outer.set_exception(exc)
+                return
+            started, result = f.result()
+            latency = max(started - submitted, 0.0)
+            with self._lock:
+                self.num_tasks += 1
+                self.total_dispatch_latency += latency
+                self.max_dispatch_latency = max(self.max_dispatch_latency, latency)
+            outer.set_result(result)
+
+        inner.add_done_callback(_on_inner_done)
+        return outer
+
+    def discard(self, futures: List[Future]) -> int:
+        """Drop tasks whose results are no longer wanted (e.g. at the end of a sub-stage).
+        Queued tasks are cancelled; tasks already running can't be, so the workers are
+        recycled (killed with their children and restarted) instead of letting the tasks
+        hold a worker and a GPU into the next sub-stage. Their futures then fail with
+        BrokenProcessPool. Returns the number of running tasks that were stopped."""
+        running = [f for f in futures if not f.done() and not f.cancel()]
+        if running:
+            logger.warning(
+                f"Recycling the worker pool to stop {len(running)} running task(s)"
+            )
+            processes = list((self.executor._processes or {}).values())
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            _terminate_workers(processes)
+            self.num_recycles += 1
+            self._start()
+        return len(running)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "num_workers": self.num_workers,
+                "startup_time": self.startup_time,
+                "num_tasks": self.num_tasks,
+                "mean_dispatch_latency": (
+                    self.total_dispatch_latency / self.num_tasks
+                    if self.num_tasks
+                    else 0.0
+                ),
+                "max_dispatch_latency": self.max_dispatch_latency,
+            }
+
+    def log_stats(self):
+        stats = self.stats()
+        logger.info(
+            f"Worker pool: {stats['num_tasks']} tasks, dispatch latency "
+            f"mean {stats['mean_dispatch_latency'] * 1000:.1f}ms / "
+            f"max {stats['max_dispatch_latency'] * 1000:.1f}ms "
+            f"(startup {stats['startup_time']:.2f}s, recycled {self.num_recycles} times)"
+        )
+
+    def shutdown(self):
+        """Shutdown the pool and its worker processes"""
+        if self._is_shutdown:
+            return
+        try:
+            self.log_stats()
+            processes = list((self.executor._processes or {}).values())
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            # Force terminate all worker processes
+            _terminate_workers(processes)
+        finally:
+            self._is_shutdown = True
 
 
 class ParallelAgent:
@@ -1149,6 +1538,9 @@ class ParallelAgent:
         best_stage3_node=None,
         best_stage2_node=None,
         best_stage1_node=None,
+        worker_pool: Optional[WorkerPool] = None,
+        exec_budget: Optional[ExecBudgetManager] = None,
+        gpu_leases: Optional[GPULeasePool] = None,
     ):
         super().__init__()
         self.task_desc = task_desc
@@ -1166,21 +1558,34 @@ class ParallelAgent:
         )
         self.data_preview = None
         self.num_workers = cfg.agent.num_workers
-        self.num_gpus = get_gpu_count()
+        visible_gpus = get_visible_gpus()
+        self.num_gpus = len(visible_gpus)
         print(f"num_gpus: {self.num_gpus}")
         if self.num_gpus == 0:
             print("No GPUs detected, falling back to CPU-only mode")
         else:
             print(f"Detected {self.num_gpus} GPUs")
 
-        self.gpu_manager = GPUManager(self.num_gpus) if self.num_gpus > 0 else None
-
-        if self.num_gpus > 0:
-            self.num_workers = min(self.num_workers, self.num_gpus)
-            logger.info(f"Limiting workers to {self.num_workers} to match GPU count")
+        # only code execution holds a GPU, so there can be more workers than GPUs.
+        # A lease pool passed in is shared with the worker pool's other sub-stages
+        # and owned (and shut down) by the caller
+        self._owns_gpu_leases = gpu_leases is None
+        self.gpu_leases = (
+            gpu_leases if gpu_leases is not None else create_gpu_lease_pool(cfg)
+        )
 
         self.timeout = self.cfg.exec.timeout
-        self.executor = ProcessPoolExecutor(max_workers=self.num_workers)
+        # per-node execution time limits, shared by the sub-stages (owned by the caller)
+        self.exec_budget = exec_budget
+        if exec_budget is not None:
+            exec_budget.start_stage(stage_name)
+        # a leased pool is owned (and shut down) by the caller
+        self._owns_executor = worker_pool is None
+        if worker_pool is not None:
+            self.num_workers = min(self.num_workers, worker_pool.num_workers)
+            self.executor = worker_pool
+        else:
+            self.executor = ProcessPoolExecutor(max_workers=self.num_workers)
         self._is_shutdown = False
         # Define the metric once at initialization
         self.evaluation_metrics = self._define_global_metrics()
@@ -1190,6 +1595,13 @@ class ParallelAgent:
         self._hyperparam_tuning_state = {  # store hyperparam tuning ideas
             "tried_hyperparams": set(),
         }
+        # "lockstep": each step waits for all workers before selecting new nodes
+        # "continuous": a worker slot is refilled as soon as its node lands in the journal
+        self.scheduler = cfg.agent.get("scheduler", "lockstep")
+        self._pending: Dict[Future, Dict[str, Any]] = {}  # in-flight nodes (continuous)
+        # nodes given up on after a timeout, whose tasks may still be running
+        self._abandoned: List[Future] = []
+        self.utilization = WorkerUtilization(self.num_workers)
 
     def _define_global_metrics(self) -> str:
         """Define eval metric to be used across all experiments"""
@@ -1258,28 +1670,44 @@ class ParallelAgent:
             is_seed_agg_node=True,
         )
 
+    def _get_seed_nodes(self, node: Node) -> Dict[int, Node]:
+        """Seed evaluation nodes of `node` already in the journal, by seed"""
+        seed_nodes = {}
+        for child in self.journal.nodes:
+            if (
+                child.is_seed_node
+                and not child.is_seed_agg_node
+                and child.parent is not None
+                and child.parent.id == node.id
+            ):
+                match = re.search(r"^seed = (\d+)$", child.code, re.MULTILINE)
+                if match:
+                    seed_nodes[int(match.group(1))] = child
+        return seed_nodes
+
     def _run_multi_seed_evaluation(self, node: Node) -> List[Node]:
         """Run multiple seeds of the same node to get statistical metrics.
         Returns a list of nodes with different random seeds."""
 
+        # Free up the worker slots still running nodes of this stage
+        self._drain_pending()
+
         # Convert node to dict for parallel processing
         node_data = node.to_dict()
         node_code = node.code
 
+        # Seeds already evaluated (e.g. before a resumed run stopped) are not run again
+        seed_nodes = self._get_seed_nodes(node)
+        done_seeds = set(seed_nodes)
+        seed_nodes = list(seed_nodes.values())
+        if done_seeds:
+            logger.info(f"Reusing results of seed(s) {sorted(done_seeds)} for node {node.id}")
+
         # Submit parallel jobs for different seeds
-        seed_nodes = []
         futures = []
         for seed in range(self.cfg.agent.multi_seed_eval.num_seeds):
-            gpu_id = None
-            if self.gpu_manager is not None:
-                try:
-                    process_id = f"seed_{seed}_worker"
-                    gpu_id = self.gpu_manager.acquire_gpu(process_id)
-                    logger.info(f"Assigned GPU {gpu_id} to seed {seed}")
-                except RuntimeError as e:
-                    logger.warning(
-                        f"Could not acquire GPU for seed {seed}: {e}. Running on CPU"
-                    )
+            if seed in done_seeds:
+                continue
 
             # Add seed to node code
             node_data["code"] = (
@@ -1301,7 +1729,7 @@ class ParallelAgent:
                     node_data,
                     self.task_desc,
                     self.cfg,
-                    gpu_id,
+                    self.gpu_leases,
                     memory_summary,
                     self.evaluation_metrics,
                     self.stage_name,
@@ -1311,6 +1739,7 @@ class ParallelAgent:
                     best_stage2_plot_code,
                     best_stage3_plot_code,
                     seed_eval,
+                    exec_timeout=self._exec_timeout(node),
                 )
             )
 
@@ -1322,10 +1751,16 @@ class ParallelAgent:
                 print(f"Sanity check: actual parent node id: {node.id}")
                 # Add node to journal's list and assign its step number
                 self.journal.append(result_node)
+                if self.exec_budget is not None:
+                    self.exec_budget.record(
+                        self.stage_name, result_node, result_node.exec_timeout
+                    )
                 seed_nodes.append(self.journal.get_node_by_id(result_node.id))
                 print("Added result node to journal")
             except Exception as e:
                 logger.error(f"Error in multi-seed evaluation: {str(e)}")
+                if not future.done():
+                    self._abandoned.append(future)
 
         return seed_nodes
 
@@ -1352,6 +1787,8 @@ class ParallelAgent:
                     format_tb_ipython=self.cfg.exec.format_tb_ipython,
                     agent_file_name=self.cfg.exec.agent_file_name,
                     env_vars={"AI_SCIENTIST_ROOT": os.getenv("AI_SCIENTIST_ROOT")},
+                    use_zygote=self.cfg.exec.use_zygote,
+                    zygote_preload=self.cfg.exec.zygote_preload,
                 )
 
                 try:
@@ -1411,7 +1848,7 @@ class ParallelAgent:
         node_data,
         task_desc,
         cfg,
-        gpu_id: int = None,
+        gpu_leases: Optional[GPULeasePool] = None,
         memory_summary: str = None,
         evaluation_metrics=None,
         stage_name=None,
@@ -1421,15 +1858,19 @@ class ParallelAgent:
         best_stage2_plot_code=None,
         best_stage1_plot_code=None,
         seed_eval=False,
+        exec_timeout: Optional[int] = None,
     ):
         """Wrapper function that creates a fresh environment for each process"""
         from .interpreter import Interpreter
+        from .exec_cache import ARTIFACT_PATTERNS, ExecutionCache
         from .journal import Node, Journal
         from copy import deepcopy
         import os
         import multiprocessing
 
         print("Starting _process_node_wrapper")
+        token_tracker.set_stage(stage_name)
+        set_prompt_budgets(cfg.agent.get("prompt_budgets", None))
 
         # Create process-specific workspace
         process_id = multiprocessing.current_process().name
@@ -1440,12 +1881,9 @@ class ParallelAgent:
         working_dir = os.path.join(workspace, "working")
         os.makedirs(working_dir, exist_ok=True)
 
-        if gpu_id is not None:
-            os.environ["CUDA_VISIBLE_DEVICES"] = str(gpu_id)
-            logger.info(f"Process {process_id} assigned to GPU {gpu_id}")
-        else:
-            os.environ["CUDA_VISIBLE_DEVICES"] = ""
-            logger.info(f"Process {process_id} running on CPU")
+        # LLM stages and metric/plot scripts run on the CPU, only the
+        # experiment itself leases a GPU (see GPULeasePool)
+        os.environ["CUDA_VISIBLE_DEVICES"] = ""
 
         # Create minimal agent for worker process with the global metric definition
         worker_agent = MinimalAgent(
@@ -1454,16 +1892,78 @@ class ParallelAgent:
             memory_summary=memory_summary,
             evaluation_metrics=evaluation_metrics,
             stage_name=stage_name,
+            exec_timeout=exec_timeout,
+        )
+
+        early_stop_cfg = cfg.exec.get("early_stop", None)
+        early_stop = (
+            partial(OutputMonitor.from_config, early_stop_cfg)
+            if early_stop_cfg is not None
+            else None
         )
 
         # Create interpreter instance for worker process
         print("Creating Interpreter")
         process_interpreter = Interpreter(
             working_dir=workspace,
-            timeout=cfg.exec.timeout,
+            timeout=exec_timeout or cfg.exec.timeout,
             format_tb_ipython=cfg.exec.format_tb_ipython,
             agent_file_name=cfg.exec.agent_file_name,
+            use_zygote=cfg.exec.use_zygote,
+            zygote_preload=cfg.exec.zygote_preload,
+            early_stop=early_stop,
         )
+        if cfg.exec.reuse_followup_session:
+            # metric parsing and plotting of this node share one session,
+            # separate from the experiment's process
+            followup_interpreter = Interpreter(
+                working_dir=workspace,
+                timeout=cfg.exec.timeout,
+                format_tb_ipython=cfg.exec.format_tb_ipython,
+                agent_file_name=cfg.exec.agent_file_name,
+                use_zygote=cfg.exec.use_zygote,
+                zygote_preload=cfg.exec.zygote_preload,
+            )
+        else:
+            followup_interpreter = None
+        speculative = cfg.agent.search.get("speculative", None)
+        if speculative is not None and speculative.num_candidates > 1:
+            # candidate drafts run only up to their probe time limit
+            probe_interpreter = Interpreter(
+                working_dir=workspace,
+                timeout=speculative.probe_timeout,
+                format_tb_ipython=cfg.exec.format_tb_ipython,
+                agent_file_name=cfg.exec.agent_file_name,
+                use_zygote=cfg.exec.use_zygote,
+                zygote_preload=cfg.exec.zygote_preload,
+                early_stop=early_stop,
+            )
+        else:
+            speculative = None
+
+        def clear_artifacts():
+            for pattern in ARTIFACT_PATTERNS:
+                for path in Path(working_dir).glob(pattern):
+                    path.unlink()
+
+        last_probed_code = None
+
+        def run_probe(code: str) -> ExecutionResult:
+            """Run a candidate draft for at most speculative.probe_timeout seconds"""
+            nonlocal last_probed_code
+            last_probed_code = code
+            clear_artifacts()
+            with gpu_leases.lease() if gpu_leases is not None else nullcontext():
+                result = probe_interpreter.run(code, True)
+                probe_interpreter.cleanup_session()
+            return result
+
+        def run_followup(code: str) -> ExecutionResult:
+            if followup_interpreter is None:
+                result = process_interpreter.run(code, True)
+                process_interpreter.cleanup_session()
+                return result
+            return followup_interpreter.run(code, reset_session=False, fresh_scope=True)
 
         try:
             print(f"stage_name: {stage_name}")
@@ -1477,6 +1977,7 @@ class ParallelAgent:
 
             # Process the node using worker agent
             print("Starting node processing")
+            exec_result = None  # set if a probe run already gave the final result
             if seed_eval:
                 # Use the parent node's code to run the same code again
                 child_node = worker_agent._generate_seed_node(parent_node)
@@ -1484,7 +1985,18 @@ class ParallelAgent:
                 # Plot code should also be the same as the parent node
                 child_node.plot_code = parent_node.plot_code
             else:
-                if parent_node is None:
+                if parent_node is None and speculative is not None:
+                    print(
+                        f"Drafting {speculative.num_candidates} speculative candidates"
+                    )
+                    child_node, exec_result = worker_agent._speculative_draft(
+                        run_probe, speculative.num_candidates
+                    )
+                    if exec_result is None or child_node.code != last_probed_code:
+                        # the working dir holds the files of the last candidate probed,
+                        # which are not the winner's
+                        clear_artifacts()
+                elif parent_node is None:
                     print("Drafting new node")
                     child_node = worker_agent._draft()
                 elif parent_node.is_buggy:
@@ -1523,8 +2035,25 @@ class ParallelAgent:
 
             # Execute and parse results
             print("Running code")
-            exec_result = process_interpreter.run(child_node.code, True)
-            process_interpreter.cleanup_session()
+            if exec_result is not None:
+                print("Using the result of the draft's probe run")
+                child_node.exec_timeout = probe_interpreter.timeout
+            else:
+                child_node.exec_timeout = process_interpreter.timeout
+                with gpu_leases.lease() if gpu_leases is not None else nullcontext():
+                    if cfg.exec.get("cache", None) is not None and not seed_eval:
+                        exec_cache = ExecutionCache(
+                            cfg.exec.cache.dir, max_size_mb=cfg.exec.cache.max_size_mb
+                        )
+                        exec_result = exec_cache.run(
+                            process_interpreter,
+                            child_node.code,
+                            input_dir=Path(cfg.workspace_dir) / "input",
+                            working_dir=working_dir,
+                        )
+                    else:
+                        exec_result = process_interpreter.run(child_node.code, True)
+                    process_interpreter.cleanup_session()
 
             print("Parsing execution results")
             worker_agent.parse_exec_result(
@@ -1594,10 +2123,7 @@ class ParallelAgent:
                     child_node.parse_metrics_code = parse_metrics_code
                 try:
                     # Execute the parsing code
-                    metrics_exec_result = process_interpreter.run(
-                        parse_metrics_code, True
-                    )
-                    process_interpreter.cleanup_session()
+                    metrics_exec_result = run_followup(parse_metrics_code)
                     child_node.parse_term_out = metrics_exec_result.term_out
                     child_node.parse_exc_type = metrics_exec_result.exc_type
                     child_node.parse_exc_info = metrics_exec_result.exc_info
@@ -1692,8 +2218,7 @@ class ParallelAgent:
                             plotting_code = worker_agent._generate_plotting_code(
                                 child_node, working_dir, plot_code_from_prev_stage
                             )
-                        plot_exec_result = process_interpreter.run(plotting_code, True)
-                        process_interpreter.cleanup_session()
+                        plot_exec_result = run_followup(plotting_code)
                         child_node.plot_exec_result = plot_exec_result
                         if child_node.plot_exc_type and retry_count < 3:
                             print(
@@ -1780,6 +2305,16 @@ class ParallelAgent:
                             f"Error analyzing plots for node {child_node.id}: {str(e)}"
                         )
 
+            # Summarize the finished node once; notes and stage metrics reuse node.summary
+            try:
+                child_node.summary_calls += 1
+                child_node.summary = worker_agent._generate_node_summary(child_node)
+                logger.info(f"Generated summary for node {child_node.id}")
+            except Exception as e:
+                logger.error(
+                    f"Error generating summary for node {child_node.id}: {str(e)}"
+                )
+
             # Convert result node to dict
             print("Converting result to dict")
             result_data = child_node.to_dict()
@@ -1794,6 +2329,13 @@ class ParallelAgent:
 
             traceback.print_exc()
             raise
+        finally:
+            if followup_interpreter is not None:
+                followup_interpreter.cleanup_session()
+            # cumulative for this worker process
+            client_registry.log_stats()
+            token_tracker.log_stage_summary()
+            prompt_stats.log_stats()
 
     def _generate_hyperparam_tuning_idea(self) -> Optional[HyperparamTuningIdea]:
         """Generate the next hyperparam tuning idea based on what's been done.
@@ -1928,8 +2470,10 @@ class ParallelAgent:
             leaves.extend(self._get_leaves(child))
         return leaves
 
-    def _select_parallel_nodes(self) -> List[Optional[Node]]:
-        """Select N nodes to process in parallel,
+    def _select_parallel_nodes(
+        self, num_nodes: Optional[int] = None
+    ) -> List[Optional[Node]]:
+        """Select N nodes to process in parallel (N defaults to the number of workers),
         balancing between tree exploration and exploitation.
         Note:
         - This function runs in the main process.
@@ -1938,18 +2482,27 @@ class ParallelAgent:
         send them to worker processes.
         This is to make sure we don't run duplicate ideas in parallel.
         - For Stage 1 and 3, we generate nodes in worker processes.
+        - Nodes still in flight (continuous scheduler) count towards the drafts
+        and the trees that are already being processed.
         """
+        if num_nodes is None:
+            num_nodes = self.num_workers
         nodes_to_process = []
-        processed_trees = set()
+        pending_parents = [info["node"] for info in self._pending.values()]
+        processed_trees = {
+            id(self._get_tree_root(n)) for n in pending_parents if n is not None
+        }
+        num_pending_drafts = sum(1 for n in pending_parents if n is None)
         search_cfg = self.cfg.agent.search
         print(f"[cyan]self.num_workers: {self.num_workers}, [/cyan]")
 
-        while len(nodes_to_process) < self.num_workers:
+        while len(nodes_to_process) < num_nodes:
             # Initial drafting phase, creating root nodes
+            num_drafts = len(self.journal.draft_nodes) + num_pending_drafts
             print(
-                f"Checking draft nodes... num of journal.draft_nodes: {len(self.journal.draft_nodes)}, search_cfg.num_drafts: {search_cfg.num_drafts}"
+                f"Checking draft nodes... num of journal.draft_nodes: {len(self.journal.draft_nodes)}, pending drafts: {num_pending_drafts}, search_cfg.num_drafts: {search_cfg.num_drafts}"
             )
-            if len(self.journal.draft_nodes) < search_cfg.num_drafts:
+            if num_drafts < search_cfg.num_drafts:
                 nodes_to_process.append(None)
                 continue
 
@@ -2050,128 +2603,180 @@ class ParallelAgent:
 
         return nodes_to_process
 
-    def step(self, exec_callback: ExecCallbackType):
-        print("Selecting nodes to process")
-        nodes_to_process = self._select_parallel_nodes()
-        print(f"Selected nodes: {[n.id if n else None for n in nodes_to_process]}")
-
-        # Convert nodes to dicts
-        node_data_list = []
-        for node in nodes_to_process:
-            if node:
-                try:
-                    node_data = node.to_dict()
-                    _safe_pickle_test(node_data, f"node {node.id} data")
-                    node_data_list.append(node_data)
-                except Exception as e:
-                    logger.error(f"Error preparing node {node.id}: {str(e)}")
-                    raise
-            else:
-                node_data_list.append(None)  # None means new draft
+    def _get_tree_root(self, node: Node) -> Node:
+        tree_root = node
+        while tree_root.parent:
+            tree_root = tree_root.parent
+        return tree_root
 
+    def _generate_memory_summary(self) -> str:
         if self.cfg.agent.get("summary", None) is not None:
-            memory_summary = self.journal.generate_summary(
-                include_code=False, 
+            return self.journal.generate_summary(
+                include_code=False,
                 **{
-                    "model": self.cfg.agent.summary.model, 
+                    "model": self.cfg.agent.summary.model,
                     "temp": self.cfg.agent.summary.temp
                 }
             )
-        else:
-            memory_summary = self.journal.generate_summary(include_code=False)
-
-        print("Submitting tasks to process pool")
-        futures = []
-        for node_data in node_data_list:
-            gpu_id = None
-            if self.gpu_manager is not None:
-                try:
-                    # Get current process ID for GPU assignment
-                    process_id = f"worker_{len(futures)}"
-                    gpu_id = self.gpu_manager.acquire_gpu(process_id)
-                    logger.info(f"Assigned GPU {gpu_id} to process {process_id}")
-                except RuntimeError as e:
-                    logger.warning(f"Could not acquire GPU: {e}. Running on CPU")
+        return self.journal.generate_summary(include_code=False)
 
-            if (
-                self.stage_name
-                and self.stage_name.startswith("2_")
-                and node_data["is_buggy"] is False
-            ):
-                new_hyperparam_idea = self._generate_hyperparam_tuning_idea()
-                self._hyperparam_tuning_state["tried_hyperparams"].add(
-                    new_hyperparam_idea.name
-                )
-                new_ablation_idea = None
-            elif (
-                self.stage_name
-                and self.stage_name.startswith("4_")
-                and node_data["is_buggy"] is False
-            ):
-                new_ablation_idea = self._generate_ablation_idea()
-                self._ablation_state["completed_ablations"].add(new_ablation_idea.name)
-                new_hyperparam_idea = None
-            else:
-                new_ablation_idea = None
-                new_hyperparam_idea = None
+    def _submit_node(self, node: Optional[Node], memory_summary: str) -> Future:
+        """Prepare a (parent) node and submit it to the process pool.
+        For Stage 2 and 4, the new idea is generated here in the main process
+        and recorded right away, so that ideas in flight are never proposed twice."""
+        if node:
+            try:
+                node_data = node.to_dict()
+                _safe_pickle_test(node_data, f"node {node.id} data")
+            except Exception as e:
+                logger.error(f"Error preparing node {node.id}: {str(e)}")
+                raise
+        else:
+            node_data = None  # None means new draft
 
-            best_stage1_plot_code = (
-                self.best_stage1_node.plot_code if self.best_stage1_node else None
-            )
-            best_stage2_plot_code = (
-                self.best_stage2_node.plot_code if self.best_stage2_node else None
+        if (
+            self.stage_name
+            and self.stage_name.startswith("2_")
+            and node_data["is_buggy"] is False
+        ):
+            new_hyperparam_idea = self._generate_hyperparam_tuning_idea()
+            self._hyperparam_tuning_state["tried_hyperparams"].add(
+                new_hyperparam_idea.name
             )
-            best_stage3_plot_code = (
-                self.best_stage3_node.plot_code if self.best_stage3_node else None
+            new_ablation_idea = None
+        elif (
+            self.stage_name
+            and self.stage_name.startswith("4_")
+            and node_data["is_buggy"] is False
+        ):
+            new_ablation_idea = self._generate_ablation_idea()
+            self._ablation_state["completed_ablations"].add(new_ablation_idea.name)
+            new_hyperparam_idea = None
+        else:
+            new_ablation_idea = None
+            new_hyperparam_idea = None
+
+        best_stage1_plot_code = (
+            self.best_stage1_node.plot_code if self.best_stage1_node else None
+        )
+        best_stage2_plot_code = (
+            self.best_stage2_node.plot_code if self.best_stage2_node else None
+        )
+        best_stage3_plot_code = (
+            self.best_stage3_node.plot_code if self.best_stage3_node else None
+        )
+        seed_eval = False
+        future = self.executor.submit(
+            self._process_node_wrapper,
+            node_data,
+            self.task_desc,
+            self.cfg,
+            self.gpu_leases,
+            memory_summary,
+            self.evaluation_metrics,
+            self.stage_name,
+            new_ablation_idea,
+            new_hyperparam_idea,
+            best_stage1_plot_code,
+            best_stage2_plot_code,
+            best_stage3_plot_code,
+            seed_eval,
+            exec_timeout=self._exec_timeout(node),
+        )
+        self.utilization.track(future)
+        return future
+
+    def _add_result_to_journal(self, result_data: dict):
+        if "metric" in result_data:
+            print(f"metric type: {type(result_data['metric'])}")
+            print(f"metric contents: {result_data['metric']}")
+
+        # Create node and restore relationships using journal.
+        # Journal acts as a database to look up a parent node,
+        # and add the result node as a child.
+        result_node = Node.from_dict(result_data, self.journal)
+        print("[red]Investigating if result node has metric[/red]", flush=True)
+        print(result_node.metric)
+        # Update hyperparam tuning state if in Stage 2
+        self._update_hyperparam_tuning_state(result_node)
+        # Update ablation state if in Stage 4
+        self._update_ablation_state(result_node)
+
+        # Add node to journal's list and assign its step number
+        self.journal.append(result_node)
+        print("Added result node to journal")
+        if self.exec_budget is not None:
+            self.exec_budget.record(self.stage_name, result_node, result_node.exec_timeout)
+
+    def _exec_timeout(self, parent: Optional[Node]) -> Optional[int]:
+        """Time limit for running a child of parent (None: exec.timeout)"""
+        if self.exec_budget is None:
+            return None
+        stage_number = int(self.stage_name.split("_")[0]) if self.stage_name else 0
+        timeout = self.exec_budget.timeout_for(self.stage_name, stage_number, parent)
+        logger.info(
+            f"Time limit for a child of {parent.id if parent else 'a new draft'}: "
+            f"{humanize.naturaldelta(timeout)}"
+        )
+        return timeout
+
+    def _log_utilization(self):
+        report = self.utilization.report()
+        logger.info(
+            f"Worker utilization ({self.scheduler}): {report['utilization']:.1%} "
+            f"({humanize.naturaldelta(report['busy_time'])} busy over "
+            f"{humanize.naturaldelta(report['wall_time'])} x {self.num_workers} workers)"
+        )
+        if self.gpu_leases is not None:
+            gpu_report = self.gpu_leases.report()
+            logger.info(
+                f"GPU duty cycle: {gpu_report['duty_cycle']:.1%} "
+                f"({gpu_report['num_leases']} executions, "
+                f"mean lease wait {gpu_report['mean_wait']:.1f}s)"
             )
-            seed_eval = False
-            futures.append(
-                self.executor.submit(
-                    self._process_node_wrapper,
-                    node_data,
-                    self.task_desc,
-                    self.cfg,
-                    gpu_id,
-                    memory_summary,
-                    self.evaluation_metrics,
-                    self.stage_name,
-                    new_ablation_idea,
-                    new_hyperparam_idea,
-                    best_stage1_plot_code,
-                    best_stage2_plot_code,
-                    best_stage3_plot_code,
-                    seed_eval,
-                )
+        # execution time includes the probe runs of speculative drafting
+        exec_hours = (
+            sum((n.exec_time or 0) + n.probe_exec_time for n in self.journal.nodes)
+            / 3600
+        )
+        if exec_hours > 0:
+            num_good = len(self.journal.good_nodes)
+            logger.info(
+                f"Good nodes per {'GPU' if self.gpu_leases is not None else 'execution'}-hour: "
+                f"{num_good / exec_hours:.2f} ({num_good} good nodes in {exec_hours:.2f}h)"
             )
 
+    def step(self, exec_callback: ExecCallbackType):
+        if self.scheduler == "continuous":
+            self._step_continuous(exec_callback)
+        else:
+            self._step_lockstep(exec_callback)
+        self._log_utilization()
+
+    def _step_lockstep(self, exec_callback: ExecCallbackType):
+        print("Selecting nodes to process")
+        nodes_to_process = self._select_parallel_nodes()
+        print(f"Selected nodes: {[n.id if n else None for n in nodes_to_process]}")
+
+        memory_summary = self._generate_memory_summary()
+
+        print("Submitting tasks to process pool")
+        futures = []
+        for node in nodes_to_process:
+            futures.append(self._submit_node(node, memory_summary))
+
         # Add results to journal
         print("Waiting for results")
-        for i, future in enumerate(futures):
+        for future in futures:
             try:
                 print("About to get result from future")
                 result_data = future.result(timeout=self.timeout)
-                if "metric" in result_data:
-                    print(f"metric type: {type(result_data['metric'])}")
-                    print(f"metric contents: {result_data['metric']}")
-
-                # Create node and restore relationships using journal.
-                # Journal acts as a database to look up a parent node,
-                # and add the result node as a child.
-                result_node = Node.from_dict(result_data, self.journal)
-                print("[red]Investigating if result node has metric[/red]", flush=True)
-                print(result_node.metric)
-                # Update hyperparam tuning state if in Stage 2
-                self._update_hyperparam_tuning_state(result_node)
-                # Update ablation state if in Stage 4
-                self._update_ablation_state(result_node)
-
-                # Add node to journal's list and assign its step number
-                self.journal.append(result_node)
-                print("Added result node to journal")
+                self._add_result_to_journal(result_data)
 
             except TimeoutError:
                 print("Worker process timed out, couldn't get the result")
                 logger.error(f"Worker process timed out, couldn't get the result")
+                self._abandoned.append(future)
             except Exception as e:
                 print(f"Error processing node: {str(e)}")
                 logger.error(f"Error processing node: {str(e)}")
@@ -2179,15 +2784,62 @@ class ParallelAgent:
 
                 traceback.print_exc()
                 raise
-            finally:
-                # Release GPU for this process if it was using one
-                process_id = f"worker_{i}"
-                if (
-                    self.gpu_manager is not None
-                    and process_id in self.gpu_manager.gpu_assignments
-                ):
-                    self.gpu_manager.release_gpu(process_id)
-                    logger.info(f"Released GPU for process {process_id}")
+
+    def _step_continuous(self, exec_callback: ExecCallbackType):
+        """Refill the free worker slots one at a time, then return as soon as
+        at least one in-flight node has landed in the journal."""
+        busy_slots = {info["slot"] for info in self._pending.values()}
+        free_slots = [i for i in range(self.num_workers) if i not in busy_slots]
+        if free_slots:
+            memory_summary = self._generate_memory_summary()
+            for slot in free_slots:
+                # re-select for this slot only, taking the in-flight nodes into account
+                node = self._select_parallel_nodes(num_nodes=1)[0]
+                print(f"Selected node for slot {slot}: {node.id if node else None}")
+                future = self._submit_node(node, memory_summary)
+                self._pending[future] = {"slot": slot, "node": node}
+
+        print(f"Waiting for the first of {len(self._pending)} in-flight nodes")
+        done, _ = wait(
+            list(self._pending), timeout=self.timeout, return_when=FIRST_COMPLETED
+        )
+        if not done:
+            print("No worker finished within the timeout, couldn't get a result")
+            logger.error("No worker finished within the timeout, couldn't get a result")
+        for future in done:
+            self._collect_pending(future)
+
+    def _collect_pending(self, future: Future):
+        info = self._pending.pop(future)
+        try:
+            self._add_result_to_journal(future.result())
+        except Exception as e:
+            print(f"Error processing node: {str(e)}")
+            logger.error(f"Error processing node: {str(e)}")
+            import traceback
+
+            traceback.print_exc()
+            raise
+
+    def _drain_pending(self):
+        """Wait for all in-flight nodes (continuous scheduler) and add them to the journal.
+        Nodes that fail or don't finish within the timeout are logged and dropped."""
+        if not self._pending:
+            return
+        print(f"Waiting for {len(self._pending)} in-flight nodes to finish")
+        for future in list(self._pending):
+            done, _ = wait([future], timeout=self.timeout)
+            if not done:
+                print("Worker process timed out, couldn't get the result")
+                logger.error(f"Worker process timed out, couldn't get the result")
+                self._pending.pop(future)
+                self._abandoned.append(future)
+                continue
+            try:
+                self._collect_pending(future)
+            except Exception:
+                # already logged by _collect_pending
+                pass
 
     def _update_hyperparam_tuning_state(self, result_node: Node):
         """Update hyperparam tuning tracking state based on execution results."""
@@ -2338,31 +2990,46 @@ class ParallelAgent:
         if not self._is_shutdown:
             print("Shutting down parallel executor...")
             try:
-                # Release all GPUs
-                if self.gpu_manager is not None:
-                    for process_id in list(self.gpu_manager.gpu_assignments.keys()):
-                        self.gpu_manager.release_gpu(process_id)
+                if self.gpu_leases is not None:
+                    self._log_utilization()
 
-                # Shutdown executor first
+                # Drop nodes still in flight (continuous scheduler) or timed out
+                stray = [
+                    f for f in list(self._pending) + self._abandoned if not f.done()
+                ]
+                self._pending.clear()
+                self._abandoned.clear()
+
+                if not self._owns_executor:
+                    # Leased pool: the workers are kept for the next sub-stage,
+                    # but must not keep running this sub-stage's nodes
+                    if stray:
+                        logger.warning(f"Discarding {len(stray)} in-flight nodes")
+                        self.executor.discard(stray)
+                    self.executor.log_stats()
+                    return
+
+                # Get a copy of the processes (shutdown drops them)
+                processes = list((self.executor._processes or {}).values())
                 self.executor.shutdown(wait=False, cancel_futures=True)
 
                 # Force terminate all worker processes
-                if self.executor._processes:
-                    ## Get copy of processes
-                    processes = list(self.executor._processes.values())
-
-                    # Then terminate processes if they're still alive
-                    for process in processes:
-                        if process.is_alive():
-                            process.terminate()
-                            process.join(timeout=1)
+                _terminate_workers(processes)
 
                 print("Executor shutdown complete")
 
             except Exception as e:
                 print(f"Error during executor shutdown: {e}")
             finally:
+                # only now that no worker runs this sub-stage's nodes anymore
+                if self.gpu_leases is not None and self._owns_gpu_leases:
+                    self.gpu_leases.shutdown()
                 self._is_shutdown = True
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.cleanup()
+        try:
+            if exc_type is None:
+                # keep the results of nodes that are still running (continuous scheduler)
+                self._drain_pending()
+        finally:
+            self.cleanup()
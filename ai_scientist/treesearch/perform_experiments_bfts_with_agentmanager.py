@@ -2,7 +2,7 @@ import atexit
 import logging
 import shutil
 import json
-import pickle
+import time
 from . import backend
 from .journal import Journal, Node
 from .journal2report import journal2report
@@ -21,11 +21,18 @@ from rich.progress import (
 from rich.text import Text
 from rich.status import Status
 from rich.tree import Tree
-from .utils.config import load_task_desc, prep_agent_workspace, save_run, load_cfg
+from .utils.config import (
+    close_journal_logs,
+    load_task_desc,
+    prep_agent_workspace,
+    save_run,
+    load_cfg,
+)
 from .agent_manager import AgentManager
 from pathlib import Path
 from .agent_manager import Stage
 from .log_summarization import overall_summarize
+from ai_scientist.utils.response_cache import enable_response_cache
 
 
 logger = logging.getLogger("ai-scientist")
@@ -55,11 +62,24 @@ def journal_to_rich_tree(journal: Journal, cfg):
     return tree
 
 
-def perform_experiments_bfts(config_path: str):
+def perform_experiments_bfts(config_path: str, resume: bool = False):
     # turn config path string into a path object
     config_path = Path(config_path)
-    cfg = load_cfg(config_path)
-    logger.info(f'Starting run "{cfg.exp_name}"')
+    cfg = load_cfg(config_path, resume=resume)
+    checkpoint_dir = cfg.log_dir / "checkpoint"
+    if resume and not (checkpoint_dir / "manifest.json").exists():
+        logger.warning(
+            f'No checkpoint found for run "{cfg.exp_name}", starting it from scratch'
+        )
+        resume = False
+    logger.info(f'{"Resuming" if resume else "Starting"} run "{cfg.exp_name}"')
+    if cfg.get("llm_cache", None):
+        # set in the environment, so the worker processes use the same cache
+        enable_response_cache(
+            cfg.llm_cache.path,
+            ttl=cfg.llm_cache.ttl_hours * 3600,
+            max_size_mb=cfg.llm_cache.max_size_mb,
+        )
 
     task_desc = load_task_desc(cfg)
     print(task_desc)
@@ -67,20 +87,32 @@ def perform_experiments_bfts(config_path: str):
 
     global_step = 0
 
-    with Status("Preparing agent workspace (copying and extracting files) ..."):
-        prep_agent_workspace(cfg)
+    # a resumed run reuses its workspace (unless it was cleaned up)
+    if not resume or not (cfg.workspace_dir / "input").exists():
+        with Status("Preparing agent workspace (copying and extracting files) ..."):
+            prep_agent_workspace(cfg)
+
+    if resume:
+        start = time.time()
+        manager = AgentManager.from_checkpoint(checkpoint_dir, cfg)
+        logger.info(
+            f"Recovered {sum(len(j) for j in manager.journals.values())} nodes, continuing "
+            f"at {manager.current_substage.name if manager.current_substage else None} "
+            f"({time.time() - start:.2f}s)"
+        )
+    else:
 
-    def cleanup():
-        if global_step == 0:
-            shutil.rmtree(cfg.workspace_dir)
+        def cleanup():
+            if global_step == 0:
+                shutil.rmtree(cfg.workspace_dir)
 
-    atexit.register(cleanup)
+        atexit.register(cleanup)
 
-    manager = AgentManager(
-        task_desc=task_desc,
-        cfg=cfg,
-        workspace_dir=Path(cfg.workspace_dir),
-    )
+        manager = AgentManager(
+            task_desc=task_desc,
+            cfg=cfg,
+            workspace_dir=Path(cfg.workspace_dir),
+        )
 
     prog = Progress(
         TextColumn("[progress.description]{task.description}"),
@@ -110,12 +142,11 @@ def perform_experiments_bfts(config_path: str):
             # Save latest node summary
             if journal.nodes:
                 latest_node = journal.nodes[-1]
-                if hasattr(latest_node, "_agent"):
-                    summary = latest_node._agent._generate_node_summary(latest_node)
+                if latest_node.summary is not None:
                     with open(
                         notes_dir / f"node_{latest_node.id}_summary.json", "w"
                     ) as f:
-                        json.dump(summary, f, indent=2)
+                        json.dump(latest_node.summary, f, indent=2)
 
 
             if cfg.agent.get("summary", None) is not None:
@@ -143,6 +174,7 @@ def perform_experiments_bfts(config_path: str):
                     else "None"
                 ),
                 "current_findings": current_findings,
+                "best_node_cache": journal.best_node_cache_info(),
             }
 
             with open(notes_dir / "stage_progress.json", "w") as f:
@@ -208,21 +240,17 @@ def perform_experiments_bfts(config_path: str):
         screen=True,
     )
 
-    manager.run(exec_callback=create_exec_callback(status), step_callback=step_callback)
-
-    manager_pickle_path = cfg.log_dir / "manager.pkl"
     try:
-        with open(manager_pickle_path, "wb") as f:
-            pickle.dump(manager, f)
-        logger.info(f"Saved manager state to: {manager_pickle_path}")
-    except Exception as e:
-        logger.warning(f"Failed to save full manager state: {e}")
-        try:
-            with open(manager_pickle_path, "wb") as f:
-                pickle.dump(manager.journals.items(), f)
-            logger.info(f"Saved manager journals to: {manager_pickle_path}")
-        except Exception as e:
-            logger.error(f"Failed to save manager journals: {e}")
+        manager.run(
+            exec_callback=create_exec_callback(status), step_callback=step_callback
+        )
+    finally:
+        # the report below reads the stage journals back from disk
+        close_journal_logs()
+
+    # the manager state is checkpointed incrementally during the run
+    # (restore it with AgentManager.from_checkpoint)
+    logger.info(f"Manager checkpoint is in: {manager._checkpoint_dir()}")
 
     if cfg.generate_report:
         print("Generating final report from all stages...")
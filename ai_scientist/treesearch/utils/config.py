@@ -41,11 +41,21 @@ class StageConfig:
     max_tokens: Optional[int] = None
 
 
+@dataclass
+class SpeculativeDraftConfig:
+    # candidate drafts written per draft slot; only the most promising one runs in full
+    num_candidates: int = 3
+    # seconds each candidate runs before the candidates are compared
+    probe_timeout: int = 120
+
+
 @dataclass
 class SearchConfig:
     max_debug_depth: int
     debug_prob: float
     num_drafts: int
+    # probe several candidate drafts and run only the most promising one
+    speculative: Optional[SpeculativeDraftConfig] = None
 
 
 @dataclass
@@ -72,12 +82,76 @@ class AgentConfig:
 
     summary: Optional[StageConfig] = None
     select_node: Optional[StageConfig] = None
+    # "lockstep" or "continuous" (refill worker slots as soon as a node finishes)
+    scheduler: str = "lockstep"
+    # token budgets of prompt sections (by section name), see backend.set_prompt_budgets
+    prompt_budgets: Optional[dict[str, int]] = None
+
+
+@dataclass
+class ExecCacheConfig:
+    dir: str
+    max_size_mb: int = 10240
+
+
+@dataclass
+class GPULeaseConfig:
+    # share of a GPU's memory one execution reserves (0.5: two executions per GPU)
+    fraction: float = 1.0
+    # don't lease a GPU with less free memory (MiB) than this
+    min_free_mb: int = 0
+
+
+@dataclass
+class ExecBudgetConfig:
+    # wall-clock budget of a sub-stage in hours (None: only bounded by its max iterations)
+    stage_hours: Optional[float] = None
+    # a run may take this many times its parent's (or the stage's median) runtime
+    slack: float = 3.0
+    # lower bound of a node's time limit, in seconds
+    min_timeout: int = 300
+
+
+@dataclass
+class EarlyStopConfig:
+    # stop a run once a loss it printed was nan/inf this many times (0: off)
+    nan_patience: int = 3
+    # stop a run whose loss stays above divergence_factor x its lowest value (0: off)
+    divergence_factor: float = 10.0
+    divergence_patience: int = 5
+    # stop a run whose losses stayed flat for no_progress_patience readings spanning at
+    # least no_progress_timeout seconds (0: off)
+    no_progress_timeout: int = 900
+    no_progress_patience: int = 10
+    # stop a run that printed the same exception this many times (0: off)
+    max_repeated_tracebacks: int = 5
+
 
 @dataclass
 class ExecConfig:
     timeout: int
     agent_file_name: str
     format_tb_ipython: bool
+    # fork sessions from a zygote process with heavy modules pre-imported
+    use_zygote: bool = False
+    zygote_preload: Optional[list[str]] = None  # None -> DEFAULT_ZYGOTE_PRELOAD
+    # run a node's metric parsing and plotting code in one reused session
+    reuse_followup_session: bool = False
+    # replay identical experiment runs from an on-disk cache (not used for seed evaluation)
+    cache: Optional[ExecCacheConfig] = None
+    # how experiment executions share the GPUs (default: one execution per GPU)
+    gpu_lease: Optional[GPULeaseConfig] = None
+    # per-node time limits from runtime history instead of `timeout` for every run
+    budget: Optional[ExecBudgetConfig] = None
+    # watch the output of experiment runs and stop hopeless ones early
+    early_stop: Optional[EarlyStopConfig] = None
+
+
+@dataclass
+class LLMCacheConfig:
+    path: str
+    ttl_hours: float = 168
+    max_size_mb: int = 1024
 
 
 @dataclass
@@ -107,6 +181,8 @@ class Config(Hashable):
     agent: AgentConfig
     experiment: ExperimentConfig
     debug: DebugConfig
+    # serve repeated deterministic LLM calls from an on-disk cache
+    llm_cache: Optional[LLMCacheConfig] = None
 
 
 def _get_next_logindex(dir: Path) -> int:
@@ -131,12 +207,23 @@ def _load_cfg(
     return cfg
 
 
-def load_cfg(path: Path = Path(__file__).parent / "config.yaml") -> Config:
+def load_cfg(
+    path: Path = Path(__file__).parent / "config.yaml", resume: bool = False
+) -> Config:
     """Load config from .yaml file and CLI args, and set up logging directory."""
-    return prep_cfg(_load_cfg(path))
+    return prep_cfg(_load_cfg(path), resume=resume)
+
+
+def _get_latest_run_name(dir: Path) -> str:
+    """Name of the run directory with the highest index (the one to resume)."""
+    ind = _get_next_logindex(dir) - 1
+    for p in dir.iterdir():
+        if p.is_dir() and p.name.split("-")[0] == str(ind):
+            return p.name
+    raise ValueError(f"No previous run found to resume in {dir}")
 
 
-def prep_cfg(cfg: Config):
+def prep_cfg(cfg: Config, resume: bool = False):
     if cfg.data_dir is None:
         raise ValueError("`data_dir` must be provided.")
 
@@ -158,10 +245,16 @@ def prep_cfg(cfg: Config):
     top_workspace_dir = Path(cfg.workspace_dir).resolve()
     top_workspace_dir.mkdir(parents=True, exist_ok=True)
 
-    # generate experiment name and prefix with consecutive index
-    ind = max(_get_next_logindex(top_log_dir), _get_next_logindex(top_workspace_dir))
-    cfg.exp_name = cfg.exp_name or coolname.generate_slug(3)
-    cfg.exp_name = f"{ind}-{cfg.exp_name}"
+    if resume:
+        # reuse the directories of the latest run
+        cfg.exp_name = _get_latest_run_name(top_log_dir)
+    else:
+        # generate experiment name and prefix with consecutive index
+        ind = max(
+            _get_next_logindex(top_log_dir), _get_next_logindex(top_workspace_dir)
+        )
+        cfg.exp_name = cfg.exp_name or coolname.generate_slug(3)
+        cfg.exp_name = f"{ind}-{cfg.exp_name}"
 
     cfg.log_dir = (top_log_dir / cfg.exp_name).resolve()
     cfg.workspace_dir = (top_workspace_dir / cfg.exp_name).resolve()
@@ -173,6 +266,9 @@ def prep_cfg(cfg: Config):
     if cfg.agent.type not in ["parallel", "sequential"]:
         raise ValueError("agent.type must be either 'parallel' or 'sequential'")
 
+    if cfg.agent.scheduler not in ["lockstep", "continuous"]:
+        raise ValueError("agent.scheduler must be either 'lockstep' or 'continuous'")
+
     return cast(Config, cfg)
 
 
@@ -216,15 +312,29 @@ def prep_agent_workspace(cfg: Config):
         preproc_data(cfg.workspace_dir / "input")
 
 
+# open append-only journal logs, by path (see save_run)
+_journal_logs: dict[Path, serialize.JournalLog] = {}
+
+
+def close_journal_logs():
+    """Flush and close the journal logs opened by save_run (call once the run is over)"""
+    for log in _journal_logs.values():
+        log.close()
+    _journal_logs.clear()
+
+
 def save_run(cfg: Config, journal, stage_name: str = None):
     if stage_name is None:
         stage_name = "NoStageRun"
     save_dir = cfg.log_dir / stage_name
     save_dir.mkdir(parents=True, exist_ok=True)
 
-    # save journal
+    # save journal (only the nodes that are new or changed since the last save)
     try:
-        serialize.dump_json(journal, save_dir / "journal.json")
+        journal_path = save_dir / "journal.jsonl"
+        if journal_path not in _journal_logs:
+            _journal_logs[journal_path] = serialize.JournalLog(journal_path)
+        _journal_logs[journal_path].sync(journal)
     except Exception as e:
         print(f"Error saving journal: {e}")
         raise
@@ -1,5 +1,7 @@
-import copy
 import json
+import logging
+import os
+import time
 from pathlib import Path
 from typing import Type, TypeVar
 import re
@@ -7,24 +9,21 @@ import re
 import dataclasses_json
 from ..journal import Journal, Node
 
+logger = logging.getLogger("ai-scientist")
+
 
 def dumps_json(obj: dataclasses_json.DataClassJsonMixin):
     """Serialize dataclasses (such as Journals) to JSON."""
-    if isinstance(obj, Journal):
-        obj = copy.deepcopy(obj)
-        node2parent = {}
-        for n in obj.nodes:
-            if n.parent is not None:
-                # Handle both Node objects and string IDs
-                parent_id = n.parent.id if isinstance(n.parent, Node) else n.parent
-                node2parent[n.id] = parent_id
-        for n in obj.nodes:
-            n.parent = None
-            n.children = set()
-
     obj_dict = obj.to_dict()
 
     if isinstance(obj, Journal):
+        # relationships are stored once, in node2parent
+        node2parent = {}
+        for node_dict in obj_dict["nodes"]:
+            if node_dict["parent_id"] is not None:
+                node2parent[node_dict["id"]] = node_dict["parent_id"]
+            node_dict["parent_id"] = None
+            node_dict["children"] = []
         obj_dict["node2parent"] = node2parent
         obj_dict["__version"] = "2"
 
@@ -39,24 +38,177 @@ def dump_json(obj: dataclasses_json.DataClassJsonMixin, path: Path):
 G = TypeVar("G", bound=dataclasses_json.DataClassJsonMixin)
 
 
+def _link_journal(nodes: list[Node], node2parent: dict[str, str]) -> Journal:
+    id2nodes = {n.id: n for n in nodes}
+    for child_id, parent_id in node2parent.items():
+        if parent_id in id2nodes:
+            id2nodes[child_id].parent = id2nodes[parent_id]
+            id2nodes[child_id].__post_init__()
+    return Journal(nodes=nodes)
+
+
 def loads_json(s: str, cls: Type[G]) -> G:
     """Deserialize JSON to AIDE dataclasses."""
     obj_dict = json.loads(s)
-    obj = cls.from_dict(obj_dict)
-
-    if isinstance(obj, Journal):
-        id2nodes = {n.id: n for n in obj.nodes}
-        for child_id, parent_id in obj_dict["node2parent"].items():
-            id2nodes[child_id].parent = id2nodes[parent_id]
-            id2nodes[child_id].__post_init__()
-    return obj
+    if cls is Journal:
+        nodes = [Node.from_dict(node_dict) for node_dict in obj_dict["nodes"]]
+        return _link_journal(nodes, obj_dict.get("node2parent", {}))
+    return cls.from_dict(obj_dict)
 
 
 def load_json(path: Path, cls: Type[G]) -> G:
+    if cls is Journal and Path(path).suffix == ".jsonl":
+        return load_journal_log(path)
     with open(path, "r") as f:
         return loads_json(f.read(), cls)
 
 
+_RECORD_HEADER = re.compile(r'\{"id":"([^"]+)","version":(\d+),')
+
+
+class JournalLog:
+    """
+    Append-only journal file (JSON lines). Every `sync` writes one record per node that is new
+    or changed (see `Node.version`) since it was last written, instead of rewriting the whole
+    journal. The last record of a node wins when loading.
+    - Records are written as whole lines; a torn last line (crash mid-write) is dropped.
+    - fsync is batched: after `fsync_every` records or `fsync_interval` seconds.
+    - The log is compacted (rewritten with one record per node, atomically) once it holds
+    more than `compact_ratio` times as many records as the journal has nodes.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        fsync_every: int = 32,
+        fsync_interval: float = 30.0,
+        compact_ratio: float = 2.0,
+    ):
+        self.path = Path(path)
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.compact_ratio = compact_ratio
+        self._written: dict[str, int] = {}  # node id -> version written last
+        self._num_records = 0
+        self._unsynced = 0
+        self._last_fsync = time.time()
+        if self.path.exists():
+            self._recover()
+        self._file = open(self.path, "a")
+
+    def _recover(self):
+        """Drop a torn last line and learn which node versions are already on disk."""
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            end = data.rfind(b"\n") + 1
+            if end < len(data):
+                logger.warning(f"Dropping incomplete last record of {self.path}")
+                f.truncate(end)
+        with open(self.path, "r") as f:
+            for line in f:
+                # records start with id and version (see _write), no need to parse the node
+                match = _RECORD_HEADER.match(line)
+                if match:
+                    node_id, version = match.group(1), int(match.group(2))
+                else:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        logger.warning(f"Skipping incomplete record in {self.path}")
+                        continue
+                    node_id, version = record["id"], record["version"]
+                self._written[node_id] = version
+                self._num_records += 1
+
+    def sync(self, journal: Journal, compact: bool = True) -> int:
+        """
+        Append records for new or changed nodes; returns the number of records written.
+        With compact=False the caller compacts (see needs_compaction), e.g. only after it
+        recorded the log's current length elsewhere.
+        """
+        written = 0
+        for node in journal.nodes:
+            if self._written.get(node.id) == node.version:
+                continue
+            self._write(node)
+            written += 1
+        self._file.flush()
+        self._unsynced += written
+        if self._unsynced >= self.fsync_every or (
+            self._unsynced and time.time() - self._last_fsync >= self.fsync_interval
+        ):
+            self.fsync()
+        if compact and self.needs_compaction(journal):
+            self.compact(journal)
+        return written
+
+    def needs_compaction(self, journal: Journal) -> bool:
+        return self._num_records > self.compact_ratio * max(len(journal), 1)
+
+    def _write(self, node: Node):
+        record = {"id": node.id, "version": node.version, "node": node.to_dict()}
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._written[node.id] = node.version
+        self._num_records += 1
+
+    @property
+    def num_records(self) -> int:
+        return self._num_records
+
+    def fsync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_fsync = time.time()
+
+    def compact(self, journal: Journal):
+        """Rewrite the log with one record per node (atomically replaces the file)."""
+        self._file.close()
+        tmp_path = self.path.with_suffix(".jsonl.tmp")
+        self._file = open(tmp_path, "w")
+        self._written = {}
+        self._num_records = 0
+        for node in journal.nodes:
+            self._write(node)
+        self.fsync()
+        self._file.close()
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, "a")
+        logger.info(f"Compacted {self.path} to {self._num_records} records")
+
+    def close(self):
+        if not self._file.closed:
+            self.fsync()
+            self._file.close()
+
+
+def _read_records(path: Path, max_records: int | None = None):
+    with open(path, "r") as f:
+        for i, line in enumerate(f):
+            if max_records is not None and i >= max_records:
+                return
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping incomplete record in {path}")
+
+
+def load_journal_log(
+    path: Path, max_records: int | None = None, max_nodes: int | None = None
+) -> Journal:
+    """
+    Rebuild a Journal (including the tree) from a JournalLog file.
+    Nodes keep the order in which they were first written (journal order).
+    `max_records`/`max_nodes` restrict loading to a snapshot of the log (see CheckpointStore).
+    """
+    latest: dict[str, dict] = {}
+    for record in _read_records(Path(path), max_records):
+        latest[record["id"]] = record["node"]
+    nodes = list(latest.values())[:max_nodes]
+    node2parent = {d["id"]: d["parent_id"] for d in nodes if d["parent_id"]}
+    return _link_journal([Node.from_dict(d) for d in nodes], node2parent)
+
+
 def parse_markdown_to_dict(content: str):
     """
     Reads a file that contains lines of the form:
@@ -43,7 +43,7 @@ def normalize_layout(layout: np.ndarray):
 def get_completed_stages(log_dir):
     """
     Determine completed stages by checking for the existence of stage directories
-    that contain evidence of completion (tree_data.json, tree_plot.html, or journal.json).
+    that contain evidence of completion (tree_data.json, tree_plot.html, or journal.json[l]).
 
     Returns:
         list: A list of stage names (e.g., ["Stage_1", "Stage_2"])
@@ -63,7 +63,9 @@ def get_completed_stages(log_dir):
         for stage_dir in matching_dirs:
             has_tree_data = (stage_dir / "tree_data.json").exists()
             has_tree_plot = (stage_dir / "tree_plot.html").exists()
-            has_journal = (stage_dir / "journal.json").exists()
+            has_journal = (stage_dir / "journal.json").exists() or (
+                stage_dir / "journal.jsonl"
+            ).exists()
 
             if has_tree_data or has_tree_plot or has_journal:
                 # Found evidence this stage was completed
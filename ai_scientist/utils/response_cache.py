@@ -0,0 +1,189 @@
+"""
+Opt-in, persistent cache of LLM responses (SQLite), shared by ai_scientist.llm and the
+treesearch backend. Responses are keyed on everything that determines them (model, compiled
+messages, temperature, function spec, max tokens, ...), expire after a TTL and are evicted
+least-recently-used once the cache file exceeds its size limit.
+
+Enable it with enable_response_cache() or the AI_SCIENTIST_LLM_CACHE environment variable
+(path of the cache file); the environment is inherited by worker processes.
+Only calls with temperature 0, or made with cache=True, are served from the cache.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+logger = logging.getLogger("ai-scientist")
+
+CACHE_PATH_ENV = "AI_SCIENTIST_LLM_CACHE"
+CACHE_TTL_ENV = "AI_SCIENTIST_LLM_CACHE_TTL"  # seconds
+CACHE_MAX_SIZE_ENV = "AI_SCIENTIST_LLM_CACHE_MAX_MB"
+
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_MAX_SIZE_MB = 1024
+
+
+def make_cache_key(**request: Any) -> str:
+    """Stable hash of a request; values must be JSON-serializable (or have a to_dict)"""
+
+    def default(obj):
+        if hasattr(obj, "to_dict"):
+            return obj.to_dict()
+        raise TypeError(f"Cannot use {type(obj)} in a response cache key")
+
+    return hashlib.sha256(
+        json.dumps(request, sort_keys=True, default=default).encode()
+    ).hexdigest()
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        path: Path | str,
+        ttl: float = DEFAULT_TTL,
+        max_size_mb: float = DEFAULT_MAX_SIZE_MB,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._puts_since_evict = 0
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        """One connection per thread and process (sqlite connections are not fork-safe)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key: str) -> Any | None:
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT value FROM responses WHERE key = ? AND created >= ?",
+                (key, time.time() - self.ttl),
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key)
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"LLM response cache lookup failed: {e}")
+            row = None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, value: Any):
+        data = json.dumps(value)
+        now = time.time()
+        try:
+            self._connect().execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data), now, now),
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"LLM response cache store failed: {e}")
+            return
+        self._puts_since_evict += 1
+        if self._puts_since_evict >= 100:
+            self.evict()
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones until the cache fits"""
+        self._puts_since_evict = 0
+        try:
+            conn = self._connect()
+            conn.execute(
+                "DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,)
+            )
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total <= self.max_size:
+                return
+            excess = total - self.max_size
+            freed = 0
+            keys = []
+            for key, size in conn.execute(
+                "SELECT key, size FROM responses ORDER BY accessed"
+            ):
+                if freed >= excess:
+                    break
+                keys.append((key,))
+                freed += size
+            conn.executemany("DELETE FROM responses WHERE key = ?", keys)
+            logger.info(f"Evicted {len(keys)} LLM response cache entries")
+        except sqlite3.Error as e:
+            logger.warning(f"LLM response cache eviction failed: {e}")
+
+    def cached_call(self, key: str, fn: Callable[[], Any]) -> Any:
+        """The cached value for key, or fn() (which is then cached)"""
+        value = self.get(key)
+        if value is None:
+            value = fn()
+            self.put(key, value)
+        return value
+
+
+_cache: ResponseCache | None = None
+_cache_config: tuple | None = None
+
+
+def enable_response_cache(
+    path: Path | str,
+    ttl: float = DEFAULT_TTL,
+    max_size_mb: float = DEFAULT_MAX_SIZE_MB,
+):
+    """Enable the cache for this process and (through the environment) its children"""
+    os.environ[CACHE_PATH_ENV] = str(path)
+    os.environ[CACHE_TTL_ENV] = str(ttl)
+    os.environ[CACHE_MAX_SIZE_ENV] = str(max_size_mb)
+
+
+def get_response_cache() -> ResponseCache | None:
+    """The process-wide cache, or None if it is not enabled"""
+    global _cache, _cache_config
+    path = os.environ.get(CACHE_PATH_ENV)
+    if not path:
+        return None
+    config = (
+        path,
+        float(os.environ.get(CACHE_TTL_ENV, DEFAULT_TTL)),
+        float(os.environ.get(CACHE_MAX_SIZE_ENV, DEFAULT_MAX_SIZE_MB)),
+    )
+    if _cache is None or _cache_config != config:
+        _cache = ResponseCache(*config)
+        _cache_config = config
+    return _cache
+
+
+def should_cache(temperature: float | None, cache: bool | None) -> bool:
+    """Whether a call may be served from the cache: explicit opt-in, or deterministic"""
+    if get_response_cache() is None:
+        return False
+    if cache is not None:
+        return cache
+    return temperature == 0
@@ -21,6 +21,9 @@ class TokenTracker:
             lambda: {"prompt": 0, "completion": 0, "reasoning": 0, "cached": 0}
         )
         self.interactions = defaultdict(list)
+        # per-stage request counts, token counts and latency (see add_request)
+        self.stage = None
+        self.stage_counts = defaultdict(self._new_stage_counts)
 
         self.MODEL_PRICES = {
             "gpt-4o-2024-11-20": {
@@ -72,6 +75,51 @@ class TokenTracker:
         self.token_counts[model]["reasoning"] += reasoning_tokens
         self.token_counts[model]["cached"] += cached_tokens
 
+    @staticmethod
+    def _new_stage_counts() -> Dict[str, float]:
+        return {"requests": 0, "prompt": 0, "cached": 0, "completion": 0, "latency": 0.0}
+
+    def set_stage(self, stage: Optional[str]):
+        """Attribute subsequent requests (add_request) to a stage"""
+        self.stage = stage
+
+    def add_request(
+        self,
+        model: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        cached_tokens: int,
+        latency: float,
+    ):
+        """Record one request: its tokens per model and, with its latency, per stage."""
+        self.add_tokens(model, prompt_tokens, completion_tokens, 0, cached_tokens)
+        counts = self.stage_counts[self.stage or "default"]
+        counts["requests"] += 1
+        counts["prompt"] += prompt_tokens
+        counts["cached"] += cached_tokens
+        counts["completion"] += completion_tokens
+        counts["latency"] += latency
+
+    def get_stage_summary(self) -> Dict[str, Dict[str, float]]:
+        """Per-stage usage, with the fraction of prompt tokens served from the provider cache"""
+        summary = {}
+        for stage, counts in self.stage_counts.items():
+            summary[stage] = {
+                **counts,
+                "cached_fraction": counts["cached"] / max(counts["prompt"], 1),
+                "mean_latency": counts["latency"] / max(counts["requests"], 1),
+            }
+        return summary
+
+    def log_stage_summary(self):
+        for stage, usage in self.get_stage_summary().items():
+            logging.getLogger("ai-scientist").info(
+                f"LLM usage in {stage}: {usage['requests']} requests, "
+                f"{usage['prompt']} prompt tokens ({usage['cached_fraction']:.0%} cached), "
+                f"{usage['completion']} completion tokens, "
+                f"{usage['mean_latency']:.2f}s mean latency"
+            )
+
     def add_interaction(
         self,
         model: str,
@@ -102,6 +150,7 @@ class TokenTracker:
             lambda: {"prompt": 0, "completion": 0, "reasoning": 0, "cached": 0}
         )
         self.interactions = defaultdict(list)
+        self.stage_counts = defaultdict(self._new_stage_counts)
         # self._encoders = {}
 
     def calculate_cost(self, model: str) -> float:
@@ -2,7 +2,6 @@ import os.path as osp
 import json
 import argparse
 import shutil
-import torch
 import os
 import re
 import sys
@@ -26,6 +25,13 @@ from ai_scientist.perform_icbinb_writeup import (
 from ai_scientist.perform_llm_review import perform_review, load_paper
 from ai_scientist.perform_vlm_review import perform_imgs_cap_ref_review
 from ai_scientist.utils.token_tracker import token_tracker
+from ai_scientist.treesearch.parallel_agent import get_visible_gpus
+from ai_scientist.campaign import (
+    PHASE_FILE_ENV,
+    DeviceScheduler,
+    report_phase,
+    run_campaign,
+)
 
 
 def print_time():
@@ -128,13 +134,97 @@ def parse_arguments():
         action="store_true",
         help="If set, skip the review process",
     )
+    parser.add_argument(
+        "--resume",
+        type=str,
+        default=None,
+        help="Path to the directory of an interrupted run (experiments/...) to resume from its last checkpoint",
+    )
+    parser.add_argument(
+        "--campaign",
+        action="store_true",
+        help="Run many ideas of the ideas file concurrently (all of them, or --idea_indices), sharing the GPUs",
+    )
+    parser.add_argument(
+        "--idea_indices",
+        type=str,
+        default=None,
+        help="Campaign mode: comma-separated indices of the ideas to run (default: all)",
+    )
+    parser.add_argument(
+        "--gpus_per_idea",
+        type=int,
+        default=1,
+        help="Campaign mode: number of GPUs leased to an idea for its experiments",
+    )
+    parser.add_argument(
+        "--max_concurrent_ideas",
+        type=int,
+        default=None,
+        help="Campaign mode: maximum number of ideas in progress at once (default: 2 per GPU slot)",
+    )
     return parser.parse_args()
 
 
+# options of the campaign runner itself, not passed on to the runs of its ideas
+CAMPAIGN_OPTIONS = {
+    "--campaign": 0,
+    "--idea_indices": 1,
+    "--gpus_per_idea": 1,
+    "--max_concurrent_ideas": 1,
+    "--idea_idx": 1,
+}
+
+
+def get_child_argv(argv):
+    """Command line for the runs of a campaign's ideas (without the campaign options)"""
+    child_argv = []
+    skip = 0
+    for arg in argv:
+        if skip:
+            skip -= 1
+            continue
+        name = arg.split("=", 1)[0]
+        if name in CAMPAIGN_OPTIONS:
+            skip = 0 if "=" in arg else CAMPAIGN_OPTIONS[name]
+            continue
+        child_argv.append(arg)
+    return child_argv
+
+
+def launch_campaign(args):
+    with open(args.load_ideas, "r") as f:
+        ideas = json.load(f)
+    if args.idea_indices:
+        idea_indices = [int(i) for i in args.idea_indices.split(",")]
+    else:
+        idea_indices = list(range(len(ideas)))
+    scheduler = DeviceScheduler(get_available_gpus(), gpus_per_idea=args.gpus_per_idea)
+    num_slots = max(scheduler.num_gpus // max(scheduler.gpus_per_idea, 1), 1)
+    # the other half of the ideas in progress are in their LLM-bound phases
+    max_concurrent_ideas = args.max_concurrent_ideas or 2 * num_slots
+    date = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    campaign_dir = f"experiments/campaign_{date}"
+    print(
+        f"Running {len(idea_indices)} ideas from {args.load_ideas} on {num_slots} device slot(s), "
+        f"at most {max_concurrent_ideas} at a time; logs in {campaign_dir}"
+    )
+    run_campaign(
+        ideas,
+        idea_indices,
+        get_child_argv(sys.argv[1:]),
+        campaign_dir,
+        scheduler,
+        max_concurrent_ideas,
+        launch_script=osp.abspath(__file__),
+    )
+
+
 def get_available_gpus(gpu_ids=None):
     if gpu_ids is not None:
         return [int(gpu_id) for gpu_id in gpu_ids.split(",")]
-    return list(range(torch.cuda.device_count()))
+    # respects CUDA_VISIBLE_DEVICES (set per idea in campaign mode)
+    return get_visible_gpus()
 
 
 def find_pdf_path_for_review(idea_dir):
@@ -184,76 +274,91 @@ if __name__ == "__main__":
     os.environ["AI_SCIENTIST_ROOT"] = os.path.dirname(os.path.abspath(__file__))
     print(f"Set AI_SCIENTIST_ROOT to {os.environ['AI_SCIENTIST_ROOT']}")
 
+    if args.campaign:
+        if args.resume:
+            sys.exit("--resume cannot be combined with --campaign")
+        launch_campaign(args)
+        sys.exit(0)
+
     # Check available GPUs and adjust parallel processes if necessary
     available_gpus = get_available_gpus()
     print(f"Using GPUs: {available_gpus}")
 
-    with open(args.load_ideas, "r") as f:
-        ideas = json.load(f)
-        print(f"Loaded {len(ideas)} pregenerated ideas from {args.load_ideas}")
-
-    idea = ideas[args.idea_idx]
-
-    date = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    idea_dir = f"experiments/{date}_{idea['Name']}_attempt_{args.attempt_id}"
-    print(f"Results will be saved in {idea_dir}")
-    os.makedirs(idea_dir, exist_ok=True)
-
-    # Convert idea json to markdown file
-    idea_path_md = osp.join(idea_dir, "idea.md")
-
-    # If load_code is True, get the Python file with same name as JSON
-    code = None
-    if args.load_code:
-        code_path = args.load_ideas.rsplit(".", 1)[0] + ".py"
-        if os.path.exists(code_path):
-            with open(code_path, "r") as f:
-                code = f.read()
-        else:
-            print(f"Warning: Code file {code_path} not found")
+    if args.resume:
+        # reuse the idea and config of the interrupted run
+        idea_dir = args.resume
+        print(f"Resuming run in {idea_dir}")
+        idea_config_path = osp.join(idea_dir, "bfts_config.yaml")
     else:
-        code_path = None
+        with open(args.load_ideas, "r") as f:
+            ideas = json.load(f)
+            print(f"Loaded {len(ideas)} pregenerated ideas from {args.load_ideas}")
+
+        idea = ideas[args.idea_idx]
+
+        date = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        idea_dir = f"experiments/{date}_{idea['Name']}_attempt_{args.attempt_id}"
+        print(f"Results will be saved in {idea_dir}")
+        os.makedirs(idea_dir, exist_ok=True)
+
+        # Convert idea json to markdown file
+        idea_path_md = osp.join(idea_dir, "idea.md")
+
+        # If load_code is True, get the Python file with same name as JSON
+        code = None
+        if args.load_code:
+            code_path = args.load_ideas.rsplit(".", 1)[0] + ".py"
+            if os.path.exists(code_path):
+                with open(code_path, "r") as f:
+                    code = f.read()
+            else:
+                print(f"Warning: Code file {code_path} not found")
+        else:
+            code_path = None
 
-    idea_to_markdown(ideas[args.idea_idx], idea_path_md, code_path)
+        idea_to_markdown(ideas[args.idea_idx], idea_path_md, code_path)
 
-    dataset_ref_code = None
-    if args.add_dataset_ref:
-        dataset_ref_path = "hf_dataset_reference.py"
-        if os.path.exists(dataset_ref_path):
-            with open(dataset_ref_path, "r") as f:
-                dataset_ref_code = f.read()
+        dataset_ref_code = None
+        if args.add_dataset_ref:
+            dataset_ref_path = "hf_dataset_reference.py"
+            if os.path.exists(dataset_ref_path):
+                with open(dataset_ref_path, "r") as f:
+                    dataset_ref_code = f.read()
+            else:
+                print(f"Warning: Dataset reference file {dataset_ref_path} not found")
+                dataset_ref_code = None
+
+        if dataset_ref_code is not None and code is not None:
+            added_code = dataset_ref_code + "\n" + code
+        elif dataset_ref_code is not None and code is None:
+            added_code = dataset_ref_code
+        elif dataset_ref_code is None and code is not None:
+            added_code = code
         else:
-            print(f"Warning: Dataset reference file {dataset_ref_path} not found")
-            dataset_ref_code = None
-
-    if dataset_ref_code is not None and code is not None:
-        added_code = dataset_ref_code + "\n" + code
-    elif dataset_ref_code is not None and code is None:
-        added_code = dataset_ref_code
-    elif dataset_ref_code is None and code is not None:
-        added_code = code
-    else:
-        added_code = None
+            added_code = None
 
-    print(added_code)
+        print(added_code)
 
-    # Add code to idea json if it was loaded
-    if added_code is not None:
-        ideas[args.idea_idx]["Code"] = added_code
+        # Add code to idea json if it was loaded
+        if added_code is not None:
+            ideas[args.idea_idx]["Code"] = added_code
 
-    # Store raw idea json
-    idea_path_json = osp.join(idea_dir, "idea.json")
-    with open(idea_path_json, "w") as f:
-        json.dump(ideas[args.idea_idx], f, indent=4)
+        # Store raw idea json
+        idea_path_json = osp.join(idea_dir, "idea.json")
+        with open(idea_path_json, "w") as f:
+            json.dump(ideas[args.idea_idx], f, indent=4)
 
-    config_path = "bfts_config.yaml"
-    idea_config_path = edit_bfts_config_file(
-        config_path,
-        idea_dir,
-        idea_path_json,
-    )
+        config_path = "bfts_config.yaml"
+        idea_config_path = edit_bfts_config_file(
+            config_path,
+            idea_dir,
+            idea_path_json,
+        )
 
-    perform_experiments_bfts(idea_config_path)
+    report_phase("experiments", idea_dir)
+    perform_experiments_bfts(idea_config_path, resume=args.resume is not None)
+    # the rest of the run is LLM-bound (in a campaign, its GPUs go to the next idea)
+    report_phase("plots", idea_dir)
     experiment_results_dir = osp.join(idea_dir, "logs/0-run/experiment_results")
     if os.path.exists(experiment_results_dir):
         shutil.copytree(
@@ -269,6 +374,7 @@ if __name__ == "__main__":
     save_token_tracker(idea_dir)
 
     if not args.skip_writeup:
+        report_phase("writeup", idea_dir)
         writeup_success = False
         citations_text = gather_citations(
             idea_dir,
@@ -303,6 +409,7 @@ if __name__ == "__main__":
 
     if not args.skip_review and not args.skip_writeup:
         # Perform paper review if the paper exists
+        report_phase("review", idea_dir)
         pdf_path = find_pdf_path_for_review(idea_dir)
         if os.path.exists(pdf_path):
             print("Paper found at: ", pdf_path)
@@ -318,6 +425,7 @@ if __name__ == "__main__":
                 json.dump(review_img_cap_ref, f, indent=4)
             print("Paper review completed.")
 
+    report_phase("done", idea_dir)
     print("Start cleaning up processes")
     # Kill all mp and torch processes associated with this experiment
     import psutil
@@ -345,7 +453,10 @@ if __name__ == "__main__":
             continue
 
     # Additional cleanup: find any orphaned processes containing specific keywords
+    # (not in a campaign, where these would include the other ideas and the campaign runner)
     keywords = ["python", "torch", "mp", "bfts", "experiment"]
+    if os.environ.get(PHASE_FILE_ENV):
+        keywords = []
     for proc in psutil.process_iter(["name", "cmdline"]):
         try:
             # Check both process name and command line arguments